@@ -0,0 +1,90 @@
+"""
+micro-benchmarks of hot functions, e.g.
+python -m benchmarks --sizes 1000 100000 --output results.json --threshold 0.3
+exits with 1 whenever something got slower than the baseline by more than --threshold
+"""
+
+from argparse import ArgumentParser, Namespace
+from datetime import datetime, timezone
+from json import dumps, loads
+from pathlib import Path
+from platform import platform, python_version
+
+from benchmarks.cases import iterate_benchmarks
+from benchmarks.timing import find_regressions_between, measure
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+
+def build_parser() -> ArgumentParser:
+    parser = ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("--seed", type=int, default=2025)
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="*",
+        default=[1_000, 100_000, 1_000_000],
+        help="numbers of receipts filter_and_paginate_using() is benchmarked against, "
+        "none at all skips seeding (takes a minute or so for a million)",
+    )
+    parser.add_argument("--only", help="run benchmarks whose names contain this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, help="where results go as JSON")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="allowed slowdown relative to the baseline, 0.25 = 25%%",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="store results as the new baseline instead of comparing with it",
+    )
+    return parser
+
+
+def run_benchmarks_with(arguments: Namespace) -> dict[str, dict]:
+    results = {}
+    for name, function in iterate_benchmarks(arguments.seed, arguments.sizes):
+        if arguments.only and arguments.only not in name:
+            continue
+        results[name] = measure(function, repeat=arguments.repeat)
+        print(f"{name:<55} {results[name]['median_us']:>14.3f} us")
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    arguments = build_parser().parse_args(argv)
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": python_version(),
+            "platform": platform(),
+            "seed": arguments.seed,
+        },
+        "results": run_benchmarks_with(arguments),
+    }
+
+    if arguments.output:
+        arguments.output.write_text(dumps(report, indent=2) + "\n")
+    if arguments.update_baseline:
+        arguments.baseline.write_text(dumps(report, indent=2) + "\n")
+        return 0
+    if not arguments.baseline.exists():
+        print(f"No baseline at {arguments.baseline}, nothing to compare with")
+        return 0
+
+    baseline = loads(arguments.baseline.read_text())["results"]
+    regressions = find_regressions_between(report["results"], baseline, arguments.threshold)
+    for regression in regressions:
+        print(
+            f"REGRESSION {regression['name']}: {regression['baseline_us']} us -> "
+            f"{regression['median_us']} us (+{regression['slowdown']:.0%})"
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
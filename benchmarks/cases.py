@@ -0,0 +1,255 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from decimal import Decimal
+from functools import partial
+from pathlib import Path
+from random import Random
+from tempfile import TemporaryDirectory
+from time import time
+from typing import Callable, Iterator
+
+from cryptography.hazmat.primitives.asymmetric.ec import SECP256R1, generate_private_key
+from jwt import encode
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+import src.api.security as security
+from src.api.security import (
+    extract_payload_from,
+    is_possible_to_perform_request_based_on,
+    verified_tokens_cache,
+)
+from src.core.db.base import Base, FormattedDecimal
+from src.core.db.managers import ReceiptManager
+from src.core.db.models import Receipt, ReceiptItems, User
+from src.core.handlers.auth import hash_password
+from src.core.handlers.receipts.get import convert_to_dict_repr
+from src.core.handlers.receipts.rendering import (
+    DEFAULT_TEMPLATE_PATH,
+    build_str_repr_of_receipt,
+    render_default_layout,
+)
+from src.core.sketches import HyperLogLog, build_distinct_count_sketch
+
+Benchmark = tuple[str, Callable[[], object]]
+
+FORMATTING_CONFIG = {
+    "delimiter": "=",
+    "separator": "-",
+    "thank_you_note": "Дякуємо за покупку!",
+    "cash_label": "Готівка",
+    "cashless_label": "Картка",
+    "total_label": "СУМА",
+    "rest_label": "Решта",
+    "datetime_format": "%d.%m.%Y %H:%M",
+    "width": 32,
+}
+ITEM_NAMES = (
+    "Mavic 3T",
+    "Дрон FPV з акумулятором 6S чорний",
+    "Молоко 2.5% 900г",
+    "Antidisestablishmentarianism-flavoured extra long chewing gum",
+    "Кава",
+)
+HTTP_METHODS = ("GET", "POST", "PUT", "PATCH", "DELETE")
+ROOT_ROUTES = ("auth", "products", "receipts", "analytics", "stats")
+PAGINATED_USERS = 100
+ITEMS_PER_RECEIPT = 2
+SEEDING_CHUNK = 20_000
+DAYS_IN_LEAP_YEAR = 366
+# distinct values a day, few enough to keep its HyperLogLog sparse, and enough to make it dense
+DISTINCT_COUNT_DAILY_VALUES = {"sparse": 100, "dense": 5_000}
+
+
+def generate_amount_using(rng: Random, upper_bound: int = 100_000) -> FormattedDecimal:
+    return FormattedDecimal(Decimal(rng.randint(1, upper_bound * 100)).scaleb(-2))
+
+
+def build_receipt_using(rng: Random, items_count: int = 5) -> Receipt:
+    items = [
+        ReceiptItems(
+            id=f"item{number:08}",
+            name=rng.choice(ITEM_NAMES),
+            price=generate_amount_using(rng),
+            quantity=FormattedDecimal(rng.randint(1, 20)),
+        )
+        for number in range(items_count)
+    ]
+    total = FormattedDecimal(sum(item.total for item in items))
+    return Receipt(
+        id="benchReceipt",
+        user=User(id="benchUser", name="ФОП Джонсонюк Борис"),
+        items=items,
+        is_cashless_payment=rng.random() < 0.5,
+        payment_amount=total,
+        total=total,
+        creation_date=datetime(2025, 1, 1) + timedelta(minutes=rng.randint(0, 525_600)),
+    )
+
+
+def iterate_rendering_benchmarks(rng: Random) -> Iterator[Benchmark]:
+    receipt = build_receipt_using(rng)
+    receipt_data = convert_to_dict_repr(receipt)
+
+    yield "convert_to_dict_repr[5 items]", lambda: convert_to_dict_repr(receipt)
+    # called directly: build_str_repr_of_receipt() only takes this path with RECEIPT_FAST_RENDERER on
+    yield (
+        "render_default_layout",
+        lambda: render_default_layout(receipt_data, FORMATTING_CONFIG),
+    )
+    yield (
+        "build_str_repr_of_receipt[template]",
+        lambda: build_str_repr_of_receipt(
+            receipt_data, FORMATTING_CONFIG, template_path=DEFAULT_TEMPLATE_PATH
+        ),
+    )
+
+    amounts = [generate_amount_using(rng, 10_000_000) for _ in range(100)]
+    yield "FormattedDecimal.__str__[x100]", lambda: [str(amount) for amount in amounts]
+
+
+def iterate_security_benchmarks(rng: Random) -> Iterator[Benchmark]:
+    accesses = frozenset(
+        f"{rng.choice(HTTP_METHODS)}@{rng.choice(ROOT_ROUTES)}" for _ in range(20)
+    )
+    yield (
+        "is_possible_to_perform_request_based_on",
+        lambda: is_possible_to_perform_request_based_on("GET", "receipts", accesses),
+    )
+
+    salt = rng.randbytes(16).hex()
+    yield "hash_password", lambda: hash_password("SuperSecret123", salt)
+
+    keys = {
+        "HS256": rng.randbytes(32).hex(),
+        "ES256": generate_private_key(SECP256R1()),
+    }
+    for algorithm, key in keys.items():
+        token = encode(
+            {"sub": "benchUser", "exp": int(time()) + 24 * 60 * 60},
+            key=key,
+            algorithm=algorithm,
+        )
+
+        def verify_from_scratch(token: str = token) -> dict:
+            verified_tokens_cache.clear()
+            return extract_payload_from(token)
+
+        with configured_jwt(key, algorithm):
+            yield f"extract_payload_from[{algorithm}]", verify_from_scratch
+            yield f"extract_payload_from[{algorithm}, cached]", partial(
+                extract_payload_from, token
+            )
+    verified_tokens_cache.clear()
+
+
+def iterate_sketch_benchmarks(rng: Random) -> Iterator[Benchmark]:
+    for density, values_count in DISTINCT_COUNT_DAILY_VALUES.items():
+        payloads = []
+        for _ in range(DAYS_IN_LEAP_YEAR):
+            sketch = build_distinct_count_sketch()
+            for _ in range(values_count):
+                sketch.add(f"user{rng.randrange(20 * values_count)}")
+            payloads.append(sketch.to_bytes())
+
+        def merge_and_count(payloads: list[bytes] = payloads) -> int:
+            """same as estimate_distinct_count_of() does with days fetched from db"""
+            union = build_distinct_count_sketch()
+            for payload in payloads:
+                union.merge(HyperLogLog.from_bytes(payload))
+            return union.count()
+
+        yield f"HyperLogLog.merge[{DAYS_IN_LEAP_YEAR} {density} days]", merge_and_count
+
+
+@contextmanager
+def configured_jwt(key, algorithm: str) -> Iterator[None]:
+    """benchmarked code reads JWT settings once at import, so they are swapped right there"""
+    previous = security.JWT_SECRET_KEY, security.JWT_ALGORITHM
+    security.JWT_SECRET_KEY, security.JWT_ALGORITHM = key, algorithm
+    try:
+        yield
+    finally:
+        security.JWT_SECRET_KEY, security.JWT_ALGORITHM = previous
+
+
+def seed_receipts_into(engine, rng: Random, first: int, last: int) -> None:
+    """receipts number [first, last) spread evenly between PAGINATED_USERS users"""
+    started_at = datetime(2020, 1, 1)
+    with engine.begin() as connection:
+        for chunk_start in range(first, last, SEEDING_CHUNK):
+            receipt_rows, item_rows = [], []
+            for number in range(chunk_start, min(chunk_start + SEEDING_CHUNK, last)):
+                receipt_id = f"r{number:011}"
+                total = generate_amount_using(rng)
+                receipt_rows.append(
+                    {
+                        "id": receipt_id,
+                        "user_id": f"benchUser{number % PAGINATED_USERS:03}",
+                        "is_cashless_payment": number % 2 == 0,
+                        "payment_amount": total,
+                        "total": total,
+                        "creation_date": started_at + timedelta(seconds=rng.randint(0, 10**8)),
+                    }
+                )
+                item_rows.extend(
+                    {
+                        "id": f"{receipt_id}i{item}",
+                        "receipt_id": receipt_id,
+                        "name": rng.choice(ITEM_NAMES),
+                        "price": total,
+                        "quantity": Decimal(1),
+                    }
+                    for item in range(ITEMS_PER_RECEIPT)
+                )
+            connection.execute(insert(Receipt), receipt_rows)
+            connection.execute(insert(ReceiptItems), item_rows)
+
+
+def iterate_pagination_benchmarks(rng: Random, sizes: list[int]) -> Iterator[Benchmark]:
+    """one SQLite database grows from a size to the next one between benchmarks"""
+    with TemporaryDirectory() as temp_dir:
+        engine = create_engine(f"sqlite:///{Path(temp_dir) / 'benchmarks.db'}")
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as connection:
+            connection.execute(
+                insert(User),
+                [
+                    {
+                        "id": f"benchUser{number:03}",
+                        "login": f"benchUser{number:03}",
+                        "name": f"benchUser{number:03}",
+                        "email": f"benchUser{number:03}@example.com",
+                        "password_hash": "hash",
+                    }
+                    for number in range(PAGINATED_USERS)
+                ],
+            )
+
+        session = sessionmaker(bind=engine)()
+        manager = ReceiptManager(session)
+        filters = {"created_after": datetime(2021, 1, 1), "min_total": Decimal(100)}
+        seeded = 0
+        for size in sorted(sizes):
+            seed_receipts_into(engine, rng, seeded, size)
+            seeded = size
+            with engine.begin() as connection:
+                connection.exec_driver_sql("ANALYZE")
+
+            def paginate(filters: dict = filters) -> tuple:
+                result = manager.filter_and_paginate_using("benchUser007", 20, 40, filters)
+                session.expunge_all()
+                return result
+
+            yield f"filter_and_paginate_using[{size} receipts]", paginate
+
+        session.close()
+        engine.dispose()
+
+
+def iterate_benchmarks(seed: int, sizes: list[int]) -> Iterator[Benchmark]:
+    """every group gets its own Random, so adding benchmarks to one doesn't shift others' data"""
+    yield from iterate_rendering_benchmarks(Random(seed))
+    yield from iterate_security_benchmarks(Random(seed))
+    yield from iterate_sketch_benchmarks(Random(seed))
+    yield from iterate_pagination_benchmarks(Random(seed), sizes)
@@ -0,0 +1,319 @@
+"""
+end-to-end load test of main:app, e.g.
+python -m benchmarks.load --requests 500 --concurrency 20 [--base-url http://localhost:8000]
+
+In-process by default: requests go straight into the app through httpx.ASGITransport,
+so every SQL statement app runs is counted as well. The database behind DATABASE_URL
+has to be migrated (alembic upgrade head) and is filled with load test users and receipts.
+"""
+
+from argparse import ArgumentParser, Namespace
+from asyncio import Queue, gather, run
+from contextlib import contextmanager
+from json import dumps
+from math import ceil
+from pathlib import Path
+from random import Random
+from time import perf_counter
+from typing import Awaitable, Callable, Iterator
+
+from httpx import ASGITransport, AsyncClient, Response
+from sqlalchemy import Engine, event
+
+Step = Callable[[AsyncClient, int], Awaitable[list[Response]]]
+
+SCENARIOS = (
+    "signup_login_burst",
+    "receipt_ingestion",
+    "deep_pagination_offset",
+    "deep_pagination_cursor",
+    "text_rendering_cold",
+    "text_rendering_warm",
+)
+PAGE_SIZE = 50
+TEXT_WIDTHS = range(20, 101)
+
+
+def find_percentile_of(sorted_values: list[float], percentile: float) -> float:
+    """nearest-rank, aka the smallest value at least `percentile`% of all values are below or equal to"""
+    if not sorted_values:
+        return 0.0
+    rank = max(ceil(percentile / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+class ScenarioStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: list[float] = []
+        self.errors: int = 0
+        self.elapsed_seconds: float = 0.0
+        self.queries: int | None = None
+
+    def record(self, response: Response) -> None:
+        self.latencies.append(response.elapsed.total_seconds())
+        if response.is_error:
+            self.errors += 1
+
+    def describe(self) -> dict[str, float | int | None]:
+        requests = len(self.latencies)
+        latencies_ms = sorted(latency * 1000 for latency in self.latencies)
+        return {
+            "requests": requests,
+            "errors": self.errors,
+            "error_rate": round(self.errors / requests, 4) if requests else 0.0,
+            "throughput_rps": round(requests / self.elapsed_seconds, 2) if self.elapsed_seconds else 0.0,
+            "p50_ms": round(find_percentile_of(latencies_ms, 50), 3),
+            "p95_ms": round(find_percentile_of(latencies_ms, 95), 3),
+            "p99_ms": round(find_percentile_of(latencies_ms, 99), 3),
+            "queries_per_request": round(self.queries / requests, 2)
+            if self.queries is not None and requests
+            else None,
+        }
+
+
+class QueryCounter:
+    """counts statements sent through given engines, both sync and async ones"""
+
+    def __init__(self, engines: list[Engine]):
+        self.engines = engines
+        self.count: int = 0
+
+    def _count(self, *_) -> None:
+        self.count += 1
+
+    @contextmanager
+    def counting(self) -> Iterator["QueryCounter"]:
+        self.count = 0
+        for engine in self.engines:
+            event.listen(engine, "before_cursor_execute", self._count)
+        try:
+            yield self
+        finally:
+            for engine in self.engines:
+                event.remove(engine, "before_cursor_execute", self._count)
+
+
+async def drive(
+    client: AsyncClient,
+    step: Step,
+    stats: ScenarioStats,
+    total_steps: int,
+    concurrency: int,
+) -> None:
+    """`concurrency` workers share `total_steps` steps, each step being one or several requests"""
+    pending: Queue[int] = Queue()
+    for number in range(total_steps):
+        pending.put_nowait(number)
+
+    async def work() -> None:
+        while not pending.empty():
+            number = pending.get_nowait()
+            for response in await step(client, number):
+                stats.record(response)
+
+    started_at = perf_counter()
+    await gather(*(work() for _ in range(concurrency)))
+    stats.elapsed_seconds = perf_counter() - started_at
+
+
+def build_receipt_payload_using(rng: Random) -> dict:
+    products = [
+        {
+            "name": rng.choice(("Молоко", "Хліб", "Mavic 3T", "Кава", "Сир твердий")),
+            "price": f"{rng.randint(100, 9_999) / 100:.2f}",
+            "quantity": f"{rng.randint(1, 2)}.00",
+        }
+        for _ in range(rng.randint(1, 4))
+    ]
+    total = sum(float(item["price"]) * float(item["quantity"]) for item in products)
+    return {
+        "products": products,
+        "payment": {"is_cashless_payment": True, "amount": f"{total:.2f}"},
+    }
+
+
+async def sign_up_and_log_in(client: AsyncClient, login: str) -> list[Response]:
+    signup = await client.post(
+        "/auth/signup",
+        json={
+            "login": login,
+            "email": f"{login}@example.com",
+            "name": login,
+            "password": "LoadTest123",
+        },
+    )
+    login_response = await client.post(
+        "/auth/login", json={"login": login, "password": "LoadTest123"}
+    )
+    return [signup, login_response]
+
+
+class LoadTest:
+    """
+    prepares a user with `history_size` receipts (unmeasured),
+    then runs scenarios one after another, so that query counts don't mix up
+    """
+
+    def __init__(
+        self,
+        client: AsyncClient,
+        query_counter: QueryCounter | None,
+        *,
+        seed: int,
+        run_id: str,
+        history_size: int,
+    ):
+        self.client = client
+        self.query_counter = query_counter
+        self.rng = Random(seed)
+        self.run_id = run_id
+        self.history_size = history_size
+
+        self.headers: dict[str, str] = {}
+        self.receipt_ids: list[str] = []
+        self.cursors: list[str] = []
+
+    async def prepare(self) -> None:
+        _, login_response = await sign_up_and_log_in(self.client, f"load{self.run_id}")
+        login_response.raise_for_status()
+        self.headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+        for batch_start in range(0, self.history_size, 500):
+            batch_size = min(500, self.history_size - batch_start)
+            response = await self.client.post(
+                "/receipts/batch",
+                json={"receipts": [build_receipt_payload_using(self.rng) for _ in range(batch_size)]},
+                headers=self.headers,
+            )
+            response.raise_for_status()
+            self.receipt_ids.extend(receipt["id"] for receipt in response.json()["receipts"])
+
+        cursor = None
+        while True:
+            page = await self.client.get(
+                "/receipts/",
+                params={"limit": PAGE_SIZE} | ({"cursor": cursor} if cursor else {}),
+                headers=self.headers,
+            )
+            cursor = page.json()["pagination"]["next_cursor"]
+            if cursor is None:
+                break
+            self.cursors.append(cursor)
+
+    async def run(self, scenario: str, total_steps: int, concurrency: int) -> dict:
+        steps: dict[str, Step] = {
+            "signup_login_burst": self.sign_up_someone,
+            "receipt_ingestion": self.ingest_receipt,
+            "deep_pagination_offset": self.fetch_deep_page_by_offset,
+            "deep_pagination_cursor": self.fetch_deep_page_by_cursor,
+            "text_rendering_cold": self.render_uncached_text,
+            "text_rendering_warm": self.render_cached_text,
+        }
+        if scenario == "text_rendering_warm":
+            await self.client.get(f"/receipts/{self.receipt_ids[0]}/text")
+
+        stats = ScenarioStats(scenario)
+        if self.query_counter is None:
+            await drive(self.client, steps[scenario], stats, total_steps, concurrency)
+        else:
+            with self.query_counter.counting() as counter:
+                await drive(self.client, steps[scenario], stats, total_steps, concurrency)
+            stats.queries = counter.count
+        return stats.describe()
+
+    async def sign_up_someone(self, client: AsyncClient, number: int) -> list[Response]:
+        return await sign_up_and_log_in(client, f"load{self.run_id}u{number}")
+
+    async def ingest_receipt(self, client: AsyncClient, number: int) -> list[Response]:
+        payload = build_receipt_payload_using(Random(number))
+        return [await client.post("/receipts/", json=payload, headers=self.headers)]
+
+    async def fetch_deep_page_by_offset(self, client: AsyncClient, number: int) -> list[Response]:
+        deepest_offset = max(self.history_size - PAGE_SIZE, 0)
+        offset = deepest_offset - Random(number).randint(0, deepest_offset // 10)
+        return [
+            await client.get(
+                "/receipts/",
+                params={"limit": PAGE_SIZE, "offset": offset, "with_total": True},
+                headers=self.headers,
+            )
+        ]
+
+    async def fetch_deep_page_by_cursor(self, client: AsyncClient, number: int) -> list[Response]:
+        deep_cursors = self.cursors[-max(len(self.cursors) // 10, 1):]
+        return [
+            await client.get(
+                "/receipts/",
+                params={"limit": PAGE_SIZE, "cursor": deep_cursors[number % len(deep_cursors)]},
+                headers=self.headers,
+            )
+        ]
+
+    async def render_uncached_text(self, client: AsyncClient, number: int) -> list[Response]:
+        """every (receipt, width) pair is requested once, so neither cache tier can help"""
+        combinations = len(self.receipt_ids) * len(TEXT_WIDTHS)
+        receipt_id, width = divmod(number % combinations, len(TEXT_WIDTHS))
+        return [
+            await client.get(
+                f"/receipts/{self.receipt_ids[receipt_id]}/text",
+                params={"chars_per_line": TEXT_WIDTHS[width]},
+            )
+        ]
+
+    async def render_cached_text(self, client: AsyncClient, number: int) -> list[Response]:
+        return [await client.get(f"/receipts/{self.receipt_ids[0]}/text")]
+
+
+def build_parser() -> ArgumentParser:
+    parser = ArgumentParser(prog="python -m benchmarks.load")
+    parser.add_argument("--base-url", help="running app (e.g. uvicorn) to load instead of in-process one")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200, help="steps per scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--history-size", type=int, default=2000, help="receipts of the paginated user")
+    parser.add_argument("--seed", type=int, default=2025)
+    parser.add_argument("--output", type=Path, help="where report goes as JSON")
+    return parser
+
+
+async def load_test_with(arguments: Namespace) -> dict[str, dict]:
+    run_id = f"{Random().getrandbits(32):08x}"
+    if arguments.base_url:
+        client = AsyncClient(base_url=arguments.base_url, timeout=60)
+        query_counter = None
+    else:
+        from main import app
+        from src.core.db.base import async_engine, engine
+
+        # unhandled exceptions become 500s, same as behind a real server
+        transport = ASGITransport(app=app, raise_app_exceptions=False)
+        client = AsyncClient(transport=transport, base_url="http://loadtest")
+        query_counter = QueryCounter([engine, async_engine.sync_engine])
+
+    report = {}
+    async with client:
+        load_test = LoadTest(
+            client,
+            query_counter,
+            seed=arguments.seed,
+            run_id=run_id,
+            history_size=arguments.history_size,
+        )
+        await load_test.prepare()
+        for scenario in arguments.scenarios:
+            report[scenario] = await load_test.run(scenario, arguments.requests, arguments.concurrency)
+            print(f"{scenario:<24} {dumps(report[scenario])}")
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    arguments = build_parser().parse_args(argv)
+    report = run(load_test_with(arguments))
+    if arguments.output:
+        arguments.output.write_text(dumps(report, indent=2) + "\n")
+    return 1 if any(stats["errors"] for stats in report.values()) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,42 @@
+from statistics import median
+from timeit import Timer
+from typing import Callable
+
+
+def measure(function: Callable[[], object], *, repeat: int = 5) -> dict[str, float | int]:
+    """
+    timeit-style: number of calls per round is picked by Timer.autorange()
+    (so every round takes at least 0.2s), then the median round wins over noise
+    """
+    timer = Timer(function)
+    number, _ = timer.autorange()
+    rounds = [elapsed / number * 1e6 for elapsed in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "median_us": round(median(rounds), 3),
+        "best_us": round(min(rounds), 3),
+        "calls": number * repeat,
+    }
+
+
+def find_regressions_between(
+    results: dict[str, dict],
+    baseline: dict[str, dict],
+    threshold: float,
+) -> list[dict[str, str | float]]:
+    """benchmarks whose median got slower than baseline one by more than `threshold` (0.25 = 25%)"""
+    regressions = []
+    for name, result in results.items():
+        if (expected := baseline.get(name)) is None:
+            continue
+
+        slowdown = result["median_us"] / expected["median_us"] - 1
+        if slowdown > threshold:
+            regressions.append(
+                {
+                    "name": name,
+                    "baseline_us": expected["median_us"],
+                    "median_us": result["median_us"],
+                    "slowdown": round(slowdown, 4),
+                }
+            )
+    return regressions
@@ -1,6 +1,45 @@
 from os import getenv
 
 DATABASE_URL = getenv("DATABASE_URL", "sqlite:///./test.db")
+# read-only manager methods go there when set, see src.core.db.routing
+DATABASE_REPLICA_URL = getenv("DATABASE_REPLICA_URL")
+REPLICA_STICKINESS_SECONDS = float(getenv("REPLICA_STICKINESS_SECONDS", "5"))
+REPLICA_STICKINESS_MAX_USERS = int(getenv("REPLICA_STICKINESS_MAX_USERS", "10000"))
+APP_ENV = getenv("APP_ENV", "production")
+# unset DB_* ones fall back to the APP_ENV profile, see src.core.db.engine
+DB_ECHO = getenv("DB_ECHO")
+DB_POOL_SIZE = getenv("DB_POOL_SIZE")
+DB_MAX_OVERFLOW = getenv("DB_MAX_OVERFLOW")
+DB_POOL_TIMEOUT_SECONDS = getenv("DB_POOL_TIMEOUT_SECONDS")
+DB_POOL_RECYCLE_SECONDS = getenv("DB_POOL_RECYCLE_SECONDS")
+DB_POOL_PRE_PING = getenv("DB_POOL_PRE_PING")
+DB_STATEMENT_CACHE_SIZE = getenv("DB_STATEMENT_CACHE_SIZE")
 CRYPTO_PEPPER = getenv("CRYPTO_PEPPER", "test-secret")
 JWT_SECRET_KEY = getenv("JWT_SECRET_KEY", "test-secret")
 JWT_ALGORITHM = getenv("JWT_ALGORITHM", "HS256")
+TEMPLATES_AUTO_RELOAD = getenv("TEMPLATES_AUTO_RELOAD", "false").lower() == "true"
+RECEIPT_FAST_RENDERER = getenv("RECEIPT_FAST_RENDERER", "false").lower() == "true"
+
+RECEIPT_CACHE_MEMORY_MAX_ENTRIES = int(getenv("RECEIPT_CACHE_MEMORY_MAX_ENTRIES", "1024"))
+RECEIPT_CACHE_MEMORY_MAX_BYTES = int(getenv("RECEIPT_CACHE_MEMORY_MAX_BYTES", str(8 * 1024 * 1024)))
+RECEIPT_CACHE_MEMORY_TTL_SECONDS = float(getenv("RECEIPT_CACHE_MEMORY_TTL_SECONDS", "300"))
+RECEIPT_CACHE_DB_MAX_ENTRIES = int(getenv("RECEIPT_CACHE_DB_MAX_ENTRIES", "10000"))
+RECEIPT_CACHE_DB_EVICTION_BATCH = int(getenv("RECEIPT_CACHE_DB_EVICTION_BATCH", "100"))
+# db tier hits refresh entry's last access no more often than that, so reads rarely write
+RECEIPT_CACHE_DB_TOUCH_INTERVAL_SECONDS = float(getenv("RECEIPT_CACHE_DB_TOUCH_INTERVAL_SECONDS", "60"))
+RECEIPT_CACHE_COMPRESSION = getenv("RECEIPT_CACHE_COMPRESSION", "false").lower() == "true"
+
+PERMISSIONS_CACHE_MAX_ENTRIES = int(getenv("PERMISSIONS_CACHE_MAX_ENTRIES", "10000"))
+PERMISSIONS_CACHE_TTL_SECONDS = float(getenv("PERMISSIONS_CACHE_TTL_SECONDS", "30"))
+VERIFIED_TOKENS_CACHE_MAX_ENTRIES = int(getenv("VERIFIED_TOKENS_CACHE_MAX_ENTRIES", "10000"))
+APP_CONFIG_CHECK_INTERVAL_SECONDS = float(getenv("APP_CONFIG_CHECK_INTERVAL_SECONDS", "5"))
+
+RECEIPTS_BATCH_MAX_SIZE = int(getenv("RECEIPTS_BATCH_MAX_SIZE", "5000"))
+EXPORT_PARTITION_SIZE = int(getenv("EXPORT_PARTITION_SIZE", "500"))
+
+TOP_ITEMS_SKETCH_CAPACITY = int(getenv("TOP_ITEMS_SKETCH_CAPACITY", "256"))
+DISTINCT_COUNT_PRECISION = int(getenv("DISTINCT_COUNT_PRECISION", "14"))
+DISTINCT_COUNT_MAX_DAYS = int(getenv("DISTINCT_COUNT_MAX_DAYS", "366"))
+QUANTILES_COMPRESSION = int(getenv("QUANTILES_COMPRESSION", "100"))
+QUANTILES_MAX_MONTHS = int(getenv("QUANTILES_MAX_MONTHS", "120"))
+SKETCH_CHECKPOINT_INTERVAL_SECONDS = float(getenv("SKETCH_CHECKPOINT_INTERVAL_SECONDS", "30"))
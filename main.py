@@ -1,8 +1,42 @@
+from asyncio import CancelledError, create_task
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 
+from config import SKETCH_CHECKPOINT_INTERVAL_SECONDS
+from src.api.metrics import (
+    PROMETHEUS_CONTENT_TYPE,
+    MetricsMiddleware,
+    render_prometheus_text,
+    request_metrics,
+)
 from src.api.routes import routers
+from src.api.security import verified_tokens_cache
+from src.core.cache import describe_receipt_txt_cache, user_accesses_cache
+from src.core.db.base import async_engine, engine
+from src.core.db.engine import describe_pool_of
+from src.core.handlers.analytics import (
+    checkpoint_pending_sketches,
+    checkpoint_sketches_periodically,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    checkpointing = create_task(
+        checkpoint_sketches_periodically(SKETCH_CHECKPOINT_INTERVAL_SECONDS)
+    )
+    yield
 
-app = FastAPI()
+    checkpointing.cancel()
+    with suppress(CancelledError):
+        await checkpointing
+    await checkpoint_pending_sketches()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
 for router in routers:
     app.include_router(router)
 
@@ -10,3 +44,32 @@ for router in routers:
 @app.get("/", tags=["service"])
 async def healthcheck():
     return {"status": "OK"}
+
+
+@app.get("/stats/cache", tags=["service"])
+async def cache_statistics():
+    return {
+        "receipt_txt": describe_receipt_txt_cache(),
+        "user_accesses": user_accesses_cache.describe(),
+        "verified_tokens": verified_tokens_cache.describe(),
+    }
+
+
+@app.get("/stats/db", tags=["service"])
+async def db_pool_statistics():
+    return {
+        "sync_pool": describe_pool_of(engine),
+        "async_pool": describe_pool_of(async_engine),
+    }
+
+
+@app.get("/metrics", tags=["service"], response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(
+        render_prometheus_text(
+            request_metrics,
+            cache_stats=await cache_statistics(),
+            pool_stats=await db_pool_statistics(),
+        ),
+        media_type=PROMETHEUS_CONTENT_TYPE,
+    )
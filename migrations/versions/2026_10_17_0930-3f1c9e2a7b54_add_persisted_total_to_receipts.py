@@ -0,0 +1,56 @@
+"""add persisted total to receipts
+
+Revision ID: 3f1c9e2a7b54
+Revises: 84199f819728
+Create Date: 2026-10-17 09:30:12.418230
+
+"""
+
+from typing import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f1c9e2a7b54"
+down_revision: str | None = "84199f819728"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """
+    Upgrade schema.
+    Store receipt's total alongside the receipt itself,
+    so filtering by it is a plain index range scan instead of aggregation over items.
+    """
+    op.add_column(
+        "receipts",
+        sa.Column(
+            "total",
+            sa.DECIMAL(precision=10, scale=2),
+            nullable=False,
+            server_default="0",
+        ),
+    )
+
+    op.execute(
+        """
+        UPDATE receipts
+        SET total = COALESCE(
+            (
+                SELECT SUM(receipt_items.price * receipt_items.quantity)
+                FROM receipt_items
+                WHERE receipt_items.receipt_id = receipts.id
+            ),
+            0
+        )
+        """
+    )
+
+    op.create_index("ix_receipts_user_id_total", "receipts", ["user_id", "total"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_receipts_user_id_total", table_name="receipts")
+    op.drop_column("receipts", "total")
@@ -0,0 +1,45 @@
+"""track last access of receipts.txt cache
+
+Revision ID: 8b2d4f7e1a90
+Revises: 3f1c9e2a7b54
+Create Date: 2026-10-17 11:05:47.031954
+
+"""
+
+from typing import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8b2d4f7e1a90"
+down_revision: str | None = "3f1c9e2a7b54"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """
+    Upgrade schema.
+    Remember when each cached receipt was read last time,
+    so eviction drops least recently used entries instead of the oldest ones.
+    """
+    op.add_column(
+        "txt_receipt_cache",
+        sa.Column(
+            "last_access_date",
+            sa.DateTime(),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "ix_txt_receipt_cache_last_access_date",
+        "txt_receipt_cache",
+        ["last_access_date"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_txt_receipt_cache_last_access_date", table_name="txt_receipt_cache")
+    op.drop_column("txt_receipt_cache", "last_access_date")
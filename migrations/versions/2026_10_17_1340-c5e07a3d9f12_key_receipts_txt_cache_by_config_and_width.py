@@ -0,0 +1,95 @@
+"""key receipts.txt cache by config and width
+
+Revision ID: c5e07a3d9f12
+Revises: 8b2d4f7e1a90
+Create Date: 2026-10-17 13:40:05.662180
+
+"""
+
+from typing import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c5e07a3d9f12"
+down_revision: str | None = "8b2d4f7e1a90"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """
+    Upgrade schema.
+    Cache holds nothing but derived data, so instead of migrating rows
+    table is recreated with composite (receipt_id, config_hash, width) key,
+    letting every paper width have its own cached variant of a receipt.
+    """
+    op.drop_table("txt_receipt_cache")
+    op.create_table(
+        "txt_receipt_cache",
+        sa.Column(
+            "receipt_id",
+            sa.String(length=255),
+            sa.ForeignKey("receipts.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("config_hash", sa.String(length=16), primary_key=True),
+        sa.Column("width", sa.Integer(), primary_key=True),
+        sa.Column("txt", sa.LargeBinary(), nullable=False),
+        sa.Column(
+            "is_compressed",
+            sa.Boolean(),
+            server_default=sa.false(),
+            nullable=False,
+        ),
+        sa.Column(
+            "creation_date",
+            sa.DateTime(),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            nullable=False,
+        ),
+        sa.Column(
+            "last_access_date",
+            sa.DateTime(),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "ix_txt_receipt_cache_last_access_date",
+        "txt_receipt_cache",
+        ["last_access_date"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("txt_receipt_cache")
+    op.create_table(
+        "txt_receipt_cache",
+        sa.Column(
+            "receipt_id",
+            sa.String(length=255),
+            sa.ForeignKey("receipts.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("config_str", sa.String(), nullable=False),
+        sa.Column("txt", sa.String(), nullable=False),
+        sa.Column(
+            "creation_date",
+            sa.DateTime(),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            nullable=False,
+        ),
+        sa.Column(
+            "last_access_date",
+            sa.DateTime(),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "ix_txt_receipt_cache_last_access_date",
+        "txt_receipt_cache",
+        ["last_access_date"],
+    )
@@ -0,0 +1,95 @@
+"""create receipt daily rollups
+
+Revision ID: 5a7e2c9d0b13
+Revises: c5e07a3d9f12
+Create Date: 2026-10-17 15:20:41.093518
+
+"""
+
+from typing import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5a7e2c9d0b13"
+down_revision: str | None = "c5e07a3d9f12"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """
+    Upgrade schema.
+    Per (user, day, payment type) aggregates of receipts, so analytics over
+    long periods reads a row per day instead of every receipt item.
+    Backfilled from existing receipts, maintained by the app afterward.
+    """
+    op.create_table(
+        "receipt_daily_rollups",
+        sa.Column(
+            "user_id",
+            sa.String(length=255),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("is_cashless_payment", sa.Boolean(), primary_key=True),
+        sa.Column("receipts_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("items_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "revenue",
+            sa.DECIMAL(precision=10, scale=2),
+            nullable=False,
+            server_default="0",
+        ),
+        sa.Column(
+            "tendered_amount",
+            sa.DECIMAL(precision=10, scale=2),
+            nullable=False,
+            server_default="0",
+        ),
+        sa.Column(
+            "change_given",
+            sa.DECIMAL(precision=10, scale=2),
+            nullable=False,
+            server_default="0",
+        ),
+    )
+
+    day_of_receipt = {
+        "postgresql": "CAST(receipts.creation_date AS DATE)",
+        "sqlite": "date(receipts.creation_date)",
+    }[op.get_bind().dialect.name]
+
+    op.execute(
+        f"""
+        INSERT INTO receipt_daily_rollups (
+            user_id, day, is_cashless_payment,
+            receipts_count, items_count, revenue, tendered_amount, change_given
+        )
+        SELECT
+            receipts.user_id,
+            {day_of_receipt},
+            receipts.is_cashless_payment,
+            COUNT(receipts.id),
+            COALESCE(SUM(items_per_receipt.items_count), 0),
+            SUM(receipts.total),
+            SUM(receipts.payment_amount),
+            SUM(
+                CASE WHEN receipts.is_cashless_payment THEN 0
+                ELSE receipts.payment_amount - receipts.total END
+            )
+        FROM receipts
+        LEFT OUTER JOIN (
+            SELECT receipt_id, COUNT(*) AS items_count
+            FROM receipt_items
+            GROUP BY receipt_id
+        ) AS items_per_receipt ON items_per_receipt.receipt_id = receipts.id
+        GROUP BY receipts.user_id, {day_of_receipt}, receipts.is_cashless_payment
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("receipt_daily_rollups")
@@ -0,0 +1,43 @@
+"""create analytics sketches
+
+Revision ID: e1b94d6c2f37
+Revises: 5a7e2c9d0b13
+Create Date: 2026-10-17 16:45:27.510894
+
+"""
+
+from typing import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e1b94d6c2f37"
+down_revision: str | None = "5a7e2c9d0b13"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """
+    Upgrade schema.
+    Serialized fixed-size summaries (e.g. top items of a user per month),
+    periodically merged with ones every app process keeps in memory.
+    """
+    op.create_table(
+        "analytics_sketches",
+        sa.Column("kind", sa.String(length=32), primary_key=True),
+        sa.Column("scope", sa.String(length=255), primary_key=True),
+        sa.Column("period", sa.String(length=10), primary_key=True),
+        sa.Column("payload", sa.LargeBinary(), nullable=False),
+        sa.Column(
+            "update_date",
+            sa.DateTime(),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("analytics_sketches")
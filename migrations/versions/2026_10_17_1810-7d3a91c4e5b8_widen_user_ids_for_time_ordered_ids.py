@@ -0,0 +1,53 @@
+"""widen user ids for time ordered ids
+
+Revision ID: 7d3a91c4e5b8
+Revises: e1b94d6c2f37
+Create Date: 2026-10-17 18:10:43.206517
+
+"""
+
+from typing import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7d3a91c4e5b8"
+down_revision: str | None = "e1b94d6c2f37"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """
+    Upgrade schema.
+    Ids are 26 chars long ULID-like strings now (see src.core.utils),
+    existing 12 chars long ones are left as they are.
+    """
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.alter_column(
+            "id",
+            existing_type=sa.String(length=12),
+            type_=sa.String(length=26),
+        )
+    with op.batch_alter_table("users_roles") as batch_op:
+        batch_op.alter_column(
+            "user_id",
+            existing_type=sa.String(length=12),
+            type_=sa.String(length=26),
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("users_roles") as batch_op:
+        batch_op.alter_column(
+            "user_id",
+            existing_type=sa.String(length=26),
+            type_=sa.String(length=12),
+        )
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.alter_column(
+            "id",
+            existing_type=sa.String(length=26),
+            type_=sa.String(length=12),
+        )
@@ -0,0 +1,42 @@
+"""index receipt and auth lookups
+
+Revision ID: a4f8c2b61d07
+Revises: 7d3a91c4e5b8
+Create Date: 2026-10-17 19:05:12.684302
+
+"""
+
+from typing import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a4f8c2b61d07"
+down_revision: str | None = "7d3a91c4e5b8"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """
+    Upgrade schema.
+    Receipts of a user are read newest first (both offset and keyset pagination),
+    their items and accesses of a role are looked up by foreign key,
+    and none of those was indexed, see tests/test_query_plans.py.
+    """
+    op.create_index(
+        "ix_receipts_user_id_creation_date_id",
+        "receipts",
+        ["user_id", sa.text("creation_date DESC"), sa.text("id DESC")],
+    )
+    op.create_index("ix_receipt_items_receipt_id", "receipt_items", ["receipt_id"])
+    op.create_index("ix_users_roles_role_id", "users_roles", ["role_id"])
+    op.create_index("ix_accesses_role_id", "accesses", ["role_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_accesses_role_id", table_name="accesses")
+    op.drop_index("ix_users_roles_role_id", table_name="users_roles")
+    op.drop_index("ix_receipt_items_receipt_id", table_name="receipt_items")
+    op.drop_index("ix_receipts_user_id_creation_date_id", table_name="receipts")
@@ -0,0 +1,45 @@
+"""strip leading slash of receipts accesses
+
+Revision ID: b93e0d7a5c21
+Revises: a4f8c2b61d07
+Create Date: 2026-10-17 20:15:38.019467
+
+"""
+
+from typing import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b93e0d7a5c21"
+down_revision: str | None = "a4f8c2b61d07"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """
+    Upgrade data.
+    Permissions are checked against root route without leading slash
+    (see src.api.security.extract_root_route), so accesses granted at "/receipts"
+    to every signed up user never matched anything. Only that very route is rewritten,
+    accesses granted by hand are left as they are.
+    """
+    op.execute("UPDATE accesses SET route_url = 'receipts' WHERE route_url = '/receipts'")
+
+
+def downgrade() -> None:
+    """
+    Downgrade data.
+    Puts the slash back only for GET/POST accesses of "user" role, i.e. ones signup grants:
+    "receipts" accesses of other roles can't be told apart from ones which had no slash before
+    """
+    op.execute(
+        """
+        UPDATE accesses
+        SET route_url = '/receipts'
+        WHERE route_url = 'receipts'
+          AND allowed_method IN ('GET', 'POST')
+          AND role_id IN (SELECT id FROM roles WHERE name = 'user')
+        """
+    )
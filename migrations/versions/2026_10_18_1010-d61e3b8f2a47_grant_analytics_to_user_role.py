@@ -0,0 +1,68 @@
+"""grant analytics to user role
+
+Revision ID: d61e3b8f2a47
+Revises: b93e0d7a5c21
+Create Date: 2026-10-18 10:10:52.417305
+
+"""
+
+from typing import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+from src.core.utils import generate_time_ordered_id
+
+# revision identifiers, used by Alembic.
+revision: str = "d61e3b8f2a47"
+down_revision: str | None = "b93e0d7a5c21"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """
+    Upgrade data.
+    Signup grants GET on "analytics" alongside receipts accesses since now,
+    so "user" role of already signed up users gets it too, unless it was granted by hand
+    """
+    role_ids = op.get_bind().scalars(
+        sa.text(
+            """
+            SELECT id FROM roles
+            WHERE name = 'user'
+              AND id NOT IN (
+                SELECT role_id FROM accesses WHERE route_url = 'analytics' AND allowed_method = 'GET'
+              )
+            """
+        )
+    ).all()
+    accesses = sa.table(
+        "accesses",
+        sa.column("id", sa.String),
+        sa.column("role_id", sa.String),
+        sa.column("route_url", sa.String),
+        sa.column("allowed_method", sa.String),
+    )
+    op.bulk_insert(
+        accesses,
+        [
+            {"id": generate_time_ordered_id(), "role_id": role_id, "route_url": "analytics", "allowed_method": "GET"}
+            for role_id in role_ids
+        ],
+    )
+
+
+def downgrade() -> None:
+    """
+    Downgrade data.
+    Takes GET on "analytics" back from "user" role only, same as signup did before
+    """
+    op.execute(
+        """
+        DELETE FROM accesses
+        WHERE route_url = 'analytics'
+          AND allowed_method = 'GET'
+          AND role_id IN (SELECT id FROM roles WHERE name = 'user')
+        """
+    )
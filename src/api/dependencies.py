@@ -0,0 +1,20 @@
+from typing import Annotated, AsyncIterator
+
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.db.base import create_async_session
+
+
+async def provide_session_for_request() -> AsyncIterator[AsyncSession]:
+    """
+    one unit of work per request: every manager used while handling it
+    shares this session, everything is committed once after the handler
+    is done (or rolled back if it raised), and the connection always goes back to the pool
+    """
+    async with create_async_session() as session:
+        yield session
+        await session.commit()
+
+
+requires_db_session = Annotated[AsyncSession, Depends(provide_session_for_request)]
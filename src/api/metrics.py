@@ -0,0 +1,212 @@
+"""
+request metrics of a single worker process, exposed on /metrics in Prometheus text format.
+Every worker exports its own numbers, summing them up across workers is up to Prometheus
+"""
+
+from bisect import bisect_left
+from itertools import accumulate
+from time import perf_counter
+from typing import Iterator, Mapping
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS_SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RESPONSE_SIZE_BUCKETS_BYTES = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+# requests no route matched (404s, scanners) share a single label, so they can't blow up cardinality
+UNMATCHED_ROUTE = "<unmatched>"
+# fields of describe() dicts which only ever grow, the rest are exported as gauges
+COUNTER_FIELDS = frozenset({"hits", "misses", "evictions", "checkouts", "timeouts"})
+
+Stats = Mapping[str, "int | float | Stats"]
+
+
+class Histogram:
+    """non-cumulative counts per bucket, last one being +Inf; they are summed up only when rendered"""
+
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum: float = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def iterate_cumulative_counts(self) -> Iterator[tuple[str, int]]:
+        bounds = [*map(str, self.buckets), "+Inf"]
+        return zip(bounds, accumulate(self.counts))
+
+
+class RouteMetrics:
+    __slots__ = ("responses", "latency", "response_size")
+
+    def __init__(self):
+        self.responses: dict[int, int] = {}
+        self.latency = Histogram(LATENCY_BUCKETS_SECONDS)
+        self.response_size = Histogram(RESPONSE_SIZE_BUCKETS_BYTES)
+
+
+class RequestMetrics:
+    """
+    keyed by (method, templated route path), e.g ('GET', '/receipts/{receipt_id}').
+    Only ever updated from event loop thread by MetricsMiddleware, hence plain increments with no locks
+    """
+
+    def __init__(self):
+        self.routes: dict[tuple[str, str], RouteMetrics] = {}
+        self.in_flight: int = 0
+
+    def observe(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        seconds: float,
+        response_bytes: int,
+    ) -> None:
+        metrics = self.routes.get((method, route))
+        if metrics is None:
+            metrics = self.routes[(method, route)] = RouteMetrics()
+        metrics.responses[status] = metrics.responses.get(status, 0) + 1
+        metrics.latency.observe(seconds)
+        metrics.response_size.observe(response_bytes)
+
+    def clear(self) -> None:
+        self.routes.clear()
+
+
+request_metrics = RequestMetrics()
+
+
+class MetricsMiddleware:
+    """
+    pure ASGI middleware, i.e. no BaseHTTPMiddleware with its extra task and body copying per request.
+    Route is read from scope after the app has handled request, that's where FastAPI's router puts it
+    """
+
+    def __init__(self, app: ASGIApp, metrics: RequestMetrics = request_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # unless app manages to respond, ServerErrorMiddleware above will with 500
+        status, response_bytes = 500, 0
+
+        async def send_measuring(message: Message) -> None:
+            nonlocal status, response_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        self.metrics.in_flight += 1
+        started_at = perf_counter()
+        try:
+            await self.app(scope, receive, send_measuring)
+        finally:
+            self.metrics.in_flight -= 1
+            route = scope.get("route")
+            self.metrics.observe(
+                scope["method"],
+                getattr(route, "path", UNMATCHED_ROUTE),
+                status,
+                perf_counter() - started_at,
+                response_bytes,
+            )
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(**labels: str | int) -> str:
+    return ",".join(f'{name}="{escape_label_value(str(value))}"' for name, value in labels.items())
+
+
+def flatten(stats: Stats, prefix: str = "") -> dict[str, dict[str, int | float]]:
+    """aka convert e.g {'receipt_txt': {'memory': {'hits': 1}}} -> {'receipt_txt_memory': {'hits': 1}}"""
+    flat: dict[str, dict[str, int | float]] = {}
+    for key, value in stats.items():
+        if isinstance(value, Mapping):
+            flat |= flatten(value, f"{prefix}{key}_")
+        else:
+            flat.setdefault(prefix.rstrip("_"), {})[key] = value
+    return flat
+
+
+def render_histograms(
+    name: str,
+    description: str,
+    histograms: dict[tuple[str, str], Histogram],
+) -> Iterator[str]:
+    yield f"# HELP {name} {description}"
+    yield f"# TYPE {name} histogram"
+    for (method, route), histogram in histograms.items():
+        labels = format_labels(method=method, route=route)
+        count = 0
+        for bound, count in histogram.iterate_cumulative_counts():
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {count}'
+        yield f"{name}_sum{{{labels}}} {histogram.sum}"
+        yield f"{name}_count{{{labels}}} {count}"
+
+
+def render_request_metrics(metrics: RequestMetrics) -> Iterator[str]:
+    # snapshot, so that requests finishing while rendering can't change dict size mid-iteration
+    routes = dict(metrics.routes)
+
+    yield "# HELP http_requests_total Responses per route and status code."
+    yield "# TYPE http_requests_total counter"
+    for (method, route), route_metrics in routes.items():
+        for status, count in dict(route_metrics.responses).items():
+            yield f"http_requests_total{{{format_labels(method=method, route=route, status=status)}}} {count}"
+
+    yield from render_histograms(
+        "http_request_duration_seconds",
+        "Time from receiving a request to sending the last byte of response.",
+        {key: route_metrics.latency for key, route_metrics in routes.items()},
+    )
+    yield from render_histograms(
+        "http_response_size_bytes",
+        "Sizes of response bodies.",
+        {key: route_metrics.response_size for key, route_metrics in routes.items()},
+    )
+
+    yield "# HELP http_requests_in_flight Requests being handled right now."
+    yield "# TYPE http_requests_in_flight gauge"
+    yield f"http_requests_in_flight {metrics.in_flight}"
+
+
+def render_stats(name_prefix: str, label: str, stats: Stats) -> Iterator[str]:
+    """aka convert e.g ('cache', 'cache', {'tokens': {'hits': 1}}) -> 'cache_hits_total{cache="tokens"} 1'"""
+    samples_by_field: dict[str, list[tuple[str, int | float]]] = {}
+    for owner, fields in flatten(stats).items():
+        for field, value in fields.items():
+            samples_by_field.setdefault(field, []).append((owner, value))
+
+    for field, samples in samples_by_field.items():
+        is_counter = field in COUNTER_FIELDS
+        name = f"{name_prefix}_{field}{'_total' if is_counter else ''}"
+        yield f"# TYPE {name} {'counter' if is_counter else 'gauge'}"
+        for owner, value in samples:
+            yield f"{name}{{{format_labels(**{label: owner})}}} {value}"
+
+
+def render_prometheus_text(
+    metrics: RequestMetrics,
+    cache_stats: Stats,
+    pool_stats: Stats,
+) -> str:
+    lines = [
+        *render_request_metrics(metrics),
+        *render_stats("cache", "cache", cache_stats),
+        *render_stats("db_pool", "pool", pool_stats),
+    ]
+    return "\n".join(lines) + "\n"
@@ -1,3 +1,4 @@
+from src.api.routes.analytics import analytics_router
 from src.api.routes.auth import auth_router
 from src.api.routes.product import product_router
 from src.api.routes.receipts import receipt_router
@@ -5,4 +6,5 @@ from src.api.routes.receipts import receipt_router
 routers = (
     auth_router,
     receipt_router,
+    analytics_router,
 )
@@ -0,0 +1,232 @@
+from datetime import date, datetime
+from decimal import Decimal
+from enum import StrEnum
+
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+
+from src.api.dependencies import requires_db_session
+from src.api.security import requires_authorization
+from src.core.handlers.analytics import (
+    build_receipt_totals_histogram,
+    count_active_users_between,
+    count_user_distinct_items_between,
+    estimate_receipt_total_quantiles,
+    rank_user_top_items_by,
+    summarize_user_sales_by,
+)
+from src.core.sketches import EVERYONE
+
+analytics_router = APIRouter(
+    prefix="/analytics",
+    tags=["analytics"],
+)
+
+
+class Granularity(StrEnum):
+    day = "day"
+    week = "week"
+    month = "month"
+
+
+class ItemsMeasure(StrEnum):
+    quantity = "quantity"
+    revenue = "revenue"
+
+
+class TotalsScope(StrEnum):
+    own = "own"
+    everyone = "everyone"
+
+
+MONTH_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])$"
+
+
+class SalesBucket(BaseModel):
+    period_start: date
+    is_cashless_payment: bool
+    receipts: int
+    revenue: Decimal
+
+
+class SalesSummary(BaseModel):
+    granularity: Granularity
+    buckets: list[SalesBucket]
+    receipts: int
+    revenue: Decimal
+
+
+class TopItem(BaseModel):
+    name: str
+    value: Decimal
+    max_error: Decimal
+
+
+class TopItemsReport(BaseModel):
+    measure: ItemsMeasure
+    month: str
+    is_exact: bool
+    items: list[TopItem]
+
+
+class DistinctCount(BaseModel):
+    first_day: date
+    last_day: date
+    is_exact: bool
+    count: int
+
+
+class Quantile(BaseModel):
+    q: float
+    value: Decimal | None
+
+
+class ReceiptTotalsQuantiles(BaseModel):
+    count: int
+    min: Decimal | None
+    max: Decimal | None
+    quantiles: list[Quantile]
+
+
+class HistogramBin(BaseModel):
+    lower: Decimal
+    upper: Decimal
+    count: int
+
+
+class ReceiptTotalsHistogram(BaseModel):
+    count: int
+    bins: list[HistogramBin]
+
+
+def parse_month(month: str | None) -> date:
+    """aka convert e.g '2026-10' -> date(2026, 10, 1), None stands for current month"""
+    if month is None:
+        return date.today().replace(day=1)
+    return datetime.strptime(month, "%Y-%m").date()
+
+
+@analytics_router.get("/sales", response_model=SalesSummary)
+async def fetch_own_sales_summary(
+    user_id: requires_authorization,
+    session: requires_db_session,
+    granularity: Granularity = Query(Granularity.day),
+    created_after: datetime | None = Query(None),
+    created_before: datetime | None = Query(None),
+) -> SalesSummary:
+    optional_filters: dict = {
+        "created_after": created_after,
+        "created_before": created_before,
+    }
+    filters = {k: v for k, v in optional_filters.items() if v is not None}
+
+    summary = await summarize_user_sales_by(granularity, user_id, filters, session)
+    return SalesSummary.model_validate(summary)
+
+
+@analytics_router.get("/top-items", response_model=TopItemsReport)
+async def fetch_own_top_items(
+    user_id: requires_authorization,
+    session: requires_db_session,
+    measure: ItemsMeasure = Query(ItemsMeasure.quantity, alias="by"),
+    month: str | None = Query(None, pattern=MONTH_PATTERN),
+    limit: int = Query(20, ge=1, le=100),
+    exact: bool = Query(False),
+) -> TopItemsReport:
+    first_day = parse_month(month)
+
+    items = await rank_user_top_items_by(
+        measure, user_id, first_day, limit, is_exact=exact, session=session
+    )
+    return TopItemsReport(
+        measure=measure,
+        month=first_day.strftime("%Y-%m"),
+        is_exact=exact,
+        items=[TopItem.model_validate(item) for item in items],
+    )
+
+
+@analytics_router.get("/distinct-items", response_model=DistinctCount)
+async def count_own_distinct_items(
+    user_id: requires_authorization,
+    session: requires_db_session,
+    first_day: date = Query(default_factory=date.today),
+    last_day: date = Query(default_factory=date.today),
+    exact: bool = Query(False),
+) -> DistinctCount:
+    try:
+        distinct_items = await count_user_distinct_items_between(
+            first_day, last_day, user_id, is_exact=exact, session=session
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+
+    return DistinctCount(
+        first_day=first_day, last_day=last_day, is_exact=exact, count=distinct_items
+    )
+
+
+@analytics_router.get("/active-users", response_model=DistinctCount)
+async def count_active_users(
+    user_id: requires_authorization,
+    session: requires_db_session,
+    first_day: date = Query(default_factory=date.today),
+    last_day: date = Query(default_factory=date.today),
+    exact: bool = Query(False),
+) -> DistinctCount:
+    try:
+        active_users = await count_active_users_between(
+            first_day, last_day, is_exact=exact, session=session
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+
+    return DistinctCount(
+        first_day=first_day, last_day=last_day, is_exact=exact, count=active_users
+    )
+
+
+@analytics_router.get("/receipt-totals/quantiles", response_model=ReceiptTotalsQuantiles)
+async def estimate_receipt_totals_quantiles(
+    user_id: requires_authorization,
+    session: requires_db_session,
+    q: list[float] = Query([0.5, 0.95]),
+    scope: TotalsScope = Query(TotalsScope.own),
+    first_month: str | None = Query(None, pattern=MONTH_PATTERN),
+    last_month: str | None = Query(None, pattern=MONTH_PATTERN),
+) -> ReceiptTotalsQuantiles:
+    try:
+        quantiles = await estimate_receipt_total_quantiles(
+            q,
+            user_id if scope == TotalsScope.own else EVERYONE,
+            parse_month(first_month),
+            parse_month(last_month),
+            session,
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+
+    return ReceiptTotalsQuantiles.model_validate(quantiles)
+
+
+@analytics_router.get("/receipt-totals/histogram", response_model=ReceiptTotalsHistogram)
+async def fetch_receipt_totals_histogram(
+    user_id: requires_authorization,
+    session: requires_db_session,
+    bins: int = Query(10, ge=1, le=100),
+    scope: TotalsScope = Query(TotalsScope.own),
+    first_month: str | None = Query(None, pattern=MONTH_PATTERN),
+    last_month: str | None = Query(None, pattern=MONTH_PATTERN),
+) -> ReceiptTotalsHistogram:
+    try:
+        histogram = await build_receipt_totals_histogram(
+            bins,
+            user_id if scope == TotalsScope.own else EVERYONE,
+            parse_month(first_month),
+            parse_month(last_month),
+            session,
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+
+    return ReceiptTotalsHistogram.model_validate(histogram)
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, EmailStr
 
+from src.api.dependencies import requires_db_session
 from src.api.security import requires_authorization
 from src.core.handlers.auth import (
     assign_existing_role_with,
@@ -32,12 +33,13 @@ class AssignRoleRequest(BaseModel):
 
 
 @auth_router.post("/login")
-async def login(credentials: UserLoginRequest) -> dict:
+async def login(credentials: UserLoginRequest, session: requires_db_session) -> dict:
     try:
         return {
-            "access_token": obtain_jwt_token_for(
+            "access_token": await obtain_jwt_token_for(
                 credentials.login,
                 credentials.password,
+                session,
             ),
             "token_type": "bearer",
         }
@@ -54,13 +56,14 @@ async def login(credentials: UserLoginRequest) -> dict:
 
 
 @auth_router.post("/signup", status_code=201)
-async def signup(credentials: UserSignUp) -> dict:
+async def signup(credentials: UserSignUp, session: requires_db_session) -> dict:
     try:
-        create_new_user_with_following(
+        await create_new_user_with_following(
             credentials.login,
             credentials.email,
             credentials.name,
             credentials.password,
+            session,
         )
         return {"status": "success", "login_url": auth_router.url_path_for("login")}
     except LookupError:
@@ -73,9 +76,12 @@ async def signup(credentials: UserSignUp) -> dict:
 @auth_router.patch("/add_role")
 async def assign_role(
     _: requires_authorization,
+    session: requires_db_session,
     new_role_request: AssignRoleRequest,
 ) -> dict:
-    if assign_existing_role_with(new_role_request.role_name, to=new_role_request.login):
+    if await assign_existing_role_with(
+        new_role_request.role_name, to=new_role_request.login, session=session
+    ):
         return {
             "status": "success",
             "info": f"User '{new_role_request.login}' is now '{new_role_request.role_name}!",
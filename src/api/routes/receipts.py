@@ -1,18 +1,28 @@
 from datetime import datetime
 from decimal import Decimal
 from enum import StrEnum
-
-from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
-
-from src.api.security import requires_authorization
+from typing import Annotated
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, BeforeValidator, Field
+
+from config import RECEIPTS_BATCH_MAX_SIZE
+from src.api.dependencies import requires_db_session
+from src.api.security import (
+    read_last_write_from,
+    remember_write_in,
+    requires_authorization,
+)
 from src.core.handlers.receipts.get import (
     convert_to_dict_repr,
     render_as_str_receipt_with,
     retrieve_if_is_possible_to_look_data_for,
     retrieve_user_receipts_data,
+    retrieve_user_receipts_page_after,
 )
-from src.core.handlers.receipts.post import store_receipt_by
+from src.core.handlers.receipts.export import stream_user_receipts_as
+from src.core.handlers.receipts.post import store_receipt_by, store_receipts_batch_by
 
 receipt_router = APIRouter(
     prefix="/receipts",
@@ -21,6 +31,14 @@ receipt_router = APIRouter(
 )
 
 
+def parse_grouped_amount(value: object) -> object:
+    """aka convert e.g '1 000.00' (how FormattedDecimal prints itself) -> '1000.00'"""
+    return value.replace(" ", "") if isinstance(value, str) else value
+
+
+FormattedAmount = Annotated[Decimal, BeforeValidator(parse_grouped_amount)]
+
+
 class ReceiptResponse(BaseModel):
     class Config:
         from_attributes = True
@@ -31,6 +49,17 @@ class PaymentType(StrEnum):
     cashless = "cashless"
 
 
+class ExportFormat(StrEnum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+}
+
+
 class ProductItem(ReceiptResponse):
     name: str
     price: Decimal
@@ -47,46 +76,103 @@ class ReceiptCreate(BaseModel):
     payment: PaymentInfo
 
 
+class ReceiptBatchCreate(BaseModel):
+    receipts: list[ReceiptCreate] = Field(min_length=1, max_length=RECEIPTS_BATCH_MAX_SIZE)
+
+
 class ProductItemResponse(ReceiptResponse):
-    total: Decimal
+    total: FormattedAmount
 
 
-class PaymentInfoResponse(PaymentInfo): ...
+class PaymentInfoResponse(PaymentInfo):
+    amount: FormattedAmount
 
 
 class SingleReceiptResponse(ReceiptResponse):
     id: str
     items: list[ProductItemResponse]
     payment: PaymentInfoResponse
+    total: FormattedAmount
+    rest: FormattedAmount
+    created_at: datetime
+
+
+class CreatedReceiptResponse(BaseModel):
+    id: str
     total: Decimal
-    rest: Decimal
     created_at: datetime
 
 
+class ReceiptBatchResponse(BaseModel):
+    count: int
+    receipts: list[CreatedReceiptResponse]
+
+
 class Pagination(BaseModel):
-    starting: int
-    ending: int
+    starting: int | None = None
+    ending: int | None = None
     count: int
+    next_cursor: str | None = None
 
 
 class ReceiptCollection(BaseModel):
     pagination: Pagination
     receipts: list[SingleReceiptResponse]
-    total: int
+    total: int | None
+
+
+def build_filters_from(
+    created_after: datetime | None,
+    created_before: datetime | None,
+    min_total: Decimal | None,
+    max_total: Decimal | None,
+    is_cashless_operation: bool | None,
+) -> dict:
+    optional_filters: dict = {
+        "created_after": created_after,
+        "created_before": created_before,
+        "min_total": min_total,
+        "max_total": max_total,
+        "payment_type": is_cashless_operation,
+    }
+    return {k: v for k, v in optional_filters.items() if v is not None}
 
 
 @receipt_router.post("/", response_model=SingleReceiptResponse, status_code=201)
 async def create_receipt(
     user_id: requires_authorization,
+    session: requires_db_session,
     receipt_data: ReceiptCreate,
+    response: Response,
 ) -> SingleReceiptResponse:
-    fresh_receipt = store_receipt_by(receipt_data, user_id)
+    fresh_receipt = await store_receipt_by(receipt_data, user_id, session)
+    remember_write_in(response)
     return SingleReceiptResponse.model_validate(convert_to_dict_repr(fresh_receipt))
 
 
+@receipt_router.post("/batch", response_model=ReceiptBatchResponse, status_code=201)
+async def create_receipts_batch(
+    user_id: requires_authorization,
+    session: requires_db_session,
+    batch_data: ReceiptBatchCreate,
+    response: Response,
+) -> ReceiptBatchResponse:
+    try:
+        created = await store_receipts_batch_by(batch_data.receipts, user_id, session)
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error))
+    remember_write_in(response)
+
+    return ReceiptBatchResponse(
+        count=len(created),
+        receipts=[CreatedReceiptResponse.model_validate(receipt) for receipt in created],
+    )
+
+
 @receipt_router.get("/", response_model=ReceiptCollection)
 async def fetch_own_receipts(
     user_id: requires_authorization,
+    session: requires_db_session,
     created_after: datetime | None = Query(None),
     created_before: datetime | None = Query(None),
     min_total: Decimal | None = Query(None),
@@ -94,28 +180,36 @@ async def fetch_own_receipts(
     is_cashless_operation: bool | None = Query(None),
     limit: int = Query(10, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None),
+    with_total: bool = Query(False),
 ) -> ReceiptCollection:
 
-    optional_filters: dict = {
-        "created_after": created_after,
-        "created_before": created_before,
-        "min_total": min_total,
-        "max_total": max_total,
-        "payment_type": is_cashless_operation,
-    }
-    filters = {k: v for k, v in optional_filters.items() if v is not None}
+    filters = build_filters_from(
+        created_after, created_before, min_total, max_total, is_cashless_operation
+    )
 
     filters["user_id"] = user_id
     filters["limit"] = limit
-    filters["offset"] = offset
-
-    total, receipts = retrieve_user_receipts_data(filters)
 
-    pagination = Pagination(
-        starting=offset,
-        ending=min(offset + limit, total),
-        count=len(receipts),
-    )
+    if cursor is not None:
+        try:
+            total, receipts, next_cursor = await retrieve_user_receipts_page_after(
+                cursor, filters, with_total=with_total, session=session
+            )
+        except ValueError as error:
+            raise HTTPException(status_code=400, detail=str(error))
+
+        pagination = Pagination(count=len(receipts), next_cursor=next_cursor)
+    else:
+        filters["offset"] = offset
+        total, receipts, next_cursor = await retrieve_user_receipts_data(filters, session)
+
+        pagination = Pagination(
+            starting=offset,
+            ending=min(offset + limit, total),
+            count=len(receipts),
+            next_cursor=next_cursor,
+        )
 
     return ReceiptCollection(
         pagination=pagination,
@@ -124,14 +218,40 @@ async def fetch_own_receipts(
     )
 
 
+@receipt_router.get("/export", response_class=StreamingResponse)
+async def export_own_receipts(
+    user_id: requires_authorization,
+    request: Request,
+    export_format: ExportFormat = Query(ExportFormat.ndjson, alias="format"),
+    created_after: datetime | None = Query(None),
+    created_before: datetime | None = Query(None),
+    min_total: Decimal | None = Query(None),
+    max_total: Decimal | None = Query(None),
+    is_cashless_operation: bool | None = Query(None),
+) -> StreamingResponse:
+    filters = build_filters_from(
+        created_after, created_before, min_total, max_total, is_cashless_operation
+    )
+    return StreamingResponse(
+        stream_user_receipts_as(
+            export_format, user_id, filters, read_last_write_from(request)
+        ),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="receipts.{export_format}"'
+        },
+    )
+
+
 @receipt_router.get("/{receipt_id}", response_model=SingleReceiptResponse)
 async def fetch_receipt_by_id(
     user_id: requires_authorization,
+    session: requires_db_session,
     receipt_id: str,
 ) -> SingleReceiptResponse:
     try:
-        receipt_from_db = retrieve_if_is_possible_to_look_data_for(
-            receipt_id, using=user_id
+        receipt_from_db = await retrieve_if_is_possible_to_look_data_for(
+            receipt_id, using=user_id, session=session
         )
         return SingleReceiptResponse.model_validate(receipt_from_db)
     except KeyError:
@@ -148,13 +268,16 @@ async def fetch_receipt_by_id(
 
 @receipt_router.get("/{receipt_id}/text", response_model=dict)
 async def fetch_receipt_as_text(
+    session: requires_db_session,
     receipt_id: str,
     chars_per_line: int | None = Query(32, ge=20, le=100),
 ) -> dict[str, str]:
     try:
         return {
             "receipt_id": receipt_id,
-            "receipt": render_as_str_receipt_with(receipt_id, chars_per_line),
+            "receipt": await render_as_str_receipt_with(
+                receipt_id, chars_per_line, session
+            ),
         }
     except KeyError:
         raise HTTPException(
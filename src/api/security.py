@@ -1,15 +1,36 @@
+from hashlib import sha256
+from math import ceil
+from time import time
 from typing import Annotated
 
-from fastapi import Depends, HTTPException, Request
+from fastapi import Depends, HTTPException, Request, Response
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jwt import ExpiredSignatureError, PyJWTError, decode
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.datastructures import URL
 
-from config import JWT_ALGORITHM, JWT_SECRET_KEY
-from src.core.db.managers import UserManager
+from config import (
+    JWT_ALGORITHM,
+    JWT_SECRET_KEY,
+    REPLICA_STICKINESS_SECONDS,
+    VERIFIED_TOKENS_CACHE_MAX_ENTRIES,
+)
+from src.api.dependencies import requires_db_session
+from src.core.cache import LRUCache, permissions_version, user_accesses_cache
+from src.core.db.managers import AsyncUserManager
+from src.core.db.routing import bind_user_to
 
 bearer_scheme = HTTPBearer(auto_error=False)
 
+# signature verification (ECDSA especially) costs way more than the rest of a request,
+# so a token is verified once and then trusted until its own 'exp'
+verified_tokens_cache = LRUCache(max_entries=VERIFIED_TOKENS_CACHE_MAX_ENTRIES)
+
+# unix time of user's last write; comes back with the next requests, whichever worker
+# they reach, so that user's reads stay on primary (see src.core.db.routing).
+# Forging it gains nothing but own reads going to primary
+LAST_WRITE_COOKIE = "last_write_at"
+
 
 def extract_token_from(credentials: HTTPAuthorizationCredentials) -> str | None:
     if not credentials or credentials.scheme.lower() != "bearer":
@@ -18,8 +39,12 @@ def extract_token_from(credentials: HTTPAuthorizationCredentials) -> str | None:
 
 
 def extract_payload_from(jwt_token: str) -> dict:
+    token_digest = sha256(jwt_token.encode("utf-8")).digest()
+    if (verified_payload := verified_tokens_cache.get(token_digest)) is not None:
+        return dict(verified_payload)
+
     try:
-        return decode(jwt_token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+        payload = decode(jwt_token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
     except ExpiredSignatureError:
         raise HTTPException(
             status_code=401,
@@ -32,6 +57,11 @@ def extract_payload_from(jwt_token: str) -> dict:
             detail="Could not validate credentials",
         )
 
+    # tokens without 'exp' never expire, hence are not worth trusting blindly
+    if (expires_at := payload.get("exp")) is not None and expires_at > time():
+        verified_tokens_cache.put(token_digest, payload, ttl_seconds=expires_at - time())
+    return dict(payload)
+
 
 def extract_root_route(url: URL) -> str:
     """aka convert e.g '/receipts/regenerate?as_pdf=True&omit_nulls=False' -> 'receipts'"""
@@ -61,14 +91,24 @@ def build_set_of_permissions_required_to_perform(
     }
 
 
-def extract_accesses_for(user_id: str) -> set[str]:
-    return {str(access) for access in UserManager().gather_all_accesses_for(user_id)}
+async def extract_accesses_for(
+    user_id: str,
+    session: AsyncSession | None = None,
+) -> frozenset[str]:
+    cache_key = (user_id, permissions_version.value)
+    if (cached_accesses := user_accesses_cache.get(cache_key)) is not None:
+        return cached_accesses
+
+    accesses = await AsyncUserManager(session).gather_all_accesses_for(user_id)
+    user_accesses = frozenset(str(access) for access in accesses)
+    user_accesses_cache.put(cache_key, user_accesses)
+    return user_accesses
 
 
 def is_possible_to_perform_request_based_on(
     method: str,
     path_segment: str,
-    accesses: set[str],
+    accesses: set[str] | frozenset[str],
 ):
     required_permissions = build_set_of_permissions_required_to_perform(
         method, at=path_segment
@@ -85,8 +125,26 @@ def is_possible_to_perform_request_based_on(
     return False
 
 
+def remember_write_in(response: Response) -> None:
+    response.set_cookie(
+        LAST_WRITE_COOKIE,
+        str(time()),
+        max_age=ceil(REPLICA_STICKINESS_SECONDS),
+        httponly=True,
+        samesite="lax",
+    )
+
+
+def read_last_write_from(request: Request) -> float | None:
+    try:
+        return float(request.cookies[LAST_WRITE_COOKIE])
+    except (KeyError, ValueError):
+        return None
+
+
 async def authorize_request(
     request: Request,
+    session: requires_db_session,
     credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
 ) -> str:
     token = extract_token_from(credentials)
@@ -99,7 +157,9 @@ async def authorize_request(
 
     payload = extract_payload_from(token)
     user_id = payload["sub"]
-    user_accesses = extract_accesses_for(user_id)
+    # lets read-only managers keep user's own recent writes visible, see src.core.db.routing
+    bind_user_to(session, user_id, read_last_write_from(request))
+    user_accesses = await extract_accesses_for(user_id, session)
 
     method, path_segment = extract_info_about_current(request)
 
@@ -0,0 +1,95 @@
+"""
+maintenance commands, run as e.g:
+    python -m src.cli rebuild-rollups --user-id testUser2000
+    python -m src.cli seed --users 1000 --receipts 1000000
+"""
+
+from argparse import ArgumentParser, Namespace
+from datetime import date
+from time import perf_counter
+
+from src.core.db.base import engine
+from src.core.db.managers import ReceiptDailyRollupManager
+from src.core.seeding import SyntheticDataGenerator, seed_synthetic_data_using
+
+
+def rebuild_rollups(arguments: Namespace) -> None:
+    rollups_written = ReceiptDailyRollupManager().rebuild_for(arguments.user_id)
+    scope = f"user {arguments.user_id}" if arguments.user_id else "every user"
+    print(f"Rebuilt {rollups_written} daily rollups of {scope}")
+
+
+def seed(arguments: Namespace) -> None:
+    generator = SyntheticDataGenerator(
+        seed=arguments.seed,
+        users_count=arguments.users,
+        receipts_count=arguments.receipts,
+        days=arguments.days,
+        until=arguments.until,
+        password=arguments.password,
+    )
+    started_at = perf_counter()
+
+    def report_progress(receipts_loaded: int) -> None:
+        elapsed = perf_counter() - started_at
+        print(f"{receipts_loaded} receipts loaded, {receipts_loaded / elapsed:,.0f}/s")
+
+    seeded = seed_synthetic_data_using(
+        engine, generator, arguments.batch_size, report_progress
+    )
+    elapsed = perf_counter() - started_at
+    print(
+        f"Seeded {seeded['users']} users, {seeded['receipts']} receipts "
+        f"and {seeded['items']} items ({seeded['rollups']} daily rollups) "
+        f"in {elapsed:.1f}s, {seeded['receipts'] / elapsed:,.0f} receipts/s"
+    )
+
+
+def build_parser() -> ArgumentParser:
+    parser = ArgumentParser(prog="python -m src.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser(
+        "rebuild-rollups",
+        help="recalculate receipt_daily_rollups from receipts",
+    )
+    rebuild.add_argument(
+        "--user-id",
+        default=None,
+        help="only rebuild rollups of this user",
+    )
+    rebuild.set_defaults(handler=rebuild_rollups)
+
+    seeding = commands.add_parser(
+        "seed",
+        help="bulk load synthetic users and receipts, in a single transaction",
+    )
+    seeding.add_argument("--users", type=int, default=1_000)
+    seeding.add_argument("--receipts", type=int, default=100_000)
+    seeding.add_argument(
+        "--seed",
+        type=int,
+        default=2025,
+        help="same seed produces the same data, logins are unique per seed",
+    )
+    seeding.add_argument("--days", type=int, default=365, help="receipts span that many days")
+    seeding.add_argument(
+        "--until",
+        type=date.fromisoformat,
+        default=date.today(),
+        help="day receipts end at, fix it for data to be reproducible later on",
+    )
+    seeding.add_argument("--password", default="Seed1234", help="every seeded user has it")
+    seeding.add_argument("--batch-size", type=int, default=50_000)
+    seeding.set_defaults(handler=seed)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    arguments = build_parser().parse_args(argv)
+    arguments.handler(arguments)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from types import MappingProxyType
+from typing import Any, Hashable, Mapping
+
+from config import (
+    APP_CONFIG_CHECK_INTERVAL_SECONDS,
+    PERMISSIONS_CACHE_MAX_ENTRIES,
+    PERMISSIONS_CACHE_TTL_SECONDS,
+    RECEIPT_CACHE_MEMORY_MAX_BYTES,
+    RECEIPT_CACHE_MEMORY_MAX_ENTRIES,
+    RECEIPT_CACHE_MEMORY_TTL_SECONDS,
+    REPLICA_STICKINESS_MAX_USERS,
+    REPLICA_STICKINESS_SECONDS,
+)
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> dict[str, int | float]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hit_rate, 4),
+        }
+
+
+class Version:
+    """monotonic counter, bumped whenever data some cache is built from changes"""
+
+    def __init__(self):
+        self.value: int = 0
+
+    def bump(self) -> None:
+        self.value += 1
+
+
+class VersionedSnapshot:
+    """
+    immutable copy of some rarely changing data, tagged with version it was built of.
+    Checking whether that version is still the latest one is up to the owner,
+    `is_fresh()` only says it has been done less than `check_interval_seconds` ago
+    """
+
+    def __init__(self, check_interval_seconds: float):
+        self.check_interval_seconds = check_interval_seconds
+        # (version, values) swapped at once, so readers never see a torn pair
+        self._state: tuple[int, Mapping[str, Any]] | None = None
+        self._checked_at: float = float("-inf")
+
+    @property
+    def version(self) -> int | None:
+        return self._state[0] if self._state is not None else None
+
+    @property
+    def values(self) -> Mapping[str, Any]:
+        return self._state[1] if self._state is not None else MappingProxyType({})
+
+    def is_fresh(self) -> bool:
+        return (
+            self._state is not None
+            and monotonic() - self._checked_at < self.check_interval_seconds
+        )
+
+    def replace(self, version: int, values: dict[str, Any]) -> None:
+        self._state = (version, MappingProxyType(dict(values)))
+        self._checked_at = monotonic()
+
+    def mark_as_checked(self) -> None:
+        self._checked_at = monotonic()
+
+    def invalidate(self) -> None:
+        self._state = None
+
+
+class LRUCache:
+    """
+    in-process cache bounded by number of entries, by their total size in bytes
+    and (optionally) by age; whenever it is over any of those limits,
+    least recently used entries go first
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int | None = None,
+        ttl_seconds: float | None = None,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.stats = CacheStats()
+
+        # key -> (value, size in bytes, monotonic deadline or None)
+        self._entries: OrderedDict[Hashable, tuple[Any, int, float | None]] = OrderedDict()
+        self._total_bytes: int = 0
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return default
+
+            value, _, expires_at = entry
+            if expires_at is not None and expires_at <= monotonic():
+                self._discard(key)
+                self.stats.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def put(
+        self,
+        key: Hashable,
+        value: Any,
+        *,
+        size: int = 0,
+        ttl_seconds: float | None = None,
+    ) -> None:
+        ttl_seconds = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        expires_at = monotonic() + ttl_seconds if ttl_seconds is not None else None
+
+        with self._lock:
+            self._discard(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+
+            self._entries[key] = (value, size, expires_at)
+            self._total_bytes += size
+
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self._total_bytes > self.max_bytes
+            ):
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_size
+                self.stats.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._discard(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def describe(self) -> dict[str, int | float]:
+        return self.stats.as_dict() | {
+            "entries": len(self._entries),
+            "bytes": self._total_bytes,
+        }
+
+    def _discard(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry[1]
+
+
+receipt_txt_memory_cache = LRUCache(
+    max_entries=RECEIPT_CACHE_MEMORY_MAX_ENTRIES,
+    max_bytes=RECEIPT_CACHE_MEMORY_MAX_BYTES,
+    ttl_seconds=RECEIPT_CACHE_MEMORY_TTL_SECONDS,
+)
+receipt_txt_db_cache_stats = CacheStats()
+
+
+# keyed by (user_id, permissions_version.value): bumping the version
+# makes every entry built from outdated roles/accesses unreachable at once,
+# while TTL bounds staleness caused by changes made in other processes
+user_accesses_cache = LRUCache(
+    max_entries=PERMISSIONS_CACHE_MAX_ENTRIES,
+    ttl_seconds=PERMISSIONS_CACHE_TTL_SECONDS,
+)
+permissions_version = Version()
+
+
+# whole apps_configs table, see DBAppConfigManager.fetch_snapshot()
+app_config_snapshot = VersionedSnapshot(
+    check_interval_seconds=APP_CONFIG_CHECK_INTERVAL_SECONDS,
+)
+
+
+# users who have written something lately, their reads stick to primary
+# until replica surely has caught up, see src.core.db.routing
+recent_writers = LRUCache(
+    max_entries=REPLICA_STICKINESS_MAX_USERS,
+    ttl_seconds=REPLICA_STICKINESS_SECONDS,
+)
+
+
+def describe_receipt_txt_cache() -> dict[str, dict[str, int | float]]:
+    return {
+        "memory": receipt_txt_memory_cache.describe(),
+        "db": receipt_txt_db_cache_stats.as_dict(),
+    }
@@ -2,20 +2,89 @@ from __future__ import annotations
 
 from decimal import Decimal
 
-from sqlalchemy import create_engine
+from sqlalchemy import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
 
-from config import DATABASE_URL
+from config import DATABASE_REPLICA_URL, DATABASE_URL
+from src.core.db.engine import create_configured_async_engine, create_configured_engine
 
-engine = create_engine(DATABASE_URL, echo=True)
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
 
-session_local = sessionmaker(bind=engine, expire_on_commit=False)
+
+def build_async_url_from(database_url: str) -> URL:
+    """aka convert e.g 'postgresql://user:pass@db/pata' -> 'postgresql+asyncpg://user:pass@db/pata'"""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    return url.set(drivername=ASYNC_DRIVERS.get(backend, url.drivername))
+
+
+engine = create_configured_engine(DATABASE_URL)
+async_engine = create_configured_async_engine(build_async_url_from(DATABASE_URL))
+
+replica_engine = (
+    create_configured_engine(DATABASE_REPLICA_URL) if DATABASE_REPLICA_URL else None
+)
+async_replica_engine = (
+    create_configured_async_engine(build_async_url_from(DATABASE_REPLICA_URL))
+    if DATABASE_REPLICA_URL
+    else None
+)
+
+
+class RoutingSession(Session):
+    """
+    sends statements of read-only manager methods (see src.core.db.routing) to `replica`,
+    unless this very transaction has already written something: replica can't see that yet
+    """
+
+    replica: Engine | None = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if clause is not None and clause.is_dml:
+            # bulk and Core-style writes bypass flush, see routing.remember_having_written()
+            self.info["has_written"] = True
+        elif (
+            self.replica is not None
+            and self.info.get("is_routed_to_replica")
+            and not self.info.get("has_written")
+            and not self._flushing
+        ):
+            return self.replica
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+class SyncRoutingSession(RoutingSession):
+    replica = replica_engine
+
+
+class AsyncRoutingSession(RoutingSession):
+    replica = async_replica_engine.sync_engine if async_replica_engine else None
+
+
+session_local = sessionmaker(
+    bind=engine,
+    class_=SyncRoutingSession,
+    expire_on_commit=False,
+)
+async_session_local = async_sessionmaker(
+    bind=async_engine,
+    sync_session_class=AsyncRoutingSession,
+    expire_on_commit=False,
+)
 
 
 def create_session() -> Session:
     return session_local()
 
 
+def create_async_session() -> AsyncSession:
+    return async_session_local()
+
+
 class FormattedDecimal(Decimal):
     def __str__(self):
         return f"{self:,.2f}".replace(",", " ")
@@ -0,0 +1,192 @@
+from threading import Lock
+from time import perf_counter
+from typing import Any, Callable
+
+from sqlalchemy import URL, Engine, create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry, QueuePool
+
+from config import (
+    APP_ENV,
+    DB_ECHO,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE_SECONDS,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT_SECONDS,
+    DB_STATEMENT_CACHE_SIZE,
+)
+
+# keyword arguments of create_engine() per APP_ENV.
+# Each process holds up to pool_size + max_overflow connections per engine,
+# so e.g 4 gunicorn workers with production defaults may open 4 * (10 + 20) of them
+ENGINE_PROFILES: dict[str, dict[str, Any]] = {
+    "development": {
+        "echo": True,
+        "pool_size": 5,
+        "max_overflow": 5,
+        "pool_timeout": 30,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+        "query_cache_size": 500,
+    },
+    "test": {
+        "echo": False,
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_timeout": 5,
+        "pool_recycle": -1,
+        "pool_pre_ping": False,
+        "query_cache_size": 500,
+    },
+    "production": {
+        "echo": False,
+        "pool_size": 10,
+        "max_overflow": 20,
+        "pool_timeout": 10,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+        "query_cache_size": 1000,
+    },
+}
+
+
+def parse_flag(raw_value: str) -> bool:
+    return raw_value.lower() == "true"
+
+
+SETTING_PARSERS: dict[str, Callable[[str], Any]] = {
+    "echo": parse_flag,
+    "pool_size": int,
+    "max_overflow": int,
+    "pool_timeout": float,
+    "pool_recycle": int,
+    "pool_pre_ping": parse_flag,
+    "query_cache_size": int,
+}
+
+
+def build_engine_settings_for(
+    app_env: str,
+    overrides: dict[str, str | None],
+) -> dict[str, Any]:
+    """
+    aka profile of `app_env` with every set override on top, e.g ('test', {'pool_size': '20'}) -> {..., 'pool_size': 20};
+    empty overrides count as unset ones, as docker compose passes unset variables that way
+    """
+    if app_env not in ENGINE_PROFILES:
+        raise ValueError(
+            f"Unknown APP_ENV={app_env!r}, expected one of {sorted(ENGINE_PROFILES)}"
+        )
+
+    settings = dict(ENGINE_PROFILES[app_env])
+    for name, raw_value in overrides.items():
+        if raw_value:
+            settings[name] = SETTING_PARSERS[name](raw_value)
+    return settings
+
+
+ENGINE_SETTINGS = build_engine_settings_for(
+    APP_ENV,
+    {
+        "echo": DB_ECHO,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "query_cache_size": DB_STATEMENT_CACHE_SIZE,
+    },
+)
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.checkouts: int = 0
+        self.timeouts: int = 0
+        self.total_wait_seconds: float = 0.0
+        self.max_wait_seconds: float = 0.0
+        self._lock = Lock()
+
+    def observe_checkout_after(self, wait_seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait_seconds += wait_seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+
+    def observe_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def as_dict(self) -> dict[str, int | float]:
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "average_wait_seconds": round(
+                self.total_wait_seconds / self.checkouts if self.checkouts else 0.0, 6
+            ),
+            "max_wait_seconds": round(self.max_wait_seconds, 6),
+        }
+
+
+class InstrumentedPoolMixin:
+    """
+    measures how long every checkout waits for a connection (including opening a new one)
+    and counts checkouts given up after pool_timeout, i.e. pool exhaustion
+    """
+
+    metrics: PoolMetrics
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        started_at = perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.observe_timeout()
+            raise
+
+        self.metrics.observe_checkout_after(perf_counter() - started_at)
+        return connection
+
+    def describe(self) -> dict[str, int | float]:
+        return self.metrics.as_dict() | {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": self.overflow(),
+        }
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool): ...
+
+
+class InstrumentedAsyncAdaptedQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool): ...
+
+
+def create_configured_engine(url: str | URL, settings: dict[str, Any] | None = None) -> Engine:
+    return create_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        **(settings if settings is not None else ENGINE_SETTINGS),
+    )
+
+
+def create_configured_async_engine(
+    url: str | URL,
+    settings: dict[str, Any] | None = None,
+) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        **(settings if settings is not None else ENGINE_SETTINGS),
+    )
+
+
+def describe_pool_of(engine: Engine | AsyncEngine) -> dict[str, int | float]:
+    pool = engine.pool
+    return pool.describe() if isinstance(pool, InstrumentedPoolMixin) else {}
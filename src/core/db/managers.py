@@ -1,16 +1,59 @@
-from datetime import datetime
+from contextlib import AsyncExitStack
+from datetime import date, datetime, time, timedelta
 from decimal import Decimal
-
-from sqlalchemy import select, update, insert
-from sqlalchemy.orm import Session, joinedload
+from functools import partial
+from typing import Any, AsyncIterator, Mapping
+from zlib import compress
+
+from sqlalchemy import (
+    Date,
+    Integer,
+    Select,
+    String,
+    case,
+    cast,
+    delete,
+    event,
+    insert,
+    select,
+    tuple_,
+    type_coerce,
+    update,
+)
+from sqlalchemy.dialects.postgresql import Insert as PostgresInsert
+from sqlalchemy.dialects.postgresql import insert as postgres_insert
+from sqlalchemy.dialects.sqlite import Insert as SQLiteInsert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.sql.elements import ColumnElement
 from sqlalchemy.sql.functions import count, func
 
-from src.core.db.base import Base, create_session
+from config import (
+    RECEIPT_CACHE_COMPRESSION,
+    RECEIPT_CACHE_DB_EVICTION_BATCH,
+    RECEIPT_CACHE_DB_MAX_ENTRIES,
+    RECEIPT_CACHE_DB_TOUCH_INTERVAL_SECONDS,
+)
+from src.core.cache import (
+    app_config_snapshot,
+    permissions_version,
+    receipt_txt_db_cache_stats,
+)
+from src.core.db.base import (
+    Base,
+    FormattedDecimal,
+    FormattedDecimalType,
+    create_async_session,
+    create_session,
+)
 from src.core.db.models import (
     Access,
+    AnalyticsSketch,
     AppConfig,
     Product,
     Receipt,
+    ReceiptDailyRollup,
     ReceiptItems,
     Role,
     Tag,
@@ -18,15 +61,280 @@ from src.core.db.models import (
     User,
     UsersRoles,
 )
-from src.core.utils import generate_alphanumerical_id
+from src.core.db.routing import (
+    ReadYourWrites,
+    RoutingPolicy,
+    bind_user_to,
+    mark_as_recent_writer_in,
+    read_only,
+)
+from src.core.sketches import Sketch, record_sales_of
+from src.core.utils import generate_time_ordered_id
+
+
+def calculate_total_of(items: list[dict]) -> Decimal:
+    return sum(
+        (Decimal(str(item["price"])) * Decimal(str(item["quantity"])) for item in items),
+        start=Decimal(0),
+    ).quantize(Decimal("0.01"))
+
+
+def build_dialect_insert_for(
+    session: Session,
+    model: type[Base],
+) -> PostgresInsert | SQLiteInsert:
+    """INSERT flavour of current backend, the one knowing ON CONFLICT tricks"""
+    dialect_inserts = {
+        "postgresql": postgres_insert,
+        "sqlite": sqlite_insert,
+    }
+    return dialect_inserts[session.get_bind().dialect.name](model)
+
+
+def mark_permissions_as_changed_in(session: Session) -> None:
+    session.info["are_permissions_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def bump_permissions_version_once_committed(session: Session) -> None:
+    """
+    bumped only after commit: doing it at flush time would let a concurrent request
+    re-cache accesses it reads before the change is visible to it
+    """
+    if session.info.pop("are_permissions_changed", False):
+        permissions_version.bump()
+
+
+def build_period_start_of(
+    column: ColumnElement[datetime],
+    granularity: str,
+    dialect_name: str,
+) -> ColumnElement:
+    """
+    aka truncate e.g '2026-10-17 13:40' -> 2026-10-12 for 'week' (weeks start on Monday),
+    -> 2026-10-01 for 'month', done by db itself and always returned as a date
+    """
+    if dialect_name == "postgresql":
+        return cast(func.date_trunc(granularity, column), Date)
+
+    sqlite_modifiers = {
+        "day": (),
+        "week": ("weekday 0", "-6 days"),
+        "month": ("start of month",),
+    }
+    return type_coerce(func.date(column, *sqlite_modifiers[granularity]), Date)
+
+
+def mark_app_config_as_changed_in(session: Session) -> None:
+    session.info["is_app_config_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_app_config_snapshot_once_committed(session: Session) -> None:
+    """
+    this process sees its own changes right away,
+    others do once they notice bumped CONFIG_VERSION
+    """
+    if session.info.pop("is_app_config_changed", False):
+        app_config_snapshot.invalidate()
+
+
+RECEIPT_FORMATTING_CONFIGS = (
+    "delimiter",
+    "separator",
+    "thank_you_note",
+    "cash_label",
+    "cashless_label",
+    "total_label",
+    "rest_label",
+    "datetime_format",
+)
+
+
+def pick_config_from(snapshot: Mapping[str, Any], config: str) -> str | bool | int:
+    if config not in snapshot:
+        raise LookupError(f"No {config=} found!")
+    return snapshot[config]
+
+
+def pick_named_configs_from(
+    snapshot: Mapping[str, Any],
+    keys: list[str] | tuple[str, ...],
+) -> dict[str, str | int | bool | float]:
+    return {key: snapshot[key] for key in keys if key in snapshot}
+
+
+def queue_sales_in(
+    session: Session,
+    user_id: str,
+    creation_date: datetime,
+    receipts: list[dict],
+) -> None:
+    """receipts are dicts with 'items' and 'total'"""
+    session.info.setdefault("pending_sales", []).append(
+        (user_id, creation_date, receipts)
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def feed_sketches_once_committed(session: Session) -> None:
+    """sketches can't take anything back, so only committed receipts get there"""
+    for user_id, creation_date, receipts in session.info.pop("pending_sales", ()):
+        record_sales_of(user_id, creation_date, receipts)
+
+
+@event.listens_for(Session, "after_rollback")
+def forget_sales_once_rolled_back(session: Session) -> None:
+    session.info.pop("pending_sales", None)
+
+
+ROLLUP_MEASURES = (
+    "receipts_count",
+    "items_count",
+    "revenue",
+    "tendered_amount",
+    "change_given",
+)
+
+
+def describe_for_rollups(receipt: Receipt) -> dict:
+    return {
+        "user_id": receipt.user_id,
+        "creation_date": receipt.creation_date,
+        "is_cashless_payment": receipt.is_cashless_payment,
+        "payment_amount": receipt.payment_amount,
+        "total": receipt.total,
+        "items_count": len(receipt.items),
+    }
+
+
+def convert_to_decimal(amount: Decimal | str | float) -> Decimal:
+    """
+    Decimal(str()) would choke on FormattedDecimal, which prints itself as e.g '1 000.00',
+    so decimals are copied as they are and only the rest goes through str()
+    """
+    return Decimal(amount) if isinstance(amount, Decimal) else Decimal(str(amount))
+
+
+def sum_up_daily_contributions_of(receipts: list[dict]) -> list[dict]:
+    """
+    aka fold receipts (see describe_for_rollups()) into one row
+    per (user_id, day, is_cashless_payment) rollup they contribute to
+    """
+    rollups: dict[tuple[str, date, bool], dict] = {}
+    for receipt in receipts:
+        key = (
+            receipt["user_id"],
+            receipt["creation_date"].date(),
+            receipt["is_cashless_payment"],
+        )
+        rollup = rollups.setdefault(
+            key,
+            {
+                "user_id": key[0],
+                "day": key[1],
+                "is_cashless_payment": key[2],
+                "receipts_count": 0,
+                "items_count": 0,
+                "revenue": Decimal(0),
+                "tendered_amount": Decimal(0),
+                "change_given": Decimal(0),
+            },
+        )
+
+        payment_amount = convert_to_decimal(receipt["payment_amount"])
+        total = convert_to_decimal(receipt["total"])
+        rollup["receipts_count"] += 1
+        rollup["items_count"] += receipt["items_count"]
+        rollup["revenue"] += total
+        rollup["tendered_amount"] += payment_amount
+        if not receipt["is_cashless_payment"]:
+            rollup["change_given"] += payment_amount - total
+
+    return list(rollups.values())
+
+
+def find_whole_days_between(
+    created_after: datetime | None,
+    created_before: datetime | None,
+) -> tuple[date | None, date | None]:
+    """
+    aka first and last days lying entirely within [created_after, created_before],
+    None standing for unbounded side; e.g (17.10 13:40, 20.10 00:00) -> (18.10, 19.10)
+    """
+    first_day = None
+    if created_after is not None:
+        first_day = created_after.date()
+        if created_after.time() != time.min:
+            first_day += timedelta(days=1)
+
+    last_day = None
+    if created_before is not None:
+        last_day = created_before.date() - timedelta(days=1)
+
+    return first_day, last_day
+
+
+def merge_sales_summaries(summaries: list[list[dict]]) -> list[dict]:
+    merged: dict[tuple[date, bool], dict] = {}
+    for summary in summaries:
+        for bucket in summary:
+            key = (bucket["period_start"], bucket["is_cashless_payment"])
+            if key not in merged:
+                merged[key] = dict(bucket)
+                continue
+            merged[key]["receipts"] += bucket["receipts"]
+            merged[key]["revenue"] += bucket["revenue"]
+
+    return [merged[key] for key in sorted(merged)]
+
+
+def apply_receipt_filters_to(query: Select, filters: dict) -> Select:
+    if created_after := filters.get("created_after"):
+        query = query.where(Receipt.creation_date >= created_after)
+    if created_before := filters.get("created_before"):
+        query = query.where(Receipt.creation_date <= created_before)
+    if payment_type := filters.get("payment_type"):
+        query = query.where(Receipt.is_cashless_payment == payment_type)
+
+    if (min_total := filters.get("min_total")) is not None:
+        query = query.where(Receipt.total >= min_total)
+    if (max_total := filters.get("max_total")) is not None:
+        query = query.where(Receipt.total <= max_total)
+
+    return query
 
 
 class BaseManager:
+    """
+    methods marked with @read_only may be sent to DATABASE_REPLICA_URL,
+    whenever `routing` allows that for the session (see src.core.db.routing)
+    """
+
     model: type[Base]
+    routing: RoutingPolicy = ReadYourWrites()
 
-    def __init__(self, session: Session | None = None):
+    def __init__(
+        self,
+        session: Session | None = None,
+        routing: RoutingPolicy | None = None,
+    ):
         self._is_using_existing_session: bool = session is not None
         self.session: Session = session if session else create_session()
+        if routing is not None:
+            self.routing = routing
+
+    def save_changes(self) -> None:
+        """
+        shared session belongs to whoever passed it (e.g. the request),
+        so only flush there and leave the single commit to the owner
+        """
+        update_method = (
+            self.session.flush
+            if self._is_using_existing_session
+            else self.session.commit
+        )
+        update_method()
 
     def fetch_specific_by(self, entity_id: str) -> Base | None:
         return self.session.scalar(select(self.model).where(self.model.id == entity_id))
@@ -39,7 +347,7 @@ class BaseManager:
         if not entity:
             return False
         self.session.delete(entity)
-        self.session.commit()
+        self.save_changes()
         return True
 
 
@@ -61,12 +369,7 @@ class TagManager(BaseManager):
         new_tags = [Tag(name=name) for name in missing]
         if new_tags:
             self.session.add_all(new_tags)
-            update_method = (
-                self.session.flush
-                if self._is_using_existing_session
-                else self.session.commit
-            )
-            update_method()
+            self.save_changes()
 
         return list(existing_tags) + new_tags
 
@@ -92,7 +395,7 @@ class ProductManager(BaseManager):
             tags=tags,
         )
         self.session.add(prod)
-        self.session.commit()
+        self.save_changes()
         return prod
 
     def update(
@@ -118,7 +421,7 @@ class ProductManager(BaseManager):
         if tag_names is not None:
             product.tags = TagManager(self.session).ensure_all_are_present(tag_names)
 
-        self.session.commit()
+        self.save_changes()
         return product
 
 
@@ -131,13 +434,37 @@ class DBAppConfigManager(BaseManager):
         "float": float,
     }
 
-    def __getitem__(self, config: str) -> str | bool | int:
-        raw_config_from_db = self.session.scalar(
-            select(self.model).where(AppConfig.key == config)
+    # bumped along with every change, lets other processes know their snapshots are outdated
+    VERSION_KEY = "CONFIG_VERSION"
+
+    def fetch_snapshot(self) -> Mapping[str, str | int | bool | float]:
+        """
+        whole apps_configs table as an immutable mapping shared by the whole process.
+        Re-read only when CONFIG_VERSION in db differs from one snapshot was built of,
+        which is checked at most once per APP_CONFIG_CHECK_INTERVAL_SECONDS
+        """
+        if app_config_snapshot.is_fresh():
+            return app_config_snapshot.values
+
+        version = int(
+            self.session.scalar(
+                select(AppConfig.value).where(AppConfig.key == self.VERSION_KEY)
+            )
+            or 0
+        )
+        if version == app_config_snapshot.version:
+            app_config_snapshot.mark_as_checked()
+            return app_config_snapshot.values
+
+        rows = self.session.scalars(select(AppConfig)).all()
+        app_config_snapshot.replace(
+            version,
+            {cfg.key: self.TYPE_MAPPING[cfg.type](cfg.value) for cfg in rows},
         )
-        if raw_config_from_db is None:
-            raise LookupError(f"No {config=} found!")
-        return self.TYPE_MAPPING[raw_config_from_db.type](raw_config_from_db.value)
+        return app_config_snapshot.values
+
+    def __getitem__(self, config: str) -> str | bool | int:
+        return pick_config_from(self.fetch_snapshot(), config)
 
     def __setitem__(self, key: str, value: str | bool | int):
         value_type = type(value).__name__
@@ -163,43 +490,47 @@ class DBAppConfigManager(BaseManager):
             )
             self.session.execute(stmt_ins)
 
-        self.session.commit()
+        self.bump_version()
+        self.save_changes()
+
+    def bump_version(self) -> None:
+        insert_query = build_dialect_insert_for(self.session, AppConfig).values(
+            key=self.VERSION_KEY,
+            value="1",
+            type="int",
+        )
+        self.session.execute(
+            insert_query.on_conflict_do_update(
+                index_elements=[AppConfig.key],
+                set_={"value": cast(cast(AppConfig.value, Integer) + 1, String)},
+            )
+        )
+        mark_app_config_as_changed_in(self.session)
 
     def fetch_named_configs(
         self, keys: list[str]
     ) -> dict[str, str | int | bool | float]:
-        rows = self.session.scalars(
-            select(AppConfig).where(AppConfig.key.in_(keys))
-        ).all()
-
-        return {cfg.key: self.TYPE_MAPPING[cfg.type](cfg.value) for cfg in rows}
+        return pick_named_configs_from(self.fetch_snapshot(), keys)
 
     def fetch_receipt_formatting_configs(self) -> dict[str, str]:
-        receipt_keys = [
-            "delimiter",
-            "separator",
-            "thank_you_note",
-            "cash_label",
-            "cashless_label",
-            "total_label",
-            "rest_label",
-            "datetime_format",
-        ]
-        return self.fetch_named_configs(receipt_keys)
+        return pick_named_configs_from(self.fetch_snapshot(), RECEIPT_FORMATTING_CONFIGS)
 
 
 class UserManager(BaseManager):
     model = User
 
+    @read_only
     def lookup_for_user_by(self, login: str) -> User | None:
         return self.session.scalar(select(self.model).where(User.login == login))
 
+    @read_only
     def gather_all_accesses_for(self, user_id: str) -> list[Access]:
         stmt = (
             select(Access).join(Access.role).join(Role.users).where(User.id == user_id)
         )
         return self.session.scalars(stmt).all()
 
+    @read_only
     def fetch_total_user_count(self) -> int:
         total = self.session.scalar(select(count()).select_from(User))
         return int(total)
@@ -220,7 +551,7 @@ class UserManager(BaseManager):
             password_hash=password_hash,
         )
         self.session.add(user)
-        self.session.commit()
+        self.save_changes()
         return user
 
 
@@ -233,10 +564,10 @@ class RoleManager(BaseManager):
         if role:
             return role.id
 
-        new_id = generate_alphanumerical_id()
+        new_id = generate_time_ordered_id()
         role = Role(id=new_id, name=role_name)
         self.session.add(role)
-        self.session.commit()
+        self.save_changes()
         return new_id
 
     def assign(self, new_user_id: str, admin_role_id: str) -> bool:
@@ -249,9 +580,11 @@ class RoleManager(BaseManager):
 
         link = UsersRoles(user_id=new_user_id, role_id=admin_role_id)
         self.session.add(link)
-        self.session.commit()
+        mark_permissions_as_changed_in(self.session)
+        self.save_changes()
         return True
 
+    @read_only
     def lookup_for_role_by(self, role_name) -> Role:
         return self.session.scalar(
             select(self.model).where(self.model.name == role_name)
@@ -262,7 +595,7 @@ class AccessManager(BaseManager):
     model = Access
 
     def grant_unlimited_access_to(self, admin_role_id: str) -> str:
-        new_id = generate_alphanumerical_id()
+        new_id = generate_time_ordered_id()
         access = Access(
             id=new_id,
             role_id=admin_role_id,
@@ -270,11 +603,12 @@ class AccessManager(BaseManager):
             route_url="*",
         )
         self.session.add(access)
-        self.session.commit()
+        mark_permissions_as_changed_in(self.session)
+        self.save_changes()
         return new_id
 
     def grant(self, role_id: str, *, permission_to_perform: str, at: str) -> str:
-        new_id = generate_alphanumerical_id()
+        new_id = generate_time_ordered_id()
         access = Access(
             id=new_id,
             role_id=role_id,
@@ -282,13 +616,34 @@ class AccessManager(BaseManager):
             route_url=at,
         )
         self.session.add(access)
-        self.session.commit()
+        mark_permissions_as_changed_in(self.session)
+        self.save_changes()
         return new_id
 
+    def ensure_granted(self, role_id: str, *, permission_to_perform: str, at: str) -> str:
+        stmt = select(Access.id).where(
+            Access.role_id == role_id,
+            Access.allowed_method == permission_to_perform,
+            Access.route_url == at,
+        )
+        existing_id = self.session.scalar(stmt.limit(1))
+        if existing_id:
+            return existing_id
+        return self.grant(role_id, permission_to_perform=permission_to_perform, at=at)
+
 
 class ReceiptManager(BaseManager):
     model = Receipt
 
+    @read_only
+    def count_filtered_using(self, user_id: str, filters: dict) -> int:
+        query = apply_receipt_filters_to(
+            select(Receipt.id).where(Receipt.user_id == user_id),
+            filters,
+        )
+        return self.session.scalar(select(count()).select_from(query.subquery()))
+
+    @read_only
     def filter_and_paginate_using(
         self,
         user_id: str,
@@ -296,42 +651,67 @@ class ReceiptManager(BaseManager):
         offset: int,
         filters: dict,
     ) -> tuple[int, list[Receipt]]:
+        query = apply_receipt_filters_to(
+            select(Receipt).where(Receipt.user_id == user_id),
+            filters,
+        )
         query = (
-            select(Receipt)
-            .options(joinedload(Receipt.items))
-            .where(Receipt.user_id == user_id)
+            query.options(selectinload(Receipt.items), joinedload(Receipt.user))
+            .order_by(Receipt.creation_date.desc(), Receipt.id.desc())
+            .limit(limit)
+            .offset(offset)
         )
 
-        if created_after := filters.get("created_after"):
-            query = query.where(Receipt.creation_date >= created_after)
-        if created_before := filters.get("created_before"):
-            query = query.where(Receipt.creation_date <= created_before)
-        if payment_type := filters.get("payment_type"):
-            query = query.where(Receipt.is_cashless_payment == payment_type)
+        page: list[Receipt] = self.session.scalars(query).all()
 
-        min_total = filters.get("min_total")
-        max_total = filters.get("max_total")
+        return self.count_filtered_using(user_id, filters), page
 
-        if min_total is not None or max_total is not None:
-            query = query.join(Receipt.items).group_by(Receipt.id)
-            total_expr = func.sum(ReceiptItems.price * ReceiptItems.quantity)
-            if min_total is not None:
-                query = query.having(total_expr >= min_total)
-            if max_total is not None:
-                query = query.having(total_expr <= max_total)
-
-        query = query.order_by(Receipt.creation_date.desc())
+    @read_only
+    def filter_and_paginate_after(
+        self,
+        user_id: str,
+        limit: int,
+        cursor: tuple[datetime, str] | None,
+        filters: dict,
+    ) -> list[Receipt]:
+        """
+        keyset flavour of filter_and_paginate_using():
+        returns up to `limit` receipts that go strictly after `cursor`,
+        which is (creation_date, id) of the last receipt client has already seen
+        """
+        query = apply_receipt_filters_to(
+            select(Receipt).where(Receipt.user_id == user_id),
+            filters,
+        )
+        if cursor is not None:
+            query = query.where(tuple_(Receipt.creation_date, Receipt.id) < cursor)
 
-        all_receipts: list[Receipt] = self.session.scalars(query).unique().all()
+        query = (
+            query.options(selectinload(Receipt.items), joinedload(Receipt.user))
+            .order_by(Receipt.creation_date.desc(), Receipt.id.desc())
+            .limit(limit)
+        )
+        return self.session.scalars(query).all()
 
-        paginated = all_receipts[offset : offset + limit]
+    def delete(self, entity_id: str) -> bool:
+        receipt = self._fetch_including_items_for(entity_id)
+        if not receipt:
+            return False
 
-        return len(all_receipts), paginated
+        ReceiptDailyRollupManager(self.session).withdraw([describe_for_rollups(receipt)])
+        self.session.delete(receipt)
+        self.save_changes()
+        return True
 
+    @read_only
     def fetch_including_items_for(self, receipt_id: str) -> Receipt:
+        return self._fetch_including_items_for(receipt_id)
+
+    def _fetch_including_items_for(self, receipt_id: str) -> Receipt:
+        """always from primary: whatever is going to be changed has to be up-to-date"""
         query = (
             select(Receipt)
-            .options(joinedload(Receipt.items))
+            .options(joinedload(Receipt.items), joinedload(Receipt.user))
             .where(Receipt.id == receipt_id)
         )
         return self.session.scalar(query)
@@ -347,6 +727,7 @@ class ReceiptManager(BaseManager):
             user_id=user_id,
             is_cashless_payment=is_cashless_payment,
             payment_amount=payment_amount,
+            total=calculate_total_of(items),
         )
         self.session.add(receipt)
         self.session.flush()
@@ -360,53 +741,676 @@ class ReceiptManager(BaseManager):
             )
             self.session.add(receipt_item)
 
-        self.session.commit()
+        ReceiptDailyRollupManager(self.session).account_for(
+            [
+                {
+                    "user_id": user_id,
+                    "creation_date": receipt.creation_date,
+                    "is_cashless_payment": is_cashless_payment,
+                    "payment_amount": payment_amount,
+                    "total": receipt.total,
+                    "items_count": len(items),
+                }
+            ]
+        )
+        queue_sales_in(
+            self.session,
+            user_id,
+            receipt.creation_date,
+            [{"items": items, "total": receipt.total}],
+        )
+        mark_as_recent_writer_in(self.session, user_id)
+        self.save_changes()
         fetch_receipt_with_items_included = (
             select(Receipt)
-            .options(joinedload(Receipt.items))
+            .options(joinedload(Receipt.items), joinedload(Receipt.user))
             .where(Receipt.id == receipt.id)
         )
         return self.session.scalar(fetch_receipt_with_items_included)
 
+    def create_receipts_in_bulk(
+        self,
+        user_id: str,
+        receipts: list[dict],
+    ) -> list[dict]:
+        """
+        receipts are dicts with 'items', 'is_cashless_payment' and 'payment_amount',
+        same as create_receipt() takes. Ids are generated here, so everything goes
+        into two multi-row INSERTs (batched by SQLAlchemy's insertmanyvalues)
+        and nothing has to be read back afterward
+        """
+        creation_date = datetime.now()
+        receipt_rows: list[dict] = []
+        item_rows: list[dict] = []
+
+        for receipt in receipts:
+            receipt_id = generate_time_ordered_id()
+            receipt_rows.append(
+                {
+                    "id": receipt_id,
+                    "user_id": user_id,
+                    "is_cashless_payment": receipt["is_cashless_payment"],
+                    "payment_amount": receipt["payment_amount"],
+                    "total": calculate_total_of(receipt["items"]),
+                    "creation_date": creation_date,
+                }
+            )
+            item_rows.extend(
+                {
+                    "id": generate_time_ordered_id(),
+                    "receipt_id": receipt_id,
+                    "name": item["name"],
+                    "price": item["price"],
+                    "quantity": item["quantity"],
+                }
+                for item in receipt["items"]
+            )
+
+        self.session.execute(insert(Receipt), receipt_rows)
+        self.session.execute(insert(ReceiptItems), item_rows)
+        ReceiptDailyRollupManager(self.session).account_for(
+            [
+                row | {"items_count": len(receipt["items"])}
+                for row, receipt in zip(receipt_rows, receipts)
+            ]
+        )
+        queue_sales_in(
+            self.session,
+            user_id,
+            creation_date,
+            [
+                {"items": receipt["items"], "total": row["total"]}
+                for row, receipt in zip(receipt_rows, receipts)
+            ],
+        )
+        mark_as_recent_writer_in(self.session, user_id)
+        self.save_changes()
+
+        return [
+            {
+                "id": row["id"],
+                "total": FormattedDecimal(row["total"]),
+                "created_at": creation_date,
+            }
+            for row in receipt_rows
+        ]
+
+    @read_only
     def fetch_all_for_user_with(self, user_id: str) -> list[Receipt]:
         return self.session.scalars(
             select(Receipt).where(Receipt.user_id == user_id)
         ).all()
 
 
+class ReceiptDailyRollupManager(BaseManager):
+    """
+    keeps receipt_daily_rollups in sync with receipts. Never commits on its own:
+    ReceiptManager passes its session, so rollups change in the very same transaction
+    """
+
+    model = ReceiptDailyRollup
+
+    def account_for(self, receipts: list[dict]) -> None:
+        insert_query = build_dialect_insert_for(self.session, ReceiptDailyRollup)
+        upsert_query = insert_query.on_conflict_do_update(
+            index_elements=[
+                ReceiptDailyRollup.user_id,
+                ReceiptDailyRollup.day,
+                ReceiptDailyRollup.is_cashless_payment,
+            ],
+            set_={
+                measure: getattr(ReceiptDailyRollup, measure)
+                + getattr(insert_query.excluded, measure)
+                for measure in ROLLUP_MEASURES
+            },
+        )
+        self.session.execute(upsert_query, sum_up_daily_contributions_of(receipts))
+
+    def withdraw(self, receipts: list[dict]) -> None:
+        for rollup in sum_up_daily_contributions_of(receipts):
+            is_same_rollup = (
+                ReceiptDailyRollup.user_id == rollup["user_id"],
+                ReceiptDailyRollup.day == rollup["day"],
+                ReceiptDailyRollup.is_cashless_payment == rollup["is_cashless_payment"],
+            )
+            self.session.execute(
+                update(ReceiptDailyRollup)
+                .where(*is_same_rollup)
+                .values(
+                    {
+                        measure: getattr(ReceiptDailyRollup, measure) - rollup[measure]
+                        for measure in ROLLUP_MEASURES
+                    }
+                )
+            )
+            self.session.execute(
+                delete(ReceiptDailyRollup).where(
+                    *is_same_rollup,
+                    ReceiptDailyRollup.receipts_count <= 0,
+                )
+            )
+
+    def rebuild_for(self, user_id: str | None = None) -> int:
+        """
+        recalculates rollups of given user (or everyone's) from scratch
+        with a single INSERT ... SELECT, returns number of rollups written
+        """
+        items_per_receipt = (
+            select(ReceiptItems.receipt_id, count().label("items_count"))
+            .group_by(ReceiptItems.receipt_id)
+            .subquery()
+        )
+        day = build_period_start_of(
+            Receipt.creation_date,
+            "day",
+            self.session.get_bind().dialect.name,
+        )
+        aggregated = (
+            select(
+                Receipt.user_id,
+                day,
+                Receipt.is_cashless_payment,
+                count(Receipt.id),
+                func.coalesce(func.sum(items_per_receipt.c.items_count), 0),
+                func.sum(Receipt.total),
+                func.sum(Receipt.payment_amount),
+                func.sum(
+                    case(
+                        (Receipt.is_cashless_payment, 0),
+                        else_=Receipt.payment_amount - Receipt.total,
+                    )
+                ),
+            )
+            .outerjoin(
+                items_per_receipt,
+                items_per_receipt.c.receipt_id == Receipt.id,
+            )
+            .group_by(Receipt.user_id, day, Receipt.is_cashless_payment)
+        )
+
+        outdated = delete(ReceiptDailyRollup)
+        if user_id is not None:
+            aggregated = aggregated.where(Receipt.user_id == user_id)
+            outdated = outdated.where(ReceiptDailyRollup.user_id == user_id)
+
+        self.session.execute(outdated)
+        result = self.session.execute(
+            insert(ReceiptDailyRollup).from_select(
+                ["user_id", "day", "is_cashless_payment", *ROLLUP_MEASURES],
+                aggregated,
+            )
+        )
+        self.save_changes()
+        return result.rowcount
+
+
+class SalesAnalyticsManager(BaseManager):
+    """
+    whole days of requested range are read from receipt_daily_rollups,
+    so only receipts of partially covered days at its edges are aggregated
+    from receipts themselves, summing up the same persisted totals rollups do
+    """
+
+    model = ReceiptDailyRollup
+
+    @read_only
+    def summarize_sales_of(
+        self,
+        user_id: str,
+        granularity: str,
+        filters: dict,
+    ) -> list[dict]:
+        """
+        revenue and receipts count per (period, payment type), oldest period first
+        """
+        created_after = filters.get("created_after")
+        created_before = filters.get("created_before")
+        first_day, last_day = find_whole_days_between(created_after, created_before)
+
+        if first_day is not None and last_day is not None and first_day > last_day:
+            return self.summarize_receipts_of(
+                user_id,
+                granularity,
+                Receipt.creation_date >= created_after,
+                Receipt.creation_date <= created_before,
+            )
+
+        partial_summaries = [
+            self.summarize_rollups_of(user_id, granularity, first_day, last_day)
+        ]
+        if created_after is not None and created_after.time() != time.min:
+            partial_summaries.append(
+                self.summarize_receipts_of(
+                    user_id,
+                    granularity,
+                    Receipt.creation_date >= created_after,
+                    Receipt.creation_date < datetime.combine(first_day, time.min),
+                )
+            )
+        if created_before is not None:
+            partial_summaries.append(
+                self.summarize_receipts_of(
+                    user_id,
+                    granularity,
+                    Receipt.creation_date >= datetime.combine(created_before.date(), time.min),
+                    Receipt.creation_date <= created_before,
+                )
+            )
+
+        return merge_sales_summaries(partial_summaries)
+
+    def summarize_rollups_of(
+        self,
+        user_id: str,
+        granularity: str,
+        first_day: date | None,
+        last_day: date | None,
+    ) -> list[dict]:
+        period_start = build_period_start_of(
+            ReceiptDailyRollup.day,
+            granularity,
+            self.session.get_bind().dialect.name,
+        ).label("period_start")
+
+        query = select(
+            period_start,
+            ReceiptDailyRollup.is_cashless_payment,
+            func.sum(ReceiptDailyRollup.receipts_count).label("receipts"),
+            type_coerce(
+                func.sum(ReceiptDailyRollup.revenue),
+                FormattedDecimalType,
+            ).label("revenue"),
+        ).where(ReceiptDailyRollup.user_id == user_id)
+        if first_day is not None:
+            query = query.where(ReceiptDailyRollup.day >= first_day)
+        if last_day is not None:
+            query = query.where(ReceiptDailyRollup.day <= last_day)
+
+        query = query.group_by(period_start, ReceiptDailyRollup.is_cashless_payment)
+        return [row._asdict() for row in self.session.execute(query)]
+
+    def summarize_receipts_of(
+        self,
+        user_id: str,
+        granularity: str,
+        *conditions: ColumnElement[bool],
+    ) -> list[dict]:
+        period_start = build_period_start_of(
+            Receipt.creation_date,
+            granularity,
+            self.session.get_bind().dialect.name,
+        ).label("period_start")
+        # same persisted totals rollups add up, so revenue doesn't depend on where window edges fall
+        revenue = type_coerce(func.sum(Receipt.total), FormattedDecimalType).label("revenue")
+
+        query = (
+            select(
+                period_start,
+                Receipt.is_cashless_payment,
+                count(Receipt.id).label("receipts"),
+                revenue,
+            )
+            .where(Receipt.user_id == user_id, *conditions)
+            .group_by(period_start, Receipt.is_cashless_payment)
+            .order_by(period_start, Receipt.is_cashless_payment)
+        )
+        return [row._asdict() for row in self.session.execute(query)]
+
+    @read_only
+    def rank_items_exactly(
+        self,
+        user_id: str,
+        measure: str,
+        created_after: datetime,
+        created_before: datetime,
+        limit: int,
+    ) -> list[dict]:
+        """
+        exact counterpart of top items sketches: full GROUP BY over receipt items
+        created within [created_after, created_before)
+        """
+        measures = {
+            "quantity": func.sum(ReceiptItems.quantity),
+            "revenue": func.sum(ReceiptItems.price * ReceiptItems.quantity),
+        }
+        value = type_coerce(measures[measure], FormattedDecimalType).label("value")
+
+        query = (
+            select(ReceiptItems.name, value)
+            .join(Receipt, Receipt.id == ReceiptItems.receipt_id)
+            .where(
+                Receipt.user_id == user_id,
+                Receipt.creation_date >= created_after,
+                Receipt.creation_date < created_before,
+            )
+            .group_by(ReceiptItems.name)
+            .order_by(value.desc(), ReceiptItems.name)
+            .limit(limit)
+        )
+        return [row._asdict() for row in self.session.execute(query)]
+
+    @read_only
+    def count_distinct_items_exactly(
+        self,
+        user_id: str,
+        created_after: datetime,
+        created_before: datetime,
+    ) -> int:
+        return self.session.scalar(
+            select(count(ReceiptItems.name.distinct()))
+            .join(Receipt, Receipt.id == ReceiptItems.receipt_id)
+            .where(
+                Receipt.user_id == user_id,
+                Receipt.creation_date >= created_after,
+                Receipt.creation_date < created_before,
+            )
+        )
+
+    @read_only
+    def count_active_users_exactly(
+        self,
+        created_after: datetime,
+        created_before: datetime,
+    ) -> int:
+        return self.session.scalar(
+            select(count(Receipt.user_id.distinct())).where(
+                Receipt.creation_date >= created_after,
+                Receipt.creation_date < created_before,
+            )
+        )
+
+
+class AnalyticsSketchManager(BaseManager):
+    model = AnalyticsSketch
+
+    @read_only
+    def fetch_payload_of(self, kind: str, scope: str, period: str) -> bytes | None:
+        return self.session.scalar(
+            select(AnalyticsSketch.payload).where(
+                AnalyticsSketch.kind == kind,
+                AnalyticsSketch.scope == scope,
+                AnalyticsSketch.period == period,
+            )
+        )
+
+    @read_only
+    def fetch_payloads_of(
+        self,
+        kind: str,
+        scope: str,
+        periods: list[str],
+    ) -> dict[str, bytes]:
+        rows = self.session.execute(
+            select(AnalyticsSketch.period, AnalyticsSketch.payload).where(
+                AnalyticsSketch.kind == kind,
+                AnalyticsSketch.scope == scope,
+                AnalyticsSketch.period.in_(periods),
+            )
+        )
+        return {period: payload for period, payload in rows}
+
+    def checkpoint(self, kind: str, scope: str, period: str, delta: Sketch) -> None:
+        """
+        merges sketch of what this process has seen since last checkpoint into stored one.
+        Row is locked while merging, so concurrent checkpoints of other processes
+        wait instead of overwriting each other
+        """
+        stored = self.session.scalar(
+            select(AnalyticsSketch)
+            .where(
+                AnalyticsSketch.kind == kind,
+                AnalyticsSketch.scope == scope,
+                AnalyticsSketch.period == period,
+            )
+            .with_for_update()
+        )
+
+        if stored is None:
+            self.session.add(
+                AnalyticsSketch(
+                    kind=kind,
+                    scope=scope,
+                    period=period,
+                    payload=delta.to_bytes(),
+                )
+            )
+        else:
+            merged = type(delta).from_bytes(stored.payload)
+            merged.merge(delta)
+            stored.payload = merged.to_bytes()
+
+        self.save_changes()
+
+
 class ReceiptCacheManager(BaseManager):
+    """
+    db tier of the receipts.txt cache: one entry per (receipt, formatting config, width),
+    bounded by RECEIPT_CACHE_DB_MAX_ENTRIES, evicting least recently *read* entries.
+    Instead of counting rows on every insert, size is checked once per
+    RECEIPT_CACHE_DB_EVICTION_BATCH inserts made by this process
+    and then everything above the limit goes away with a single DELETE.
+    Recency only has to be roughly right for that, so a hit refreshes entry's
+    last access at most once per RECEIPT_CACHE_DB_TOUCH_INTERVAL_SECONDS,
+    instead of turning every cached read into UPDATE and commit on primary
+    """
+
     model = TxtReceiptCache
+    max_entries: int = RECEIPT_CACHE_DB_MAX_ENTRIES
+    eviction_batch: int = RECEIPT_CACHE_DB_EVICTION_BATCH
+    touch_interval: timedelta = timedelta(seconds=RECEIPT_CACHE_DB_TOUCH_INTERVAL_SECONDS)
+    is_compressing: bool = RECEIPT_CACHE_COMPRESSION
+
+    _inserts_since_last_eviction: int = 0
 
-    def fetch_cache_for(self, receipt_id: str, config_str: str) -> str | None:
+    def fetch_cache_for(self, receipt_id: str, config_hash: str, width: int) -> str | None:
         cache_row = self.session.scalar(
             select(self.model).where(
-                self.model.receipt_id == receipt_id, self.model.config_str == config_str
+                self.model.receipt_id == receipt_id,
+                self.model.config_hash == config_hash,
+                self.model.width == width,
             )
         )
-        return cache_row.txt if cache_row else None
+        if cache_row is None:
+            receipt_txt_db_cache_stats.misses += 1
+            return None
 
-    def create_new_entry_with(self, receipt_id: str, config_str: str, txt: str) -> None:
-        total = self.session.scalar(select(func.count()).select_from(self.model))
+        receipt_txt_db_cache_stats.hits += 1
+        now = datetime.now()
+        if cache_row.last_access_date < now - self.touch_interval:
+            cache_row.last_access_date = now
+            self.save_changes()
+        return cache_row.text
+
+    def create_new_entry_with(
+        self,
+        receipt_id: str,
+        config_hash: str,
+        width: int,
+        txt: str,
+    ) -> None:
+        raw_txt = txt.encode("utf-8")
+        if self.is_compressing:
+            raw_txt = compress(raw_txt)
+
+        # concurrent request could have rendered the very same variant already,
+        # that's fine, and definitely no reason to fail the whole request
+        insert_if_absent = (
+            build_dialect_insert_for(self.session, self.model)
+            .values(
+                receipt_id=receipt_id,
+                config_hash=config_hash,
+                width=width,
+                txt=raw_txt,
+                is_compressed=self.is_compressing,
+                creation_date=datetime.now(),
+                last_access_date=datetime.now(),
+            )
+            .on_conflict_do_nothing()
+        )
+        self.session.execute(insert_if_absent)
 
-        if total >= 10:
-            oldest = self.session.scalars(
-                select(self.model).order_by(self.model.creation_date.asc())
-            ).first()
-            self.session.delete(oldest)
+        ReceiptCacheManager._inserts_since_last_eviction += 1
+        if ReceiptCacheManager._inserts_since_last_eviction >= self.eviction_batch:
+            ReceiptCacheManager._inserts_since_last_eviction = 0
+            self.evict_least_recently_used()
 
-        new_cache_entry = TxtReceiptCache(
-            receipt_id=receipt_id,
-            config_str=config_str,
-            txt=txt,
+        self.save_changes()
+
+    def evict_least_recently_used(self) -> int:
+        total = self.session.scalar(select(func.count()).select_from(self.model))
+        excess = total - self.max_entries
+        if excess <= 0:
+            return 0
+
+        cache_key = tuple_(self.model.receipt_id, self.model.config_hash, self.model.width)
+        least_recently_used = (
+            select(self.model.receipt_id, self.model.config_hash, self.model.width)
+            .order_by(self.model.last_access_date.asc())
+            .limit(excess)
         )
-        self.session.add(new_cache_entry)
-        self.session.commit()
+        self.session.execute(delete(self.model).where(cache_key.in_(least_recently_used)))
+        self.save_changes()
+        receipt_txt_db_cache_stats.evictions += excess
+        return excess
 
     def delete(self, receipt_id: str) -> bool:
-        receipt_cache = self.session.scalar(select(TxtReceiptCache).where(TxtReceiptCache.receipt_id == receipt_id))
-        if not receipt_cache:
-            return False
-        self.session.delete(receipt_cache)
-        self.session.commit()
-        return True
+        """drops every cached variant of given receipt"""
+        result = self.session.execute(
+            delete(self.model).where(self.model.receipt_id == receipt_id)
+        )
+        self.save_changes()
+        return result.rowcount > 0
+
+
+class AsyncBaseManager:
+    """
+    asyncio counterpart of the BaseManager subclass set as `sync_manager`.
+    Pass the request's session (see src.api.dependencies) to share
+    a single unit of work between all the managers used while handling it.
+
+    Instead of duplicating every query, each method call is forwarded to
+    the very same sync manager method through AsyncSession.run_sync():
+    SQLAlchemy drives it inside a greenlet over the async driver (asyncpg/aiosqlite),
+    so awaiting it never blocks the event loop.
+
+    Objects returned are detached from any greenlet, so everything the caller
+    is going to touch has to be eagerly loaded by the sync method itself.
+    """
+
+    sync_manager: type[BaseManager]
+
+    def __init__(
+        self,
+        session: AsyncSession | None = None,
+        routing: RoutingPolicy | None = None,
+    ):
+        self._is_using_existing_session: bool = session is not None
+        self.session: AsyncSession = session if session else create_async_session()
+        self.routing: RoutingPolicy = routing or self.sync_manager.routing
+
+    async def _run(self, method_name: str, *args, **kwargs) -> Any:
+        def call_sync_method_using(sync_session: Session) -> Any:
+            sync_manager = self.sync_manager(sync_session, self.routing)
+            return getattr(sync_manager, method_name)(*args, **kwargs)
+
+        if self._is_using_existing_session:
+            return await self.session.run_sync(call_sync_method_using)
+
+        # own session lives exactly as long as a single call,
+        # so its connection goes back to the pool right away
+        async with self.session:
+            result = await self.session.run_sync(call_sync_method_using)
+            await self.session.commit()
+            return result
+
+    def __getattr__(self, method_name: str):
+        if not callable(getattr(self.sync_manager, method_name, None)):
+            raise AttributeError(
+                f"{self.sync_manager.__name__} has no method {method_name!r}"
+            )
+        return partial(self._run, method_name)
+
+
+class AsyncDBAppConfigManager(AsyncBaseManager):
+    """fresh snapshot is served straight away, without even touching the session"""
+
+    sync_manager = DBAppConfigManager
+
+    async def fetch_snapshot(self) -> Mapping[str, str | int | bool | float]:
+        if app_config_snapshot.is_fresh():
+            return app_config_snapshot.values
+        return await self._run("fetch_snapshot")
+
+    async def __getitem__(self, config: str) -> str | bool | int:
+        return pick_config_from(await self.fetch_snapshot(), config)
+
+    async def fetch_named_configs(
+        self, keys: list[str]
+    ) -> dict[str, str | int | bool | float]:
+        return pick_named_configs_from(await self.fetch_snapshot(), keys)
+
+    async def fetch_receipt_formatting_configs(self) -> dict[str, str]:
+        return pick_named_configs_from(
+            await self.fetch_snapshot(), RECEIPT_FORMATTING_CONFIGS
+        )
+
+
+class AsyncUserManager(AsyncBaseManager):
+    sync_manager = UserManager
+
+
+class AsyncRoleManager(AsyncBaseManager):
+    sync_manager = RoleManager
+
+
+class AsyncAccessManager(AsyncBaseManager):
+    sync_manager = AccessManager
+
+
+class AsyncReceiptManager(AsyncBaseManager):
+    sync_manager = ReceiptManager
+
+    async def stream_filtered_using(
+        self,
+        user_id: str,
+        filters: dict,
+        partition_size: int,
+        last_written_at: float | None = None,
+    ) -> AsyncIterator[list[Receipt]]:
+        """
+        the only natively async method here: streams through server-side cursor,
+        holding no more than `partition_size` receipts (with their items) at once
+        """
+        query = (
+            apply_receipt_filters_to(
+                select(Receipt).where(Receipt.user_id == user_id),
+                filters,
+            )
+            .options(selectinload(Receipt.items), joinedload(Receipt.user))
+            .order_by(Receipt.creation_date.desc(), Receipt.id.desc())
+            .execution_options(yield_per=partition_size)
+        )
+
+        async with AsyncExitStack() as own_session_scope:
+            if not self._is_using_existing_session:
+                await own_session_scope.enter_async_context(self.session)
+                # own session serves nothing but this read, same as @read_only methods
+                bind_user_to(self.session, user_id, last_written_at)
+                if self.routing.allows_replica_for(self.session):
+                    self.session.info["is_routed_to_replica"] = True
+
+            result = await self.session.stream_scalars(query)
+            async for partition in result.partitions():
+                yield partition
+
+
+class AsyncSalesAnalyticsManager(AsyncBaseManager):
+    sync_manager = SalesAnalyticsManager
+
+
+class AsyncAnalyticsSketchManager(AsyncBaseManager):
+    sync_manager = AnalyticsSketchManager
+
 
+class AsyncReceiptCacheManager(AsyncBaseManager):
+    sync_manager = ReceiptCacheManager
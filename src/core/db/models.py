@@ -1,13 +1,24 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime
+from zlib import decompress
 
+from sqlalchemy import text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy.sql.schema import ForeignKey
-from sqlalchemy.sql.sqltypes import DATETIME, Boolean, Enum, Float, String
+from sqlalchemy.sql.schema import ForeignKey, Index
+from sqlalchemy.sql.sqltypes import (
+    DATE,
+    DATETIME,
+    Boolean,
+    Enum,
+    Float,
+    Integer,
+    LargeBinary,
+    String,
+)
 
 from src.core.db.base import Base, FormattedDecimal, FormattedDecimalType
-from src.core.utils import generate_alphanumerical_id
+from src.core.utils import TIME_ORDERED_ID_LENGTH, generate_time_ordered_id
 
 
 class Product(Base):
@@ -15,7 +26,7 @@ class Product(Base):
 
     id: Mapped[str] = mapped_column(
         primary_key=True,
-        default=generate_alphanumerical_id,
+        default=generate_time_ordered_id,
     )
     name: Mapped[str] = mapped_column(String)
     description: Mapped[str | None] = mapped_column(String, nullable=True)
@@ -35,7 +46,7 @@ class Tag(Base):
 
     id: Mapped[str] = mapped_column(
         primary_key=True,
-        default=generate_alphanumerical_id,
+        default=generate_time_ordered_id,
     )
     name: Mapped[str] = mapped_column(String)
     value: Mapped[str | None] = mapped_column(String, nullable=True, default=None)
@@ -70,7 +81,7 @@ class AppConfig(Base):
 class User(Base):
     __tablename__ = "users"
 
-    id: Mapped[str] = mapped_column(String(12), primary_key=True)
+    id: Mapped[str] = mapped_column(String(TIME_ORDERED_ID_LENGTH), primary_key=True)
     login: Mapped[str] = mapped_column(String(50), unique=True)
     email: Mapped[str] = mapped_column(String(255), unique=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -98,7 +109,7 @@ class Role(Base):
 
     id: Mapped[str] = mapped_column(
         primary_key=True,
-        default=generate_alphanumerical_id,
+        default=generate_time_ordered_id,
     )
     name: Mapped[str] = mapped_column(String(50), unique=True)
 
@@ -127,6 +138,7 @@ class UsersRoles(Base):
     role_id: Mapped[str] = mapped_column(
         ForeignKey("roles.id", ondelete="CASCADE"),
         primary_key=True,
+        index=True,
     )
 
 
@@ -135,9 +147,12 @@ class Access(Base):
 
     id: Mapped[str] = mapped_column(
         primary_key=True,
-        default=generate_alphanumerical_id,
+        default=generate_time_ordered_id,
+    )
+    role_id: Mapped[str] = mapped_column(
+        ForeignKey("roles.id", ondelete="CASCADE"),
+        index=True,
     )
-    role_id: Mapped[str] = mapped_column(ForeignKey("roles.id", ondelete="CASCADE"))
     route_url: Mapped[str] = mapped_column(String(200))
     allowed_method: Mapped[str] = mapped_column(
         Enum("GET", "POST", "PUT", "PATCH", "DELETE", "*")
@@ -157,14 +172,29 @@ class Access(Base):
 
 class Receipt(Base):
     __tablename__ = "receipts"
+    __table_args__ = (
+        Index("ix_receipts_user_id_total", "user_id", "total"),
+        # user's receipts come newest first everywhere, see ReceiptManager
+        Index(
+            "ix_receipts_user_id_creation_date_id",
+            "user_id",
+            text("creation_date DESC"),
+            text("id DESC"),
+        ),
+    )
 
     id: Mapped[str] = mapped_column(
         primary_key=True,
-        default=generate_alphanumerical_id,
+        default=generate_time_ordered_id,
     )
     user_id: Mapped[str] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
     is_cashless_payment: Mapped[bool] = mapped_column(Boolean, nullable=False)
     payment_amount: Mapped[FormattedDecimal] = mapped_column(FormattedDecimalType)
+    total: Mapped[FormattedDecimal] = mapped_column(
+        FormattedDecimalType,
+        nullable=False,
+        default=0,
+    )
 
     creation_date: Mapped[datetime] = mapped_column(DATETIME, default=datetime.now)
 
@@ -179,10 +209,6 @@ class Receipt(Base):
         back_populates="receipts",
     )
 
-    @property
-    def total(self) -> FormattedDecimal:
-        return FormattedDecimal(sum(item.total for item in self.items))
-
     @property
     def rest(self) -> FormattedDecimal:
         if self.is_cashless_payment:
@@ -195,10 +221,11 @@ class ReceiptItems(Base):
 
     id: Mapped[str] = mapped_column(
         primary_key=True,
-        default=generate_alphanumerical_id,
+        default=generate_time_ordered_id,
     )
     receipt_id: Mapped[str] = mapped_column(
-        ForeignKey("receipts.id", ondelete="CASCADE")
+        ForeignKey("receipts.id", ondelete="CASCADE"),
+        index=True,
     )
     name: Mapped[str] = mapped_column(String(200))
     price: Mapped[FormattedDecimal] = mapped_column(FormattedDecimalType)
@@ -214,6 +241,40 @@ class ReceiptItems(Base):
         return self.price * self.quantity
 
 
+class ReceiptDailyRollup(Base):
+    """
+    running per (user, day, payment type) aggregates of receipts,
+    kept up to date by ReceiptManager whenever receipts are created or deleted
+    """
+
+    __tablename__ = "receipt_daily_rollups"
+
+    user_id: Mapped[str] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    day: Mapped[date] = mapped_column(DATE, primary_key=True)
+    is_cashless_payment: Mapped[bool] = mapped_column(Boolean, primary_key=True)
+
+    receipts_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    items_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    revenue: Mapped[FormattedDecimal] = mapped_column(
+        FormattedDecimalType,
+        nullable=False,
+        default=0,
+    )
+    tendered_amount: Mapped[FormattedDecimal] = mapped_column(
+        FormattedDecimalType,
+        nullable=False,
+        default=0,
+    )
+    change_given: Mapped[FormattedDecimal] = mapped_column(
+        FormattedDecimalType,
+        nullable=False,
+        default=0,
+    )
+
+
 class TxtReceiptCache(Base):
     __tablename__ = "txt_receipt_cache"
 
@@ -221,7 +282,39 @@ class TxtReceiptCache(Base):
         ForeignKey("receipts.id", ondelete="CASCADE"),
         primary_key=True,
     )
-    config_str: Mapped[str] = mapped_column(String)
-    txt: Mapped[str] = mapped_column(String)
+    config_hash: Mapped[str] = mapped_column(String(16), primary_key=True)
+    width: Mapped[int] = mapped_column(Integer, primary_key=True)
+    txt: Mapped[bytes] = mapped_column(LargeBinary)
+    is_compressed: Mapped[bool] = mapped_column(Boolean, default=False)
 
     creation_date: Mapped[datetime] = mapped_column(DATETIME, default=datetime.now)
+    last_access_date: Mapped[datetime] = mapped_column(
+        DATETIME,
+        default=datetime.now,
+        index=True,
+    )
+
+    @property
+    def text(self) -> str:
+        raw_txt = decompress(self.txt) if self.is_compressed else self.txt
+        return raw_txt.decode("utf-8")
+
+
+class AnalyticsSketch(Base):
+    """
+    serialized probabilistic summary (see src.core.sketches) of some `kind`,
+    e.g. top items of a user (`scope`) within a month (`period`)
+    """
+
+    __tablename__ = "analytics_sketches"
+
+    kind: Mapped[str] = mapped_column(String(32), primary_key=True)
+    scope: Mapped[str] = mapped_column(String(255), primary_key=True)
+    period: Mapped[str] = mapped_column(String(10), primary_key=True)
+    payload: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+    update_date: Mapped[datetime] = mapped_column(
+        DATETIME,
+        default=datetime.now,
+        onupdate=datetime.now,
+    )
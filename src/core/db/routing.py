@@ -0,0 +1,97 @@
+from functools import wraps
+from time import time
+from typing import Callable, ParamSpec, Protocol, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from config import REPLICA_STICKINESS_SECONDS
+from src.core.cache import recent_writers
+
+Params = ParamSpec("Params")
+Result = TypeVar("Result")
+
+
+class RoutingPolicy(Protocol):
+    """decides whether read-only manager methods may run against replica"""
+
+    def allows_replica_for(self, session: Session) -> bool: ...
+
+
+class PrimaryOnly:
+    def allows_replica_for(self, session: Session) -> bool:
+        return False
+
+
+class ReadYourWrites:
+    """
+    replica, unless user the session works for (see bind_user_to()) has written
+    something within last REPLICA_STICKINESS_SECONDS, so nobody misses own changes
+    because of replication lag. Moment of the last write comes along with requests
+    (see src.api.security), hence holds whichever worker they reach; writes this very
+    process has committed are remembered too, for clients that don't keep cookies
+    """
+
+    def allows_replica_for(self, session: Session) -> bool:
+        user_id = session.info.get("user_id")
+        if user_id is None:
+            return True
+        if is_within_stickiness(session.info.get("last_written_at")):
+            return False
+        return recent_writers.get(user_id) is None
+
+
+def is_within_stickiness(last_written_at: float | None) -> bool:
+    """timestamps from the future are bogus ones, they don't count"""
+    if last_written_at is None:
+        return False
+    return 0 <= time() - last_written_at < REPLICA_STICKINESS_SECONDS
+
+
+def bind_user_to(
+    session: Session,
+    user_id: str,
+    last_written_at: float | None = None,
+) -> None:
+    session.info["user_id"] = user_id
+    session.info["last_written_at"] = last_written_at
+
+
+def read_only(method: Callable[Params, Result]) -> Callable[Params, Result]:
+    """marks manager method, which only reads, as one that may go to replica"""
+
+    @wraps(method)
+    def route_if_allowed(self, *args, **kwargs):
+        if not self.routing.allows_replica_for(self.session):
+            return method(self, *args, **kwargs)
+
+        was_routed = self.session.info.get("is_routed_to_replica", False)
+        self.session.info["is_routed_to_replica"] = True
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self.session.info["is_routed_to_replica"] = was_routed
+
+    return route_if_allowed
+
+
+def mark_as_recent_writer_in(session: Session, user_id: str) -> None:
+    session.info.setdefault("recent_writers", set()).add(user_id)
+
+
+@event.listens_for(Session, "after_flush")
+def remember_having_written(session: Session, flush_context) -> None:
+    session.info["has_written"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def start_stickiness_once_committed(session: Session) -> None:
+    session.info.pop("has_written", None)
+    for user_id in session.info.pop("recent_writers", ()):
+        recent_writers.put(user_id, True)
+
+
+@event.listens_for(Session, "after_rollback")
+def forget_writes_once_rolled_back(session: Session) -> None:
+    session.info.pop("has_written", None)
+    session.info.pop("recent_writers", None)
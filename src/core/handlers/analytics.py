@@ -0,0 +1,299 @@
+from asyncio import sleep, to_thread
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from logging import getLogger
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import DISTINCT_COUNT_MAX_DAYS, QUANTILES_MAX_MONTHS
+from src.core.db.base import FormattedDecimal
+from src.core.db.managers import AsyncAnalyticsSketchManager, AsyncSalesAnalyticsManager
+from src.core.sketches import (
+    EVERYONE,
+    HyperLogLog,
+    SpaceSaving,
+    TDigest,
+    build_day_period_of,
+    build_distinct_count_sketch,
+    build_month_period_of,
+    build_quantiles_sketch,
+    build_top_items_sketch,
+    pending_sketches,
+)
+
+logger = getLogger(__name__)
+
+
+async def summarize_user_sales_by(
+    granularity: str,
+    user_id: str,
+    filters: dict,
+    session: AsyncSession | None = None,
+) -> dict:
+    """filters are 'created_after' and 'created_before', same as for receipts listing"""
+    buckets = await AsyncSalesAnalyticsManager(session).summarize_sales_of(
+        user_id, granularity, filters
+    )
+
+    return {
+        "granularity": granularity,
+        "buckets": buckets,
+        "receipts": sum(bucket["receipts"] for bucket in buckets),
+        "revenue": FormattedDecimal(
+            sum((bucket["revenue"] for bucket in buckets), start=Decimal(0))
+        ),
+    }
+
+
+def find_month_bounds_of(month: date) -> tuple[datetime, datetime]:
+    """aka convert e.g date(2026, 12, 5) -> (2026-12-01 00:00, 2027-01-01 00:00)"""
+    first_day = month.replace(day=1)
+    next_month_first_day = (
+        first_day.replace(year=first_day.year + 1, month=1)
+        if first_day.month == 12
+        else first_day.replace(month=first_day.month + 1)
+    )
+    return (
+        datetime.combine(first_day, time.min),
+        datetime.combine(next_month_first_day, time.min),
+    )
+
+
+async def rank_user_top_items_by(
+    measure: str,
+    user_id: str,
+    month: date,
+    limit: int,
+    *,
+    is_exact: bool = False,
+    session: AsyncSession | None = None,
+) -> list[dict]:
+    """
+    measure is either 'quantity' or 'revenue'. By default answered from
+    Space-Saving sketch (checkpointed one + whatever this process hasn't checkpointed yet),
+    `is_exact` falls back to GROUP BY over receipt items, e.g. to verify the former
+    """
+    if is_exact:
+        created_after, created_before = find_month_bounds_of(month)
+        ranking = await AsyncSalesAnalyticsManager(session).rank_items_exactly(
+            user_id, measure, created_after, created_before, limit
+        )
+        return [row | {"max_error": Decimal(0)} for row in ranking]
+
+    key = (f"top_items_by_{measure}", user_id, build_month_period_of(month))
+    payload = await AsyncAnalyticsSketchManager(session).fetch_payload_of(*key)
+    sketch = SpaceSaving.from_bytes(payload) if payload else build_top_items_sketch()
+    pending_sketches.merge_pending_into(key, sketch)
+
+    return [
+        {
+            "name": name,
+            "value": Decimal(str(round(value, 2))),
+            "max_error": Decimal(str(round(error, 2))),
+        }
+        for name, value, error in sketch.top(limit)
+    ]
+
+
+def list_days_between(first_day: date, last_day: date) -> list[date]:
+    if first_day > last_day:
+        raise ValueError(f"Range can't start ({first_day}) after it ends ({last_day})")
+
+    days_count = (last_day - first_day).days + 1
+    if days_count > DISTINCT_COUNT_MAX_DAYS:
+        raise ValueError(
+            f"Range can't be longer than {DISTINCT_COUNT_MAX_DAYS} days, got {days_count}"
+        )
+
+    return [first_day + timedelta(days=offset) for offset in range(days_count)]
+
+
+async def estimate_distinct_count_of(
+    kind: str,
+    scope: str,
+    days: list[date],
+    session: AsyncSession | None = None,
+) -> int:
+    """
+    union of per-day HyperLogLogs, both checkpointed and not yet checkpointed ones,
+    merged in a worker thread so that a year of dense days doesn't block event loop
+    """
+    periods = [build_day_period_of(day) for day in days]
+    payloads = await AsyncAnalyticsSketchManager(session).fetch_payloads_of(
+        kind, scope, periods
+    )
+
+    def merge_and_count() -> int:
+        union = build_distinct_count_sketch()
+        for period in periods:
+            if payload := payloads.get(period):
+                union.merge(HyperLogLog.from_bytes(payload))
+            pending_sketches.merge_pending_into((kind, scope, period), union)
+        return union.count()
+
+    return await to_thread(merge_and_count)
+
+
+async def count_user_distinct_items_between(
+    first_day: date,
+    last_day: date,
+    user_id: str,
+    *,
+    is_exact: bool = False,
+    session: AsyncSession | None = None,
+) -> int:
+    days = list_days_between(first_day, last_day)
+    if is_exact:
+        return await AsyncSalesAnalyticsManager(session).count_distinct_items_exactly(
+            user_id,
+            datetime.combine(first_day, time.min),
+            datetime.combine(last_day + timedelta(days=1), time.min),
+        )
+
+    return await estimate_distinct_count_of("distinct_items", user_id, days, session)
+
+
+async def count_active_users_between(
+    first_day: date,
+    last_day: date,
+    *,
+    is_exact: bool = False,
+    session: AsyncSession | None = None,
+) -> int:
+    days = list_days_between(first_day, last_day)
+    if is_exact:
+        return await AsyncSalesAnalyticsManager(session).count_active_users_exactly(
+            datetime.combine(first_day, time.min),
+            datetime.combine(last_day + timedelta(days=1), time.min),
+        )
+
+    return await estimate_distinct_count_of("active_users", EVERYONE, days, session)
+
+
+def list_months_between(first_month: date, last_month: date) -> list[date]:
+    """aka convert e.g (date(2026, 11, 1), date(2027, 1, 1)) -> [2026-11-01, 2026-12-01, 2027-01-01]"""
+    if first_month > last_month:
+        raise ValueError(f"Range can't start ({first_month}) after it ends ({last_month})")
+
+    months_count = (
+        (last_month.year - first_month.year) * 12 + last_month.month - first_month.month + 1
+    )
+    if months_count > QUANTILES_MAX_MONTHS:
+        raise ValueError(
+            f"Range can't be longer than {QUANTILES_MAX_MONTHS} months, got {months_count}"
+        )
+
+    months = [first_month.replace(day=1)]
+    while len(months) < months_count:
+        months.append(find_month_bounds_of(months[-1])[1].date())
+    return months
+
+
+async def build_receipt_totals_digest_of(
+    scope: str,
+    first_month: date,
+    last_month: date,
+    session: AsyncSession | None = None,
+) -> TDigest:
+    periods = [
+        build_month_period_of(month)
+        for month in list_months_between(first_month, last_month)
+    ]
+    payloads = await AsyncAnalyticsSketchManager(session).fetch_payloads_of(
+        "receipt_totals", scope, periods
+    )
+
+    digest = build_quantiles_sketch()
+    for period in periods:
+        if payload := payloads.get(period):
+            digest.merge(TDigest.from_bytes(payload))
+        pending_sketches.merge_pending_into(("receipt_totals", scope, period), digest)
+
+    return digest
+
+
+def round_to_cents(value: float | None) -> Decimal | None:
+    return None if value is None else Decimal(str(round(value, 2)))
+
+
+async def estimate_receipt_total_quantiles(
+    quantiles: list[float],
+    scope: str,
+    first_month: date,
+    last_month: date,
+    session: AsyncSession | None = None,
+) -> dict:
+    """scope is either user id or EVERYONE"""
+    if not all(0 <= q <= 1 for q in quantiles):
+        raise ValueError(f"Quantiles have to be within [0, 1], got {quantiles}")
+
+    digest = await build_receipt_totals_digest_of(scope, first_month, last_month, session)
+
+    return {
+        "count": round(digest.count),
+        "min": round_to_cents(digest.min),
+        "max": round_to_cents(digest.max),
+        "quantiles": [
+            {"q": q, "value": round_to_cents(digest.quantile(q))} for q in quantiles
+        ],
+    }
+
+
+async def build_receipt_totals_histogram(
+    bins_count: int,
+    scope: str,
+    first_month: date,
+    last_month: date,
+    session: AsyncSession | None = None,
+) -> dict:
+    """`bins_count` bins of equal width between the smallest and the biggest total"""
+    digest = await build_receipt_totals_digest_of(scope, first_month, last_month, session)
+    if not digest.count:
+        return {"count": 0, "bins": []}
+
+    width = (digest.max - digest.min) / bins_count
+    bounds = [digest.min + width * index for index in range(bins_count)] + [digest.max]
+    shares = [0.0] + [digest.cdf(bound) for bound in bounds[1:-1]] + [1.0]
+    # cumulative counts are rounded rather than every bin on its own, so bins always add up to count
+    cumulative_counts = [round(digest.count * share) for share in shares]
+
+    return {
+        "count": cumulative_counts[-1],
+        "bins": [
+            {
+                "lower": round_to_cents(lower),
+                "upper": round_to_cents(upper),
+                "count": upper_count - lower_count,
+            }
+            for lower, upper, lower_count, upper_count in zip(
+                bounds, bounds[1:], cumulative_counts, cumulative_counts[1:]
+            )
+        ],
+    }
+
+
+async def checkpoint_pending_sketches() -> int:
+    """
+    merges every pending sketch into db one by one, each in its own transaction;
+    whatever wasn't checkpointed goes back to pending ones to be retried next time
+    """
+    drained = pending_sketches.drain()
+    checkpointed = 0
+    try:
+        for key, sketch in list(drained.items()):
+            await AsyncAnalyticsSketchManager().checkpoint(*key, sketch)
+            del drained[key]
+            checkpointed += 1
+    finally:
+        pending_sketches.restore(drained)
+
+    return checkpointed
+
+
+async def checkpoint_sketches_periodically(interval_seconds: float) -> None:
+    while True:
+        await sleep(interval_seconds)
+        try:
+            await checkpoint_pending_sketches()
+        except Exception:
+            logger.exception("Failed to checkpoint analytics sketches, will retry")
@@ -3,15 +3,19 @@ from hashlib import sha256
 from hmac import compare_digest
 
 from jwt import encode
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import CRYPTO_PEPPER, JWT_ALGORITHM, JWT_SECRET_KEY
 from src.core.db.managers import (
-    AccessManager,
-    DBAppConfigManager,
-    RoleManager,
-    UserManager,
+    AsyncAccessManager,
+    AsyncDBAppConfigManager,
+    AsyncRoleManager,
+    AsyncUserManager,
 )
-from src.core.utils import generate_alphanumerical_id
+from src.core.utils import generate_time_ordered_id
+
+# (method, root route) pairs every signed up user gets through "user" role
+BASIC_ACCESSES = (("GET", "receipts"), ("POST", "receipts"), ("GET", "analytics"))
 
 
 def hash_password(plain_password: str, salt: str) -> str:
@@ -28,9 +32,13 @@ def are_passwords_matching(
     return compare_digest(computed_hash, hash_from_db)
 
 
-def retrieve_data_depending_on(login: str, plain_password: str) -> str:
-    user_manager = UserManager()
-    user = user_manager.lookup_for_user_by(login)
+async def retrieve_data_depending_on(
+    login: str,
+    plain_password: str,
+    session: AsyncSession | None = None,
+) -> str:
+    user_manager = AsyncUserManager(session)
+    user = await user_manager.lookup_for_user_by(login)
     if user is None:
         raise LookupError(f"No such user [{login}] exists in db!")
 
@@ -40,9 +48,9 @@ def retrieve_data_depending_on(login: str, plain_password: str) -> str:
     return user.id
 
 
-def generate_jwt_token_for(user_id: str) -> str:
-    config = DBAppConfigManager()
-    expire = datetime.now() + timedelta(minutes=config["ACCESS_TOKEN_EXPIRE_MINUTES"])
+async def generate_jwt_token_for(user_id: str, session: AsyncSession | None = None) -> str:
+    config = AsyncDBAppConfigManager(session)
+    expire = datetime.now() + timedelta(minutes=await config["ACCESS_TOKEN_EXPIRE_MINUTES"])
 
     token = encode(
         payload={"sub": user_id, "exp": expire},
@@ -52,56 +60,69 @@ def generate_jwt_token_for(user_id: str) -> str:
     return token
 
 
-def obtain_jwt_token_for(login: str, plain_password: str) -> str:
-    user = retrieve_data_depending_on(login, plain_password)
-    return generate_jwt_token_for(user)
+async def obtain_jwt_token_for(
+    login: str,
+    plain_password: str,
+    session: AsyncSession | None = None,
+) -> str:
+    user = await retrieve_data_depending_on(login, plain_password, session)
+    return await generate_jwt_token_for(user, session)
 
 
-def grant_all_the_accesses_for(new_user_id: str):
-    admin_role_id = RoleManager().ensure_role_exists("admin")
+async def grant_all_the_accesses_for(new_user_id: str, session: AsyncSession | None = None):
+    role_manager = AsyncRoleManager(session)
+    admin_role_id = await role_manager.ensure_role_exists("admin")
 
-    RoleManager().assign(new_user_id, admin_role_id)
-    AccessManager().grant_unlimited_access_to(admin_role_id)
+    await role_manager.assign(new_user_id, admin_role_id)
+    await AsyncAccessManager(session).grant_unlimited_access_to(admin_role_id)
 
 
-def grant_basic_accesses_for(new_user_id: str):
-    user_role_id = RoleManager().ensure_role_exists("user")
+async def grant_basic_accesses_for(new_user_id: str, session: AsyncSession | None = None):
+    role_manager = AsyncRoleManager(session)
+    user_role_id = await role_manager.ensure_role_exists("user")
 
-    RoleManager().assign(new_user_id, user_role_id)
-    AccessManager().grant(user_role_id, permission_to_perform="GET", at="/receipts")
-    AccessManager().grant(user_role_id, permission_to_perform="POST", at="/receipts")
+    await role_manager.assign(new_user_id, user_role_id)
+    access_manager = AsyncAccessManager(session)
+    for method, root_route in BASIC_ACCESSES:
+        await access_manager.grant(user_role_id, permission_to_perform=method, at=root_route)
 
 
-def create_new_user_with_following(
+async def create_new_user_with_following(
     login: str,
     email: str,
     name: str,
     plain_password: str,
+    session: AsyncSession | None = None,
 ):
-    user_manager = UserManager()
-    is_user_already_exists = user_manager.lookup_for_user_by(login)
+    user_manager = AsyncUserManager(session)
+    is_user_already_exists = await user_manager.lookup_for_user_by(login)
     if is_user_already_exists:
         raise KeyError(f"User with such {login=} already exists!")
 
-    new_user_id = generate_alphanumerical_id()
+    new_user_id = generate_time_ordered_id()
     password_hash = hash_password(plain_password, new_user_id)
-    user_manager.create_new_user_using(new_user_id, login, name, email, password_hash)
+    await user_manager.create_new_user_using(new_user_id, login, name, email, password_hash)
 
-    is_first_user_ever = user_manager.fetch_total_user_count() < 0
+    is_first_user_ever = await user_manager.fetch_total_user_count() < 0
     if is_first_user_ever:
-        grant_all_the_accesses_for(new_user_id)
-    grant_basic_accesses_for(new_user_id)
+        await grant_all_the_accesses_for(new_user_id, session)
+    await grant_basic_accesses_for(new_user_id, session)
 
 
-def assign_existing_role_with(role_name: str, *, to: str) -> bool:
+async def assign_existing_role_with(
+    role_name: str,
+    *,
+    to: str,
+    session: AsyncSession | None = None,
+) -> bool:
     login = to
-    user = UserManager().lookup_for_user_by(login)
+    user = await AsyncUserManager(session).lookup_for_user_by(login)
     if user is None:
         raise LookupError(f"No such user [{login}] exists in db!")
 
-    role_manager = RoleManager()
-    role = role_manager.lookup_for_role_by(role_name)
+    role_manager = AsyncRoleManager(session)
+    role = await role_manager.lookup_for_role_by(role_name)
     if role is None:
         raise LookupError(f"No such role [{role_name}] exists in db!")
 
-    return role_manager.assign(user.id, role.id)
+    return await role_manager.assign(user.id, role.id)
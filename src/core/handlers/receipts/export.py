@@ -0,0 +1,119 @@
+from csv import writer
+from decimal import Decimal
+from io import StringIO
+from json import dumps
+from typing import AsyncIterator, Callable
+
+from config import EXPORT_PARTITION_SIZE
+from src.core.db.managers import AsyncReceiptManager
+from src.core.db.models import Receipt
+
+CSV_COLUMNS = (
+    "id",
+    "issuer",
+    "created_at",
+    "payment_type",
+    "is_cashless_payment",
+    "payment_amount",
+    "total",
+    "rest",
+    "items",
+)
+
+
+def format_amount(amount: Decimal) -> str:
+    """aka convert e.g FormattedDecimal('3000.0000') -> '3000.00', with no digit grouping str() adds"""
+    return f"{Decimal(amount):.2f}"
+
+
+def convert_to_export_repr(receipt: Receipt) -> dict:
+    """
+    same shape as convert_to_dict_repr(), which is meant for receipts.txt display though:
+    exported amounts have to stay machine-readable, so they are plain 2-place decimals
+    """
+    return {
+        "id": receipt.id,
+        "issuer": receipt.user.name,
+        "items": [
+            {
+                "name": item.name,
+                "price": format_amount(item.price),
+                "quantity": format_amount(item.quantity),
+                "total": format_amount(item.total),
+            }
+            for item in receipt.items
+        ],
+        "total": format_amount(receipt.total),
+        "payment": {
+            "is_cashless_payment": receipt.is_cashless_payment,
+            "type": "cashless" if receipt.is_cashless_payment else "cash",
+            "amount": format_amount(receipt.payment_amount),
+        },
+        "rest": format_amount(receipt.rest),
+        "created_at": receipt.creation_date.isoformat(),
+    }
+
+
+def convert_to_ndjson_lines(receipts: list[Receipt]) -> str:
+    return "".join(
+        dumps(convert_to_export_repr(receipt), ensure_ascii=False) + "\n"
+        for receipt in receipts
+    )
+
+
+def convert_to_csv_rows(receipts: list[Receipt]) -> str:
+    """one row per receipt, its items go into a single JSON-encoded column"""
+    buffer = StringIO()
+    csv_writer = writer(buffer)
+    for receipt in receipts:
+        receipt_repr = convert_to_export_repr(receipt)
+        csv_writer.writerow(
+            (
+                receipt_repr["id"],
+                receipt_repr["issuer"],
+                receipt_repr["created_at"],
+                receipt_repr["payment"]["type"],
+                receipt_repr["payment"]["is_cashless_payment"],
+                receipt_repr["payment"]["amount"],
+                receipt_repr["total"],
+                receipt_repr["rest"],
+                dumps(receipt_repr["items"], ensure_ascii=False),
+            )
+        )
+    return buffer.getvalue()
+
+
+def build_csv_header() -> str:
+    buffer = StringIO()
+    writer(buffer).writerow(CSV_COLUMNS)
+    return buffer.getvalue()
+
+
+async def stream_user_receipts_as(
+    export_format: str,
+    user_id: str,
+    filters: dict,
+    last_written_at: float | None = None,
+) -> AsyncIterator[str]:
+    """
+    same filters as retrieve_user_receipts_data() except pagination ones.
+    Opens its own session on purpose: response body is streamed
+    after the request-scoped one is already closed
+    """
+    serializers: dict[str, Callable[[list[Receipt]], str]] = {
+        "ndjson": convert_to_ndjson_lines,
+        "csv": convert_to_csv_rows,
+    }
+    serialize = serializers[export_format]
+
+    if export_format == "csv":
+        yield build_csv_header()
+
+    partitions = AsyncReceiptManager().stream_filtered_using(
+        user_id,
+        filters,
+        partition_size=EXPORT_PARTITION_SIZE,
+        last_written_at=last_written_at,
+    )
+    async for receipts in partitions:
+        yield serialize(receipts)
@@ -1,12 +1,45 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
 from datetime import datetime
 from decimal import Decimal
+from hashlib import blake2b
+from json import dumps
 from typing import Literal
 
-from src.core.db.managers import DBAppConfigManager, ReceiptCacheManager, ReceiptManager
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.cache import receipt_txt_memory_cache
+from src.core.db.managers import (
+    AsyncDBAppConfigManager,
+    AsyncReceiptCacheManager,
+    AsyncReceiptManager,
+)
 from src.core.db.models import Receipt
 from src.core.handlers.receipts.rendering import build_str_repr_of_receipt
 
 
+def encode_cursor_from(receipt: Receipt) -> str:
+    raw_cursor = f"{receipt.creation_date.isoformat()}|{receipt.id}"
+    return urlsafe_b64encode(raw_cursor.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    """aka convert opaque 'MjAyNS0wNS0xN1QyMjoxNTo0MnxhYmNkZWYxMjM0NTY' -> (creation_date, receipt_id)"""
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        raw_cursor = urlsafe_b64decode(cursor + padding).decode("utf-8")
+        creation_date, receipt_id = raw_cursor.split("|", 1)
+        return datetime.fromisoformat(creation_date), receipt_id
+    except (BinasciiError, UnicodeDecodeError, ValueError):
+        raise ValueError(f"Malformed pagination cursor: {cursor!r}")
+
+
+def build_hash_of(formatting_config: dict) -> str:
+    """aka compact fixed-length (16 hex chars) fingerprint of formatting config, order-insensitive"""
+    canonical_config = dumps(formatting_config, sort_keys=True, ensure_ascii=False)
+    return blake2b(canonical_config.encode("utf-8"), digest_size=8).hexdigest()
+
+
 def convert_to_dict_repr(receipt_raw_data: Receipt) -> dict[str, str]:
     items: list[dict[str, str]] = []
     for item in receipt_raw_data.items:
@@ -36,41 +69,60 @@ def convert_to_dict_repr(receipt_raw_data: Receipt) -> dict[str, str]:
     }
 
 
-def render_as_str_receipt_with(receipt_id: str, width: int) -> str:
-    receipt_manager = ReceiptManager()
-
-    receipt_raw_data: Receipt | None = receipt_manager.fetch_specific_by(receipt_id)
-    if receipt_raw_data is None:
-        raise KeyError(f"Receipt(id={receipt_id}) is not found in DB!")
-
+async def render_as_str_receipt_with(
+    receipt_id: str,
+    width: int,
+    session: AsyncSession | None = None,
+) -> str:
     formatting_config: dict[str, str | int] = (
-        DBAppConfigManager().fetch_receipt_formatting_configs()
+        await AsyncDBAppConfigManager(session).fetch_receipt_formatting_configs()
     )
 
-    config_string: str = ":".join(formatting_config.values()) + f":{width}"
+    config_hash = build_hash_of(formatting_config)
+
+    # two cache tiers: this process' memory first, shared db table next,
+    # and only when both missed the receipt itself is loaded and rendered
+    cache_key = (receipt_id, config_hash, width)
+    if cached_txt := receipt_txt_memory_cache.get(cache_key):
+        return cached_txt
 
-    cache = ReceiptCacheManager()
+    cache = AsyncReceiptCacheManager(session)
 
-    cached_txt = cache.fetch_cache_for(receipt_id, config_string)
-    if cached_txt:
+    if cached_txt := await cache.fetch_cache_for(receipt_id, config_hash, width):
+        receipt_txt_memory_cache.put(cache_key, cached_txt, size=len(cached_txt.encode()))
         return cached_txt
 
+    receipt_manager = AsyncReceiptManager(session)
+
+    receipt_raw_data: Receipt | None = await receipt_manager.fetch_including_items_for(
+        receipt_id
+    )
+    if receipt_raw_data is None:
+        raise KeyError(f"Receipt(id={receipt_id}) is not found in DB!")
+
     formatting_config["width"] = width
 
     rendered_receipt = build_str_repr_of_receipt(
         convert_to_dict_repr(receipt_raw_data),
         formatting_config,
     )
-    cache.create_new_entry_with(receipt_id, config_string, rendered_receipt)
+    await cache.create_new_entry_with(receipt_id, config_hash, width, rendered_receipt)
+    receipt_txt_memory_cache.put(
+        cache_key, rendered_receipt, size=len(rendered_receipt.encode())
+    )
 
     return rendered_receipt
 
 
-def retrieve_if_is_possible_to_look_data_for(receipt_id: str, using: str) -> dict:
+async def retrieve_if_is_possible_to_look_data_for(
+    receipt_id: str,
+    using: str,
+    session: AsyncSession | None = None,
+) -> dict:
     requester_user_id = using
-    receipt_manager = ReceiptManager()
+    receipt_manager = AsyncReceiptManager(session)
 
-    receipt: Receipt | None = receipt_manager.fetch_specific_by(receipt_id)
+    receipt: Receipt | None = await receipt_manager.fetch_including_items_for(receipt_id)
     if receipt is None:
         raise KeyError(f"Receipt with {receipt_id=} is not found!")
     if receipt.user_id != requester_user_id:
@@ -78,7 +130,10 @@ def retrieve_if_is_possible_to_look_data_for(receipt_id: str, using: str) -> dic
     return convert_to_dict_repr(receipt)
 
 
-def retrieve_user_receipts_data(filters: dict) -> tuple[int, list[dict]]:
+async def retrieve_user_receipts_data(
+    filters: dict,
+    session: AsyncSession | None = None,
+) -> tuple[int, list[dict], str | None]:
     """
     filters may contain:
       - user_id: str
@@ -95,11 +150,61 @@ def retrieve_user_receipts_data(filters: dict) -> tuple[int, list[dict]]:
     limit   = filters.pop("limit")
     offset  = filters.pop("offset")
 
-    total, receipts = ReceiptManager().filter_and_paginate_using(
+    total, receipts = await AsyncReceiptManager(session).filter_and_paginate_using(
         user_id,
         limit,
         offset,
         filters,
     )
 
-    return total, [convert_to_dict_repr(raw_receipt) for raw_receipt in receipts]
+    has_more = offset + len(receipts) < total
+    next_cursor = encode_cursor_from(receipts[-1]) if receipts and has_more else None
+
+    return (
+        total,
+        [convert_to_dict_repr(raw_receipt) for raw_receipt in receipts],
+        next_cursor,
+    )
+
+
+async def retrieve_user_receipts_page_after(
+    cursor: str | None,
+    filters: dict,
+    *,
+    with_total: bool = False,
+    session: AsyncSession | None = None,
+) -> tuple[int | None, list[dict], str | None]:
+    """
+    same filters as retrieve_user_receipts_data(), except 'offset':
+    page starts right after the receipt `cursor` points to
+    and costs the same no matter how deep client has scrolled.
+    Counting all the matching receipts is the only part that does not,
+    so it is done only when explicitly asked for.
+    """
+
+    user_id = filters.pop("user_id")
+    limit   = filters.pop("limit")
+
+    receipt_manager = AsyncReceiptManager(session)
+    receipts = await receipt_manager.filter_and_paginate_after(
+        user_id,
+        limit + 1,
+        decode_cursor(cursor) if cursor else None,
+        filters,
+    )
+
+    has_more = len(receipts) > limit
+    receipts = receipts[:limit]
+    next_cursor = encode_cursor_from(receipts[-1]) if has_more else None
+
+    total = (
+        await receipt_manager.count_filtered_using(user_id, filters)
+        if with_total
+        else None
+    )
+
+    return (
+        total,
+        [convert_to_dict_repr(raw_receipt) for raw_receipt in receipts],
+        next_cursor,
+    )
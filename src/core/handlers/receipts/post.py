@@ -1,12 +1,15 @@
 from decimal import Decimal
 
-from src.core.db.managers import ReceiptManager
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.db.managers import AsyncReceiptManager
 from src.core.db.models import Receipt
 
 
-def store_receipt_by(
+async def store_receipt_by(
     receipt_data,
     user_id: str,
+    session: AsyncSession | None = None,
 ) -> Receipt:
     items_payload = [
         {
@@ -20,7 +23,7 @@ def store_receipt_by(
     payment_type = receipt_data.payment.is_cashless_payment
     payment_amount: Decimal = receipt_data.payment.amount
 
-    new_receipt = ReceiptManager().create_receipt(
+    new_receipt = await AsyncReceiptManager(session).create_receipt(
         user_id=user_id,
         items=items_payload,
         is_cashless_payment=payment_type,
@@ -28,3 +31,45 @@ def store_receipt_by(
     )
 
     return new_receipt
+
+
+def ensure_whole_batch_is_valid(receipts_data: list) -> None:
+    """batch is stored all-or-nothing, so it's checked in full before anything hits db"""
+    empty_receipts = [
+        str(position)
+        for position, receipt_data in enumerate(receipts_data)
+        if not receipt_data.products
+    ]
+    if empty_receipts:
+        raise ValueError(
+            f"Receipts at positions [{', '.join(empty_receipts)}] have no products!"
+        )
+
+
+async def store_receipts_batch_by(
+    receipts_data: list,
+    user_id: str,
+    session: AsyncSession | None = None,
+) -> list[dict]:
+    ensure_whole_batch_is_valid(receipts_data)
+
+    receipts_payload = [
+        {
+            "items": [
+                {
+                    "name": prod.name,
+                    "price": prod.price,
+                    "quantity": prod.quantity,
+                }
+                for prod in receipt_data.products
+            ],
+            "is_cashless_payment": receipt_data.payment.is_cashless_payment,
+            "payment_amount": receipt_data.payment.amount,
+        }
+        for receipt_data in receipts_data
+    ]
+
+    return await AsyncReceiptManager(session).create_receipts_in_bulk(
+        user_id=user_id,
+        receipts=receipts_payload,
+    )
@@ -1,29 +1,113 @@
+from functools import cache
 from pathlib import Path
+from textwrap import wrap
 
 from jinja2 import Environment, FileSystemLoader, Template, select_autoescape
 
+from config import RECEIPT_FAST_RENDERER, TEMPLATES_AUTO_RELOAD
 
-def load_template_from(template_path: str | Path | None = None) -> Template:
-    if template_path is None:
-        template_path = (
-            Path(__file__).resolve().parents[4] / "templates" / "receipt.txt.jinja2"
-        )
-    template_path = Path(template_path)
+DEFAULT_TEMPLATE_PATH = (
+    Path(__file__).resolve().parents[4] / "templates" / "receipt.txt.jinja2"
+)
 
-    env = Environment(
-        loader=FileSystemLoader(str(template_path.parent)),
+
+@cache
+def build_environment_for(templates_dir: str) -> Environment:
+    """
+    one Environment per templates directory for the whole process:
+    Environment keeps compiled templates in its own cache, and with
+    TEMPLATES_AUTO_RELOAD it recompiles one as soon as its file mtime changes
+    """
+    return Environment(
+        loader=FileSystemLoader(templates_dir),
         autoescape=select_autoescape([]),
         trim_blocks=True,
         lstrip_blocks=True,
+        auto_reload=TEMPLATES_AUTO_RELOAD,
     )
+
+
+def load_template_from(template_path: str | Path | None = None) -> Template:
+    if template_path is None:
+        template_path = DEFAULT_TEMPLATE_PATH
+    template_path = Path(template_path)
+
+    env = build_environment_for(str(template_path.parent))
     return env.get_template(template_path.name)
 
 
+def wrap_like_jinja(text: str, width: int) -> list[str]:
+    """same lines jinja's `wordwrap(width, break_long_words=True)` + split("\\n") produce"""
+    wrapped = "\n".join(
+        "\n".join(
+            wrap(
+                line,
+                width=width,
+                expand_tabs=False,
+                replace_whitespace=False,
+                break_long_words=True,
+                break_on_hyphens=True,
+            )
+        )
+        for line in text.splitlines()
+    )
+    return wrapped.split("\n")
+
+
+def render_default_layout(receipt_data: dict, formatting_config: dict) -> str:
+    """
+    pure-Python twin of templates/receipt.txt.jinja2 for bulk printing:
+    produces exactly the same text, skipping template machinery altogether.
+    Has to be kept in sync with the template by hand!
+    """
+    context = formatting_config | receipt_data
+    width = context["width"]
+    delimiter_line = context["delimiter"] * width
+
+    lines = [context["issuer"].center(width), delimiter_line]
+
+    items = context["items"]
+    for position, item in enumerate(items, start=1):
+        item_total = item["total"]
+        lines.append(str(item["quantity"]) + " x " + str(item["price"]))
+
+        name_lines = wrap_like_jinja(item["name"], width - len(item_total) + 1)
+        lines.extend(name_lines[:-1])
+        last_line = name_lines[-1]
+        lines.append(last_line + item_total.rjust(width - len(last_line)))
+
+        is_last_item = position == len(items)
+        lines.append(delimiter_line if is_last_item else context["separator"] * width)
+
+    total_label = context["total_label"]
+    lines.append(total_label + context["total"].rjust(width - len(total_label)))
+
+    payment = context["payment"]
+    pay_label = (
+        context["cash_label"]
+        if payment.get("type") == "cash"
+        else context["cashless_label"]
+    )
+    lines.append(pay_label + payment["amount"].rjust(width - len(pay_label)))
+
+    rest_label = context["rest_label"]
+    lines.append(rest_label + context["rest"].rjust(width - len(rest_label)))
+
+    lines.append(delimiter_line)
+    lines.append(context["created_at"].strftime(context["datetime_format"]).center(width))
+    lines.append(context["thank_you_note"].center(width))
+
+    return "\n".join(lines)
+
+
 def build_str_repr_of_receipt(
     receipt_data: dict,
     formatting_config: dict,
     template_path: str | Path | None = None,
 ) -> str:
+    if template_path is None and RECEIPT_FAST_RENDERER:
+        return render_default_layout(receipt_data, formatting_config)
+
     template = load_template_from(template_path)
     context = formatting_config | receipt_data
     return template.render(**context)
@@ -0,0 +1,391 @@
+"""
+synthetic users and receipts in production-like volumes (see `python -m src.cli seed`),
+loaded straight through DBAPI cursor: Postgres COPY, batched executemany elsewhere
+"""
+
+from csv import writer
+from datetime import date, datetime, time, timedelta
+from io import StringIO
+from itertools import accumulate
+from random import Random
+from typing import Callable, Iterator, Sequence
+
+from sqlalchemy import Connection, Engine, insert
+from sqlalchemy.orm import Session
+
+from src.core.db.managers import AccessManager, RoleManager
+from src.core.db.models import (
+    Receipt,
+    ReceiptDailyRollup,
+    ReceiptItems,
+    User,
+    UsersRoles,
+)
+from src.core.handlers.auth import BASIC_ACCESSES, hash_password
+from src.core.utils import CROCKFORD_BASE32_PAIRS, RANDOM_BITS, encode_time_ordered_id
+
+Row = tuple
+BulkLoader = Callable[[Connection, str, Sequence[str], list[Row]], None]
+
+USER_COLUMNS = ("id", "login", "email", "name", "password_hash")
+RECEIPT_COLUMNS = (
+    "id",
+    "user_id",
+    "is_cashless_payment",
+    "payment_amount",
+    "total",
+    "creation_date",
+)
+ITEM_COLUMNS = ("id", "receipt_id", "name", "price", "quantity")
+ROLLUP_COLUMNS = (
+    "user_id",
+    "day",
+    "is_cashless_payment",
+    "receipts_count",
+    "items_count",
+    "revenue",
+    "tendered_amount",
+    "change_given",
+)
+
+# (name, price in cents), most popular first
+PRODUCTS = (
+    ("Хліб пшеничний", 2_890),
+    ("Молоко 2.5% 900г", 4_290),
+    ("Вода мінеральна 1.5л", 2_150),
+    ("Яйця курячі 10шт", 6_790),
+    ("Банани, кг", 6_490),
+    ("Кава мелена 250г", 18_900),
+    ("Сир твердий, кг", 39_900),
+    ("Пакет", 250),
+    ("Цукор 1кг", 3_990),
+    ("Олія соняшникова 1л", 7_490),
+    ("Гречка 1кг", 5_690),
+    ("Ковбаса варена, кг", 28_900),
+    ("Шоколад чорний 90г", 5_390),
+    ("Чай чорний 100г", 8_990),
+    ("Пральний порошок 3кг", 32_900),
+    ("Батарейки AA 4шт", 14_900),
+    ("Зубна паста", 7_990),
+    ("Mavic 3T", 29_887_000),
+    ("Дрон FPV з акумулятором 6S чорний", 3_100_000),
+    ("Навушники бездротові", 129_900),
+)
+# pieces of a product on a receipt, mostly just one
+QUANTITY_WEIGHTS = {1: 80, 2: 5, 3: 5, 4: 5, 5: 5}
+FIRST_NAMES = ("Борис", "Олена", "Danylo", "Ірина", "Taras", "Марія", "Illia", "Софія")
+LAST_NAMES = ("Джонсонюк", "Коваленко", "Avdiienko", "Шевченко", "Бондар", "Melnyk")
+ITEMS_PER_RECEIPT_WEIGHTS = (30, 25, 15, 10, 8, 5, 4, 3)
+CASHLESS_SHARE = 0.7
+CASH_ROUNDINGS = (100, 1_000, 5_000, 10_000, 50_000)  # in cents
+MS_PER_DAY = 86_400_000
+# receipt id is 5 pairs of time, 7 random pairs and a pair numbering items, "00" for receipt itself
+RANDOM_PAIRS_PER_ID = 7
+
+
+def format_cents(cents: int) -> str:
+    """
+    aka convert e.g 123456 -> '1234.56', way cheaper than going through Decimal.
+    Still exact, DECIMAL(10, 2) amounts are far below where floats lose a cent
+    """
+    return f"{cents / 100:.2f}"
+
+
+# every (product, quantity) pair precomputed as (name, price, quantity, line total in cents)
+ITEM_VARIANTS = tuple(
+    (name, format_cents(price_cents), quantity, price_cents * quantity)
+    for name, price_cents in PRODUCTS
+    for quantity in QUANTITY_WEIGHTS
+)
+# Zipf-like popularity of products, independent of quantity
+ITEM_VARIANTS_CUM_WEIGHTS = tuple(
+    accumulate(
+        quantity_weight / rank
+        for rank in range(1, len(PRODUCTS) + 1)
+        for quantity_weight in QUANTITY_WEIGHTS.values()
+    )
+)
+TIMES_OF_DAY = tuple(
+    f"{hours:02}:{minutes:02}:{seconds:02}"
+    for hours in range(24)
+    for minutes in range(60)
+    for seconds in range(60)
+)
+
+
+class SyntheticDataGenerator:
+    """
+    same seed (and `until`) produces the very same rows every time.
+    Receipts are generated in chronological order and their ids are time-ordered,
+    just like ones ReceiptManager creates; items of a receipt get consecutive ids.
+    Few users make most of the receipts, popular products make most of the items.
+    Daily rollups of generated receipts are summed up along the way
+    """
+
+    def __init__(
+        self,
+        seed: int,
+        users_count: int,
+        receipts_count: int,
+        days: int,
+        until: date,
+        password: str,
+    ):
+        self.rng = Random(seed)
+        self.seed = seed
+        self.users_count = users_count
+        self.receipts_count = receipts_count
+        self.days = days
+        self.password = password
+
+        self.ends_at = datetime.combine(until, time())
+        self.starts_at = self.ends_at - timedelta(days=days)
+
+        self.user_ids: list[str] = []
+        self._users_cum_weights: list[float] = []
+        self._items_cum_weights = list(accumulate(ITEMS_PER_RECEIPT_WEIGHTS))
+        # (user_id, day, is_cashless_payment) -> [receipts, items, revenue, tendered, change], in cents
+        self._daily_rollups: dict[tuple[str, str, bool], list[int]] = {}
+
+    def generate_users(self) -> list[Row]:
+        started_at_ms = int(self.starts_at.timestamp() * 1000)
+        users = []
+        for number in range(self.users_count):
+            user_id = encode_time_ordered_id(
+                started_at_ms - self.users_count + number,
+                self.rng.getrandbits(RANDOM_BITS),
+            )
+            login = f"seed{self.seed}u{number}"
+            name = f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+            users.append(
+                (
+                    user_id,
+                    login,
+                    f"{login}@example.com",
+                    name,
+                    hash_password(self.password, user_id),
+                )
+            )
+
+        self.user_ids = [user[0] for user in users]
+        self._users_cum_weights = list(
+            accumulate(self.rng.paretovariate(1.2) for _ in range(self.users_count))
+        )
+        return users
+
+    def generate_receipts_in_batches(
+        self, batch_size: int
+    ) -> Iterator[tuple[list[Row], list[Row]]]:
+        """
+        yields (receipts, items) rows, every batch covering its own slice of time.
+        Everything random is drawn for the whole batch at once, so that the loop below
+        is left with lookups and string concatenation only
+        """
+        rng = self.rng
+        pairs = CROCKFORD_BASE32_PAIRS
+        window_ms = self.days * MS_PER_DAY
+        started_at_ms = int(self.starts_at.timestamp() * 1000)
+        days = [
+            (self.starts_at.date() + timedelta(days=day)).isoformat()
+            for day in range(self.days + 1)
+        ]
+        rollups = self._daily_rollups
+        time_prefix_of = {}
+
+        for batch_start in range(0, self.receipts_count, batch_size):
+            size = min(batch_size, self.receipts_count - batch_start)
+            slice_start = window_ms * batch_start // self.receipts_count
+            slice_ms = window_ms * size / self.receipts_count
+
+            offsets_ms = sorted([int(slice_start + rng.random() * slice_ms) for _ in range(size)])
+            owners = rng.choices(self.user_ids, cum_weights=self._users_cum_weights, k=size)
+            items_counts = rng.choices(
+                range(1, len(ITEMS_PER_RECEIPT_WEIGHTS) + 1),
+                cum_weights=self._items_cum_weights,
+                k=size,
+            )
+            variants = rng.choices(
+                ITEM_VARIANTS, cum_weights=ITEM_VARIANTS_CUM_WEIGHTS, k=sum(items_counts)
+            )
+            random_pairs = rng.choices(pairs, k=RANDOM_PAIRS_PER_ID * size)
+            are_cashless = rng.choices((True, False), cum_weights=(CASHLESS_SHARE, 1), k=size)
+            roundings = rng.choices(CASH_ROUNDINGS, k=size)
+
+            receipts, items = [], []
+            position = 0
+            for number, (offset_ms, user_id, items_count, is_cashless_payment, rounding) in enumerate(
+                zip(offsets_ms, owners, items_counts, are_cashless, roundings)
+            ):
+                moment_ms = started_at_ms + offset_ms
+                # upper 3 pairs of time change once in ~17 minutes
+                time_prefix = time_prefix_of.get(moment_ms >> 20)
+                if time_prefix is None:
+                    time_prefix_of.clear()
+                    time_prefix = time_prefix_of[moment_ms >> 20] = (
+                        pairs[moment_ms >> 40] + pairs[moment_ms >> 30 & 1023] + pairs[moment_ms >> 20 & 1023]
+                    )
+                random_start = number * RANDOM_PAIRS_PER_ID
+                id_prefix = (
+                    time_prefix
+                    + pairs[moment_ms >> 10 & 1023]
+                    + pairs[moment_ms & 1023]
+                    + "".join(random_pairs[random_start:random_start + RANDOM_PAIRS_PER_ID])
+                )
+                receipt_id = id_prefix + "00"
+
+                total_cents = 0
+                for item_number in range(1, items_count + 1):
+                    name, price, quantity, line_cents = variants[position]
+                    position += 1
+                    total_cents += line_cents
+                    items.append((id_prefix + pairs[item_number], receipt_id, name, price, quantity))
+
+                paid_cents = total_cents
+                if not is_cashless_payment:
+                    paid_cents = -(-total_cents // rounding) * rounding
+
+                day_index, ms_of_day = divmod(offset_ms, MS_PER_DAY)
+                seconds, ms = divmod(ms_of_day, 1000)
+                day = days[day_index]
+                receipts.append(
+                    (
+                        receipt_id,
+                        user_id,
+                        is_cashless_payment,
+                        format_cents(paid_cents),
+                        format_cents(total_cents),
+                        f"{day} {TIMES_OF_DAY[seconds]}.{ms:03}000",
+                    )
+                )
+
+                rollup = rollups.get((user_id, day, is_cashless_payment))
+                if rollup is None:
+                    rollup = rollups[(user_id, day, is_cashless_payment)] = [0, 0, 0, 0, 0]
+                rollup[0] += 1
+                rollup[1] += items_count
+                rollup[2] += total_cents
+                rollup[3] += paid_cents
+                rollup[4] += paid_cents - total_cents
+            yield receipts, items
+
+    def generate_daily_rollups(self) -> list[Row]:
+        """of every receipt generated so far, see ReceiptDailyRollupManager.rebuild_for()"""
+        return [
+            (
+                user_id,
+                day,
+                is_cashless_payment,
+                receipts_count,
+                items_count,
+                format_cents(revenue),
+                format_cents(tendered_amount),
+                format_cents(change_given),
+            )
+            for (user_id, day, is_cashless_payment), (
+                receipts_count,
+                items_count,
+                revenue,
+                tendered_amount,
+                change_given,
+            ) in self._daily_rollups.items()
+        ]
+
+
+def copy_rows_into(
+    connection: Connection, table: str, columns: Sequence[str], rows: list[Row]
+) -> None:
+    buffer = StringIO()
+    writer(buffer).writerows(rows)
+    buffer.seek(0)
+    with connection.connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+
+
+def execute_many_into(
+    connection: Connection, table: str, columns: Sequence[str], rows: list[Row]
+) -> None:
+    placeholders = ", ".join("?" for _ in columns)
+    connection.connection.cursor().executemany(
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows
+    )
+
+
+def insert_rows_into(
+    connection: Connection, table: str, columns: Sequence[str], rows: list[Row]
+) -> None:
+    """portable, hence slowest one, for dialects with no dedicated loader"""
+    models = {
+        "users": User,
+        "receipts": Receipt,
+        "receipt_items": ReceiptItems,
+        "receipt_daily_rollups": ReceiptDailyRollup,
+    }
+    connection.execute(
+        insert(models[table]), [dict(zip(columns, row)) for row in rows]
+    )
+
+
+def pick_bulk_loader_for(dialect_name: str) -> BulkLoader:
+    loaders = {
+        "postgresql": copy_rows_into,
+        "sqlite": execute_many_into,
+    }
+    return loaders.get(dialect_name, insert_rows_into)
+
+
+def seed_synthetic_data_using(
+    engine: Engine,
+    generator: SyntheticDataGenerator,
+    batch_size: int,
+    on_batch_loaded: Callable[[int], None] | None = None,
+) -> dict[str, int]:
+    """
+    everything goes in within a single transaction. Secondary indexes of receipts and
+    receipt_items are dropped first and built once at the very end, which is way cheaper
+    than keeping them up to date row by row. Seeded users are brand new ones,
+    so their daily rollups are just the ones generator has summed up
+    """
+    deferred_indexes = [*Receipt.__table__.indexes, *ReceiptItems.__table__.indexes]
+    load = pick_bulk_loader_for(engine.dialect.name)
+    receipts_loaded = items_loaded = 0
+
+    with engine.begin() as connection:
+        for index in deferred_indexes:
+            index.drop(connection, checkfirst=True)
+
+        users = generator.generate_users()
+        load(connection, "users", USER_COLUMNS, users)
+        with Session(bind=connection) as session:
+            user_role_id = RoleManager(session).ensure_role_exists("user")
+            # same accesses signup grants, so seeded users can go through the API right away
+            for method, root_route in BASIC_ACCESSES:
+                AccessManager(session).ensure_granted(
+                    user_role_id, permission_to_perform=method, at=root_route
+                )
+        connection.execute(
+            insert(UsersRoles),
+            [{"user_id": user[0], "role_id": user_role_id} for user in users],
+        )
+
+        for receipts, items in generator.generate_receipts_in_batches(batch_size):
+            load(connection, "receipts", RECEIPT_COLUMNS, receipts)
+            load(connection, "receipt_items", ITEM_COLUMNS, items)
+            receipts_loaded += len(receipts)
+            items_loaded += len(items)
+            if on_batch_loaded is not None:
+                on_batch_loaded(receipts_loaded)
+
+        rollups = generator.generate_daily_rollups()
+        load(connection, "receipt_daily_rollups", ROLLUP_COLUMNS, rollups)
+        for index in deferred_indexes:
+            index.create(connection)
+        connection.exec_driver_sql("ANALYZE")
+
+    return {
+        "users": len(users),
+        "receipts": receipts_loaded,
+        "items": items_loaded,
+        "rollups": len(rollups),
+    }
@@ -0,0 +1,495 @@
+from collections import Counter
+from datetime import date, datetime
+from functools import cache
+from hashlib import blake2b
+from json import dumps, loads
+from math import asin, log, pi, sin
+from threading import Lock
+from typing import Callable, Hashable, Protocol, Self
+
+from config import (
+    DISTINCT_COUNT_PRECISION,
+    QUANTILES_COMPRESSION,
+    TOP_ITEMS_SKETCH_CAPACITY,
+)
+
+
+class Sketch(Protocol):
+    """fixed-size summary of a stream, which can be merged with other summary of same kind"""
+
+    def merge(self, other: Self) -> None: ...
+
+    def to_bytes(self) -> bytes: ...
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> Self: ...
+
+
+class SpaceSaving:
+    """
+    heavy hitters of a weighted stream within `capacity` counters
+    (Metwally et al., merged as in Agarwal et al. "Mergeable summaries").
+    Every tracked count overestimates real one by no more than its error,
+    and any key heavier than total weight / capacity is guaranteed to be tracked
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        # key -> [count, error]
+        self._counters: dict[str, list[float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+    def update(self, key: str, weight: float = 1.0) -> None:
+        if key in self._counters:
+            self._counters[key][0] += weight
+            return
+
+        if len(self._counters) < self.capacity:
+            self._counters[key] = [weight, 0.0]
+            return
+
+        lightest_key = min(self._counters, key=lambda k: self._counters[k][0])
+        lightest_count, _ = self._counters.pop(lightest_key)
+        self._counters[key] = [lightest_count + weight, lightest_count]
+
+    def merge(self, other: "SpaceSaving") -> None:
+        own_floor = self._floor()
+        other_floor = other._floor()
+
+        merged: dict[str, list[float]] = {}
+        for key in self._counters.keys() | other._counters.keys():
+            own_count, own_error = self._counters.get(key, (own_floor, own_floor))
+            other_count, other_error = other._counters.get(key, (other_floor, other_floor))
+            merged[key] = [own_count + other_count, own_error + other_error]
+
+        heaviest = sorted(merged.items(), key=lambda item: item[1][0], reverse=True)
+        self._counters = dict(heaviest[: self.capacity])
+
+    def top(self, n: int) -> list[tuple[str, float, float]]:
+        """aka n heaviest keys as (key, estimated count, max overestimation)"""
+        heaviest = sorted(self._counters.items(), key=lambda item: item[1][0], reverse=True)
+        return [(key, count, error) for key, (count, error) in heaviest[:n]]
+
+    def to_bytes(self) -> bytes:
+        return dumps(
+            {"capacity": self.capacity, "counters": self._counters},
+            ensure_ascii=False,
+        ).encode("utf-8")
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> "SpaceSaving":
+        raw_sketch = loads(payload.decode("utf-8"))
+        sketch = cls(raw_sketch["capacity"])
+        sketch._counters = raw_sketch["counters"]
+        return sketch
+
+    def _floor(self) -> float:
+        """weight any untracked key might have had, 0 until every counter is taken"""
+        if len(self._counters) < self.capacity:
+            return 0.0
+        return min(count for count, _ in self._counters.values())
+
+
+class HyperLogLog:
+    """
+    approximate number of distinct values seen, within 2^precision one-byte registers;
+    standard error is 1.04 / sqrt(2^precision), i.e. ~0.8% for precision of 14.
+    Merging is register-wise max, so union of e.g. per-day sketches is exactly
+    what a single sketch fed with values of all those days would be.
+    Sketches start sparse (as in HLL++), keeping only registers that were ever raised,
+    and go dense once those take more than 1/SPARSE_SHARE of all the registers
+    """
+
+    HASH_BITS = 64
+    SPARSE_SHARE = 32
+    # first byte of payload, next to precision, telling sparse payloads from dense ones
+    SPARSE_FLAG = 0x80
+    # every sparse register is stored as (index << RANK_BITS | rank) in SPARSE_ENTRY_BYTES
+    RANK_BITS = 7
+    SPARSE_ENTRY_BYTES = 4
+
+    def __init__(self, precision: int):
+        self.precision = precision
+        # index -> rank while sparse, None once registers are dense
+        self._sparse: dict[int, int] | None = {}
+        self._registers = bytearray()
+
+    def add(self, value: str) -> None:
+        hashed = int.from_bytes(
+            blake2b(value.encode("utf-8"), digest_size=self.HASH_BITS // 8).digest(),
+            "big",
+        )
+        rest_bits = self.HASH_BITS - self.precision
+        index = hashed >> rest_bits
+        rest = hashed & ((1 << rest_bits) - 1)
+        self._raise_register(index, rest_bits - rest.bit_length() + 1)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.precision != self.precision:
+            raise ValueError(
+                f"Can't merge HyperLogLog of precision {other.precision} into {self.precision}"
+            )
+
+        if other._sparse is not None:
+            for index, rank in other._sparse.items():
+                self._raise_register(index, rank)
+            return
+
+        self._densify()
+        self._registers = merge_registers(self._registers, other._registers)
+
+    def count(self) -> int:
+        registers_count = 1 << self.precision
+        if self._sparse is not None:
+            ranks_counts = Counter(self._sparse.values())
+            ranks_counts[0] = registers_count - len(self._sparse)
+        else:
+            ranks_counts = {
+                rank: self._registers.count(rank)
+                for rank in range(self.HASH_BITS - self.precision + 2)
+            }
+
+        alpha = 0.7213 / (1 + 1.079 / registers_count)
+        estimate = (
+            alpha
+            * registers_count**2
+            / sum(count * 2.0**-rank for rank, count in ranks_counts.items())
+        )
+
+        # small cardinalities are way more precise with linear counting
+        empty_registers = ranks_counts[0]
+        if estimate <= 2.5 * registers_count and empty_registers:
+            estimate = registers_count * log(registers_count / empty_registers)
+
+        return round(estimate)
+
+    def to_bytes(self) -> bytes:
+        if self._sparse is None:
+            return bytes([self.precision]) + bytes(self._registers)
+
+        return bytes([self.precision | self.SPARSE_FLAG]) + b"".join(
+            (index << self.RANK_BITS | rank).to_bytes(self.SPARSE_ENTRY_BYTES, "big")
+            for index, rank in sorted(self._sparse.items())
+        )
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> "HyperLogLog":
+        sketch = cls(payload[0] & ~cls.SPARSE_FLAG)
+        if not payload[0] & cls.SPARSE_FLAG:
+            sketch._sparse = None
+            sketch._registers = bytearray(payload[1:])
+            return sketch
+
+        rank_mask = (1 << cls.RANK_BITS) - 1
+        for start in range(1, len(payload), cls.SPARSE_ENTRY_BYTES):
+            entry = int.from_bytes(payload[start : start + cls.SPARSE_ENTRY_BYTES], "big")
+            sketch._sparse[entry >> cls.RANK_BITS] = entry & rank_mask
+        return sketch
+
+    def _raise_register(self, index: int, rank: int) -> None:
+        if self._sparse is None:
+            if rank > self._registers[index]:
+                self._registers[index] = rank
+            return
+
+        if rank > self._sparse.get(index, 0):
+            self._sparse[index] = rank
+            if len(self._sparse) > (1 << self.precision) // self.SPARSE_SHARE:
+                self._densify()
+
+    def _densify(self) -> None:
+        if self._sparse is None:
+            return
+        self._registers = bytearray(1 << self.precision)
+        for index, rank in self._sparse.items():
+            self._registers[index] = rank
+        self._sparse = None
+
+
+@cache
+def build_high_bits_of(size: int) -> int:
+    """aka convert e.g 2 -> 0x8080, highest bit of every byte"""
+    return int.from_bytes(b"\x80" * size, "little")
+
+
+def merge_registers(own: bytearray, other: bytearray) -> bytearray:
+    """
+    byte-wise max of two equally long registers, all bytes being below 0x80, taken
+    on them as on two big ints at once (SWAR) rather than byte by byte in Python.
+    Within every byte 0x80 + own - other can't borrow from the next one,
+    and keeps its highest bit exactly where own >= other
+    """
+    high_bits = build_high_bits_of(len(own))
+    own_number = int.from_bytes(own, "little")
+    other_number = int.from_bytes(other, "little")
+    is_own_bigger = ((own_number | high_bits) - other_number) & high_bits
+    own_mask = (is_own_bigger >> 7) * 0xFF
+    merged = (own_number & own_mask) | (other_number & ~own_mask)
+    return bytearray(merged.to_bytes(len(own), "little"))
+
+
+class TDigest:
+    """
+    merging t-digest (Dunning & Ertl): distribution of a stream as at most ~`compression`
+    weighted centroids, smaller towards both tails, so extreme quantiles stay precise.
+    Digests of different periods merge into the digest of their union
+    """
+
+    def __init__(self, compression: int):
+        self.compression = compression
+        self.count: float = 0
+        self.min: float | None = None
+        self.max: float | None = None
+        # [mean, weight], sorted by mean after every _compress()
+        self._centroids: list[list[float]] = []
+        self._buffer: list[list[float]] = []
+
+    def add(self, value: float, weight: float = 1.0) -> None:
+        self._buffer.append([value, weight])
+        self.count += weight
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if len(self._buffer) >= 5 * self.compression:
+            self._compress()
+
+    def merge(self, other: "TDigest") -> None:
+        other._compress()
+        for mean, weight in other._centroids:
+            self._buffer.append([mean, weight])
+        if other.count:
+            self.count += other.count
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        self._compress()
+
+    def quantile(self, q: float) -> float | None:
+        """aka value below which `q` (0..1) of the stream lies, None for empty digest"""
+        self._compress()
+        if not self._centroids:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+
+        target = q * self.count
+        first_mean, first_weight = self._centroids[0]
+        if target < first_weight / 2:
+            return self.min + (first_mean - self.min) * target / (first_weight / 2)
+
+        # cumulative weight at the center of current centroid
+        cumulative = first_weight / 2
+        for (left_mean, left_weight), (right_mean, right_weight) in zip(
+            self._centroids, self._centroids[1:]
+        ):
+            span = (left_weight + right_weight) / 2
+            if cumulative + span > target:
+                return left_mean + (right_mean - left_mean) * (target - cumulative) / span
+            cumulative += span
+
+        last_mean, last_weight = self._centroids[-1]
+        return last_mean + (self.max - last_mean) * min(
+            (target - cumulative) / (last_weight / 2), 1
+        )
+
+    def cdf(self, value: float) -> float:
+        """aka share (0..1) of the stream lying at or below `value`"""
+        self._compress()
+        if not self._centroids or value < self.min:
+            return 0.0
+        if value >= self.max:
+            return 1.0
+
+        first_mean, first_weight = self._centroids[0]
+        if value < first_mean:
+            return (
+                (value - self.min) / (first_mean - self.min) * first_weight / 2 / self.count
+            )
+
+        cumulative = first_weight / 2
+        for (left_mean, left_weight), (right_mean, right_weight) in zip(
+            self._centroids, self._centroids[1:]
+        ):
+            span = (left_weight + right_weight) / 2
+            if value < right_mean:
+                share = (value - left_mean) / (right_mean - left_mean)
+                return (cumulative + share * span) / self.count
+            cumulative += span
+
+        last_mean, last_weight = self._centroids[-1]
+        share = (value - last_mean) / (self.max - last_mean)
+        return (cumulative + share * last_weight / 2) / self.count
+
+    def to_bytes(self) -> bytes:
+        self._compress()
+        return dumps(
+            {
+                "compression": self.compression,
+                "count": self.count,
+                "min": self.min,
+                "max": self.max,
+                "centroids": self._centroids,
+            }
+        ).encode("utf-8")
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> "TDigest":
+        raw_digest = loads(payload.decode("utf-8"))
+        digest = cls(raw_digest["compression"])
+        digest.count = raw_digest["count"]
+        digest.min = raw_digest["min"]
+        digest.max = raw_digest["max"]
+        digest._centroids = raw_digest["centroids"]
+        return digest
+
+    def _compress(self) -> None:
+        if not self._buffer:
+            return
+
+        points = sorted(self._centroids + self._buffer)
+        self._buffer = []
+
+        merged: list[list[float]] = []
+        current_mean, current_weight = points[0]
+        weight_so_far = 0.0
+        weight_limit = self._find_weight_limit_after(weight_so_far)
+
+        for mean, weight in points[1:]:
+            if weight_so_far + current_weight + weight <= weight_limit:
+                current_weight += weight
+                current_mean += (mean - current_mean) * weight / current_weight
+                continue
+
+            merged.append([current_mean, current_weight])
+            weight_so_far += current_weight
+            weight_limit = self._find_weight_limit_after(weight_so_far)
+            current_mean, current_weight = mean, weight
+
+        merged.append([current_mean, current_weight])
+        self._centroids = merged
+
+    def _find_weight_limit_after(self, weight_so_far: float) -> float:
+        """k1 scale function: centroid may span a single unit of k = δ/2π * asin(2q - 1)"""
+        q = weight_so_far / self.count
+        k = self.compression / (2 * pi) * asin(2 * q - 1) + 1
+        if k >= self.compression / 4:
+            return self.count
+        return (sin(2 * pi * k / self.compression) + 1) / 2 * self.count
+
+
+class PendingSketches:
+    """
+    sketches of what this process has seen since they were last checkpointed to db,
+    keyed by (kind, scope, period), same as analytics_sketches rows
+    """
+
+    def __init__(self):
+        self._sketches: dict[Hashable, Sketch] = {}
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._sketches)
+
+    def apply(
+        self,
+        key: tuple[str, str, str],
+        build_sketch: Callable[[], Sketch],
+        update: Callable[[Sketch], None],
+    ) -> None:
+        with self._lock:
+            sketch = self._sketches.get(key)
+            if sketch is None:
+                sketch = self._sketches[key] = build_sketch()
+            update(sketch)
+
+    def merge_pending_into(self, key: tuple[str, str, str], sketch: Sketch) -> None:
+        with self._lock:
+            if (pending := self._sketches.get(key)) is not None:
+                sketch.merge(pending)
+
+    def drain(self) -> dict[tuple[str, str, str], Sketch]:
+        with self._lock:
+            drained, self._sketches = self._sketches, {}
+        return drained
+
+    def restore(self, drained: dict[tuple[str, str, str], Sketch]) -> None:
+        """puts back whatever failed to be checkpointed"""
+        with self._lock:
+            for key, sketch in drained.items():
+                if (pending := self._sketches.get(key)) is not None:
+                    sketch.merge(pending)
+                self._sketches[key] = sketch
+
+
+pending_sketches = PendingSketches()
+
+
+def build_month_period_of(moment: datetime) -> str:
+    """aka convert e.g datetime(2026, 10, 17, 13, 40) -> '2026-10'"""
+    return moment.strftime("%Y-%m")
+
+
+def build_day_period_of(moment: date) -> str:
+    """aka convert e.g datetime(2026, 10, 17, 13, 40) -> '2026-10-17'"""
+    return moment.strftime("%Y-%m-%d")
+
+
+def build_top_items_sketch() -> SpaceSaving:
+    return SpaceSaving(TOP_ITEMS_SKETCH_CAPACITY)
+
+
+def build_distinct_count_sketch() -> HyperLogLog:
+    return HyperLogLog(DISTINCT_COUNT_PRECISION)
+
+
+def build_quantiles_sketch() -> TDigest:
+    return TDigest(QUANTILES_COMPRESSION)
+
+
+# scope of sketches describing all the users at once
+EVERYONE = "*"
+
+
+def record_sales_of(user_id: str, creation_date: datetime, receipts: list[dict]) -> None:
+    """receipts are dicts with 'items' and 'total', all of them created at `creation_date`"""
+    items = [item for receipt in receipts for item in receipt["items"]]
+    period = build_month_period_of(creation_date)
+    day = build_day_period_of(creation_date)
+    by_quantity = ("top_items_by_quantity", user_id, period)
+    by_revenue = ("top_items_by_revenue", user_id, period)
+    distinct_items = ("distinct_items", user_id, day)
+    active_users = ("active_users", EVERYONE, day)
+
+    def update_quantities(sketch: SpaceSaving) -> None:
+        for item in items:
+            sketch.update(item["name"], float(item["quantity"]))
+
+    def update_revenues(sketch: SpaceSaving) -> None:
+        for item in items:
+            sketch.update(item["name"], float(item["price"]) * float(item["quantity"]))
+
+    def add_item_names(sketch: HyperLogLog) -> None:
+        for item in items:
+            sketch.add(item["name"])
+
+    pending_sketches.apply(by_quantity, build_top_items_sketch, update_quantities)
+    pending_sketches.apply(by_revenue, build_top_items_sketch, update_revenues)
+    pending_sketches.apply(distinct_items, build_distinct_count_sketch, add_item_names)
+    pending_sketches.apply(
+        active_users,
+        build_distinct_count_sketch,
+        lambda sketch: sketch.add(user_id),
+    )
+
+    def add_totals(sketch: TDigest) -> None:
+        for receipt in receipts:
+            sketch.add(float(receipt["total"]))
+
+    for scope in (user_id, EVERYONE):
+        pending_sketches.apply(
+            ("receipt_totals", scope, period),
+            build_quantiles_sketch,
+            add_totals,
+        )
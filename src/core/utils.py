@@ -1,6 +1,54 @@
-from random import choices
-from string import ascii_letters, digits
+from os import urandom
+from threading import Lock
+from time import time_ns
 
+CROCKFORD_BASE32 = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+TIME_ORDERED_ID_LENGTH = 26
+RANDOM_BITS = 80
 
-def generate_alphanumerical_id(length: int = 12) -> str:
-    return "".join(choices(ascii_letters + digits, k=length))
+# ids are encoded 10 bits (2 chars) at a time, 13 lookups instead of 26
+CROCKFORD_BASE32_PAIRS = [first + second for first in CROCKFORD_BASE32 for second in CROCKFORD_BASE32]
+PAIR_SHIFTS = range(TIME_ORDERED_ID_LENGTH * 5 - 10, -1, -10)
+
+
+def encode_time_ordered_id(timestamp_ms: int, random_part: int) -> str:
+    value = timestamp_ms << RANDOM_BITS | random_part
+    return "".join([CROCKFORD_BASE32_PAIRS[value >> shift & 1023] for shift in PAIR_SHIFTS])
+
+
+class TimeOrderedIdGenerator:
+    """
+    ULID-like ids: 48-bit unix time in ms followed by 80 random bits, Crockford base32-encoded.
+    Alphabet is in ASCII order, so ids compare as plain strings the same way they were generated,
+    hence inserts keep going to the right edge of a primary key index instead of random pages.
+    Within the same ms, random part of the previous id is just incremented,
+    so ids of a single process stay unique and strictly ascending
+    """
+
+    def __init__(self):
+        self._last_ms: int = -1
+        self._last_random: int = 0
+        self._lock = Lock()
+
+    def __call__(self) -> str:
+        now_ms = time_ns() // 1_000_000
+        with self._lock:
+            # clock going backwards is treated as the same ms, order wins over accuracy
+            if now_ms <= self._last_ms and self._last_random + 1 < 1 << RANDOM_BITS:
+                now_ms, random_part = self._last_ms, self._last_random + 1
+            else:
+                now_ms = max(now_ms, self._last_ms + 1)
+                random_part = int.from_bytes(urandom(RANDOM_BITS // 8))
+            self._last_ms, self._last_random = now_ms, random_part
+
+        return encode_time_ordered_id(now_ms, random_part)
+
+
+generate_time_ordered_id = TimeOrderedIdGenerator()
+
+
+def extract_timestamp_ms_from(time_ordered_id: str) -> int:
+    value = 0
+    for char in time_ordered_id:
+        value = value << 5 | CROCKFORD_BASE32.index(char)
+    return value >> RANDOM_BITS
@@ -0,0 +1,318 @@
+from asyncio import run
+from datetime import date, datetime
+
+from assertpy import assert_that
+from fastapi.testclient import TestClient
+from pytest import fixture, mark
+from sqlalchemy import select, update
+
+from src.core.db.managers import (
+    DBAppConfigManager,
+    ReceiptDailyRollupManager,
+    ReceiptManager,
+    SalesAnalyticsManager,
+    UserManager,
+)
+from src.core.db.models import Receipt, ReceiptDailyRollup
+from src.core.handlers.analytics import checkpoint_pending_sketches
+from src.core.handlers.auth import generate_jwt_token_for, grant_all_the_accesses_for, grant_basic_accesses_for
+
+SALES_IN_2020 = {"created_after": datetime(2020, 1, 1), "created_before": datetime(2020, 12, 31)}
+
+
+@fixture(scope="module")
+def receipts_from_2020(user):
+    """(creation date, is cashless, price, quantity); 2020-03-02 is Monday"""
+    sales = (
+        (datetime(2020, 3, 2, 10, 0), False, "10.00", "1.00"),
+        (datetime(2020, 3, 4, 12, 30), True, "2.50", "4.00"),
+        (datetime(2020, 3, 8, 23, 59), False, "5.00", "2.00"),
+        (datetime(2020, 3, 9, 0, 0), True, "1.00", "3.00"),
+        (datetime(2020, 4, 1, 9, 15), True, "100.00", "0.50"),
+    )
+    manager = ReceiptManager()
+    receipt_ids = []
+    for creation_date, is_cashless_payment, price, quantity in sales:
+        receipt = manager.create_receipt(
+            user_id=user,
+            items=[{"name": "Item", "price": price, "quantity": quantity}],
+            is_cashless_payment=is_cashless_payment,
+            payment_amount="100.00",
+        )
+        manager.session.execute(
+            update(Receipt).where(Receipt.id == receipt.id).values(creation_date=creation_date)
+        )
+        receipt_ids.append(receipt.id)
+    manager.session.commit()
+    ReceiptDailyRollupManager().rebuild_for(user)
+
+    yield receipt_ids
+
+    for receipt_id in receipt_ids:
+        ReceiptManager().delete(receipt_id)
+
+
+def extract_buckets_from(rows: list[dict]) -> list[tuple]:
+    return [
+        (row["period_start"], row["is_cashless_payment"], row["receipts"], str(row["revenue"]))
+        for row in rows
+    ]
+
+
+@mark.parametrize(
+    "granularity, expected",
+    (
+        (
+            "week",
+            [
+                (date(2020, 3, 2), False, 2, "20.00"),
+                (date(2020, 3, 2), True, 1, "10.00"),
+                (date(2020, 3, 9), True, 1, "3.00"),
+                (date(2020, 3, 30), True, 1, "50.00"),
+            ],
+        ),
+        (
+            "month",
+            [
+                (date(2020, 3, 1), False, 2, "20.00"),
+                (date(2020, 3, 1), True, 2, "13.00"),
+                (date(2020, 4, 1), True, 1, "50.00"),
+            ],
+        ),
+    ),
+)
+def test_sales_are_bucketed_by_period_and_payment_type(user, receipts_from_2020, granularity, expected):
+    rows = SalesAnalyticsManager().summarize_sales_of(user, granularity, SALES_IN_2020)
+
+    assert_that(extract_buckets_from(rows)).is_equal_to(expected)
+
+
+def test_partially_covered_days_are_aggregated_from_receipts(user, receipts_from_2020):
+    rows = SalesAnalyticsManager().summarize_sales_of(
+        user,
+        "month",
+        {"created_after": datetime(2020, 3, 4, 13, 0), "created_before": datetime(2020, 4, 1, 9, 0)},
+    )
+
+    assert_that(extract_buckets_from(rows)).is_equal_to(
+        [(date(2020, 3, 1), False, 1, "10.00"), (date(2020, 3, 1), True, 1, "3.00")]
+    )
+
+
+def test_revenue_doesnt_depend_on_where_window_edges_fall(user):
+    manager = ReceiptManager()
+    receipt_ids = []
+    for _ in range(2):
+        # 1.11 * 0.5 = 0.555, persisted total is rounded to 0.56
+        receipt = manager.create_receipt(
+            user_id=user,
+            items=[{"name": "Item", "price": "1.11", "quantity": "0.50"}],
+            is_cashless_payment=True,
+            payment_amount="1.00",
+        )
+        manager.session.execute(
+            update(Receipt).where(Receipt.id == receipt.id).values(creation_date=datetime(2021, 6, 10, 12, 0))
+        )
+        receipt_ids.append(receipt.id)
+    manager.session.commit()
+    ReceiptDailyRollupManager().rebuild_for(user)
+
+    whole_day, partial_day = (
+        SalesAnalyticsManager().summarize_sales_of(user, "day", filters)
+        for filters in (
+            {"created_after": datetime(2021, 6, 10), "created_before": datetime(2021, 6, 11)},
+            {"created_after": datetime(2021, 6, 10, 11, 0), "created_before": datetime(2021, 6, 10, 13, 0)},
+        )
+    )
+    for receipt_id in receipt_ids:
+        ReceiptManager().delete(receipt_id)
+
+    assert_that(extract_buckets_from(whole_day)).is_equal_to([(date(2021, 6, 10), True, 2, "1.12")])
+    assert_that(extract_buckets_from(partial_day)).is_equal_to(extract_buckets_from(whole_day))
+
+
+def fetch_rollups_of(user_id: str) -> list[tuple]:
+    manager = ReceiptDailyRollupManager()
+    rollups = manager.session.scalars(
+        select(ReceiptDailyRollup)
+        .where(ReceiptDailyRollup.user_id == user_id)
+        .order_by(ReceiptDailyRollup.day, ReceiptDailyRollup.is_cashless_payment)
+    ).all()
+    return [
+        (
+            rollup.day,
+            rollup.is_cashless_payment,
+            rollup.receipts_count,
+            rollup.items_count,
+            str(rollup.revenue),
+            str(rollup.tendered_amount),
+            str(rollup.change_given),
+        )
+        for rollup in rollups
+    ]
+
+
+def test_rollups_are_maintained_incrementally(user):
+    manager = ReceiptManager()
+    single = manager.create_receipt(
+        user_id=user,
+        items=[{"name": "A", "price": "3.00", "quantity": "2.00"}, {"name": "B", "price": "1.50", "quantity": "1.00"}],
+        is_cashless_payment=False,
+        # loaded back as FormattedDecimal, which prints itself as '1 500.00'
+        payment_amount="1500.00",
+    )
+    batch = manager.create_receipts_in_bulk(
+        user,
+        [
+            {"items": [{"name": "C", "price": "4.00", "quantity": "1.00"}], "is_cashless_payment": False, "payment_amount": "5.00"},
+            {"items": [{"name": "D", "price": "2.00", "quantity": "2.00"}], "is_cashless_payment": True, "payment_amount": "4.00"},
+        ],
+    )
+
+    maintained = fetch_rollups_of(user)
+    ReceiptDailyRollupManager().rebuild_for(user)
+    assert_that(fetch_rollups_of(user)).is_equal_to(maintained)
+
+    today_cash_rollup = next(r for r in maintained if r[0] == date.today() and not r[1])
+    ReceiptManager().delete(single.id)
+    after_deletion = fetch_rollups_of(user)
+    assert_that(after_deletion).does_not_contain(today_cash_rollup)
+
+    ReceiptDailyRollupManager().rebuild_for(user)
+    assert_that(fetch_rollups_of(user)).is_equal_to(after_deletion)
+
+    for receipt in batch:
+        ReceiptManager().delete(receipt["id"])
+
+
+def test_sales_summary_endpoint(test_client: TestClient, user, receipts_from_2020):
+    run(grant_all_the_accesses_for(user))
+    DBAppConfigManager()["ACCESS_TOKEN_EXPIRE_MINUTES"] = 60
+    headers = {"Authorization": f"Bearer {run(generate_jwt_token_for(user))}"}
+
+    response = test_client.get(
+        "/analytics/sales?granularity=day"
+        "&created_after=2020-03-04T00:00:00&created_before=2020-03-09T00:00:00",
+        headers=headers,
+    )
+    assert_that(response.status_code).is_equal_to(200)
+
+    summary = response.json()
+    assert_that(summary["granularity"]).is_equal_to("day")
+    assert_that([bucket["period_start"] for bucket in summary["buckets"]]).is_equal_to(
+        ["2020-03-04", "2020-03-08", "2020-03-09"]
+    )
+    assert_that(summary["receipts"]).is_equal_to(3)
+    assert_that(float(summary["revenue"])).is_equal_to(23.0)
+
+
+def test_users_with_basic_accesses_see_their_own_analytics(test_client: TestClient, another_user):
+    run(grant_basic_accesses_for(another_user))
+    DBAppConfigManager()["ACCESS_TOKEN_EXPIRE_MINUTES"] = 60
+    headers = {"Authorization": f"Bearer {run(generate_jwt_token_for(another_user))}"}
+
+    response = test_client.get("/analytics/sales?granularity=month", headers=headers)
+
+    assert_that(response.status_code).is_equal_to(200)
+    assert_that(response.json()["granularity"]).is_equal_to("month")
+
+
+@fixture(scope="module")
+def shopkeeper():
+    user_id = "testUser2014"
+    UserManager().create_new_user_using(
+        new_user_id=user_id,
+        login="shopkeeper",
+        name="Shop Keeper",
+        email="shopkeeper@example.com",
+        password_hash="hash",
+    )
+    run(grant_all_the_accesses_for(user_id))
+    yield user_id
+
+    UserManager().delete(user_id)
+
+
+def test_top_items_sketch_agrees_with_exact_ranking(test_client: TestClient, shopkeeper):
+    DBAppConfigManager()["ACCESS_TOKEN_EXPIRE_MINUTES"] = 60
+    headers = {"Authorization": f"Bearer {run(generate_jwt_token_for(shopkeeper))}"}
+    basket = [
+        {"name": "Milk", "price": "1.50", "quantity": "3.00"},
+        {"name": "Bread", "price": "2.00", "quantity": "1.00"},
+        {"name": "Caviar", "price": "90.00", "quantity": "0.10"},
+    ]
+    for products in (basket, basket[:2], basket[:1]):
+        test_client.post(
+            "/receipts/",
+            json={"products": products, "payment": {"is_cashless_payment": True, "amount": 100}},
+            headers=headers,
+        )
+    assert_that(run(checkpoint_pending_sketches())).is_greater_than(0)
+
+    for measure, expected_names in (
+        ("quantity", ["Milk", "Bread", "Caviar"]),
+        ("revenue", ["Milk", "Caviar", "Bread"]),
+    ):
+        sketched = test_client.get(f"/analytics/top-items?by={measure}&limit=3", headers=headers).json()
+        exact = test_client.get(f"/analytics/top-items?by={measure}&limit=3&exact=true", headers=headers).json()
+
+        assert_that(sketched["is_exact"]).is_false()
+        assert_that([item["name"] for item in sketched["items"]]).is_equal_to(expected_names)
+        assert_that([float(item["value"]) for item in sketched["items"]]).is_equal_to(
+            [float(item["value"]) for item in exact["items"]]
+        )
+
+
+def test_distinct_counts_agree_with_exact_ones(test_client: TestClient, shopkeeper):
+    headers = {"Authorization": f"Bearer {run(generate_jwt_token_for(shopkeeper))}"}
+    today = date.today().isoformat()
+
+    approximate_items = test_client.get("/analytics/distinct-items", headers=headers).json()
+    exact_items = test_client.get("/analytics/distinct-items?exact=true", headers=headers).json()
+    assert_that(approximate_items).contains_entry({"first_day": today}, {"is_exact": False})
+    assert_that(approximate_items["count"]).is_equal_to(exact_items["count"]).is_equal_to(3)
+
+    # receipts other tests have backdated or deleted are still in the sketch,
+    # it can't take anything back
+    approximate_users = test_client.get("/analytics/active-users", headers=headers).json()
+    exact_users = test_client.get("/analytics/active-users?exact=true", headers=headers).json()
+    assert_that(exact_users["count"]).is_positive()
+    assert_that(approximate_users["count"]).is_greater_than_or_equal_to(exact_users["count"])
+
+    items = test_client.get(f"/analytics/distinct-items?first_day=2020-01-01&last_day={today}", headers=headers)
+    assert_that(items.status_code).is_equal_to(400)
+    reversed_range = test_client.get(
+        "/analytics/active-users?first_day=2026-10-17&last_day=2026-10-01", headers=headers
+    )
+    assert_that(reversed_range.status_code).is_equal_to(400)
+
+
+def test_receipt_totals_quantiles_and_histogram(test_client: TestClient, shopkeeper):
+    headers = {"Authorization": f"Bearer {run(generate_jwt_token_for(shopkeeper))}"}
+
+    quantiles = test_client.get(
+        "/analytics/receipt-totals/quantiles?q=0&q=0.5&q=1", headers=headers
+    ).json()
+    assert_that(quantiles).contains_entry({"count": 3}, {"min": "4.5"}, {"max": "15.5"})
+    assert_that([quantile["value"] for quantile in quantiles["quantiles"]]).is_equal_to(
+        ["4.5", "6.5", "15.5"]
+    )
+
+    histogram = test_client.get("/analytics/receipt-totals/histogram?bins=2", headers=headers).json()
+    assert_that([(b["lower"], b["upper"], b["count"]) for b in histogram["bins"]]).is_equal_to(
+        [("4.5", "10.0", 2), ("10.0", "15.5", 1)]
+    )
+    many_bins = test_client.get("/analytics/receipt-totals/histogram?bins=7", headers=headers).json()
+    assert_that(sum(b["count"] for b in many_bins["bins"])).is_equal_to(many_bins["count"])
+
+    everyone = test_client.get(
+        "/analytics/receipt-totals/quantiles?scope=everyone", headers=headers
+    ).json()
+    assert_that(everyone["count"]).is_greater_than(3)
+
+    out_of_range = test_client.get("/analytics/receipt-totals/quantiles?q=1.5", headers=headers)
+    assert_that(out_of_range.status_code).is_equal_to(400)
+    too_long = test_client.get(
+        "/analytics/receipt-totals/histogram?first_month=2000-01&last_month=2026-10", headers=headers
+    )
+    assert_that(too_long.status_code).is_equal_to(400)
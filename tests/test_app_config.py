@@ -0,0 +1,71 @@
+from asyncio import run
+
+from assertpy import assert_that
+from pytest import fixture
+from sqlalchemy import event, update
+
+from src.core.cache import app_config_snapshot
+from src.core.db.base import async_engine, engine
+from src.core.db.managers import AsyncDBAppConfigManager, DBAppConfigManager
+from src.core.db.models import AppConfig
+
+
+@fixture
+def executed_statements():
+    statements: list[str] = []
+
+    def remember(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    for watched_engine in (engine, async_engine.sync_engine):
+        event.listen(watched_engine, "before_cursor_execute", remember)
+    yield statements
+    for watched_engine in (engine, async_engine.sync_engine):
+        event.remove(watched_engine, "before_cursor_execute", remember)
+
+
+def test_fresh_snapshot_is_served_without_queries(executed_statements):
+    DBAppConfigManager()["snapshot_probe"] = "first"
+    assert_that(DBAppConfigManager()["snapshot_probe"]).is_equal_to("first")
+    executed_statements.clear()
+
+    assert_that(DBAppConfigManager()["snapshot_probe"]).is_equal_to("first")
+    assert_that(run(AsyncDBAppConfigManager()["snapshot_probe"])).is_equal_to("first")
+    assert_that(DBAppConfigManager().fetch_named_configs(["snapshot_probe", "missing"])).is_equal_to(
+        {"snapshot_probe": "first"}
+    )
+    assert_that(DBAppConfigManager().__getitem__).raises(LookupError).when_called_with("missing")
+    assert_that(executed_statements).is_empty()
+
+
+def test_own_changes_are_seen_right_away():
+    configs = DBAppConfigManager()
+    version_before = configs["CONFIG_VERSION"]
+
+    configs["snapshot_probe"] = "second"
+
+    assert_that(DBAppConfigManager()["snapshot_probe"]).is_equal_to("second")
+    assert_that(DBAppConfigManager()["CONFIG_VERSION"]).is_equal_to(version_before + 1)
+
+
+def test_changes_made_elsewhere_are_picked_up_once_version_is_bumped(monkeypatch):
+    configs = DBAppConfigManager()
+    configs["snapshot_probe"] = "third"
+    assert_that(DBAppConfigManager()["snapshot_probe"]).is_equal_to("third")
+
+    # as if another process changed it, leaving this process' snapshot untouched
+    other_process = DBAppConfigManager()
+    other_process.session.execute(
+        update(AppConfig).where(AppConfig.key == "snapshot_probe").values(value="fourth")
+    )
+    other_process.session.commit()
+    assert_that(DBAppConfigManager()["snapshot_probe"]).is_equal_to("third")
+
+    monkeypatch.setattr(app_config_snapshot, "check_interval_seconds", 0)
+    assert_that(DBAppConfigManager()["snapshot_probe"]).is_equal_to("third")
+
+    other_process.bump_version()
+    # other process would invalidate only its own snapshot
+    other_process.session.info.clear()
+    other_process.session.commit()
+    assert_that(DBAppConfigManager()["snapshot_probe"]).is_equal_to("fourth")
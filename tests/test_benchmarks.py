@@ -0,0 +1,35 @@
+from assertpy import assert_that
+
+from benchmarks.load import find_percentile_of
+from benchmarks.timing import find_regressions_between, measure
+
+
+def test_only_slowdowns_above_threshold_are_regressions():
+    baseline = {"steady": {"median_us": 10.0}, "slower": {"median_us": 10.0}}
+    results = {
+        "steady": {"median_us": 11.0},
+        "slower": {"median_us": 13.0},
+        "brand new": {"median_us": 1000.0},
+    }
+
+    regressions = find_regressions_between(results, baseline, threshold=0.2)
+
+    assert_that(regressions).extracting("name").is_equal_to(["slower"])
+    assert_that(regressions[0]["slowdown"]).is_close_to(0.3, tolerance=1e-9)
+
+
+def test_measure_reports_per_call_time():
+    result = measure(lambda: sum(range(100)), repeat=2)
+
+    assert_that(result["median_us"]).is_greater_than_or_equal_to(result["best_us"])
+    assert_that(result["best_us"]).is_positive()
+    assert_that(result["calls"]).is_positive()
+
+
+def test_percentiles_are_nearest_rank():
+    latencies = [float(value) for value in range(1, 101)]
+
+    assert_that(find_percentile_of(latencies, 50)).is_equal_to(50.0)
+    assert_that(find_percentile_of(latencies, 99)).is_equal_to(99.0)
+    assert_that(find_percentile_of(latencies[:3], 95)).is_equal_to(3.0)
+    assert_that(find_percentile_of([], 95)).is_equal_to(0.0)
@@ -0,0 +1,41 @@
+from time import sleep
+
+from assertpy import assert_that
+
+from src.core.cache import LRUCache
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert_that(cache.get("b")).is_none()
+    assert_that(cache.get("a")).is_equal_to(1)
+    assert_that(cache.get("c")).is_equal_to(3)
+    assert_that(cache.describe()).contains_entry({"evictions": 1}, {"entries": 2})
+
+
+def test_cache_is_bounded_by_bytes():
+    cache = LRUCache(max_entries=100, max_bytes=10)
+    cache.put("a", "aaaa", size=4)
+    cache.put("b", "bbbb", size=4)
+    cache.put("c", "cccc", size=4)
+    cache.put("huge", "x" * 11, size=11)
+
+    assert_that(cache.get("a")).is_none()
+    assert_that(cache.get("huge")).is_none()
+    assert_that(cache.describe()).contains_entry({"entries": 2}, {"bytes": 8})
+
+
+def test_expired_entries_are_misses():
+    cache = LRUCache(max_entries=10, ttl_seconds=60)
+    cache.put("short-lived", 1, ttl_seconds=0.01)
+    cache.put("long-lived", 2)
+    sleep(0.02)
+
+    assert_that(cache.get("short-lived")).is_none()
+    assert_that(cache.get("long-lived")).is_equal_to(2)
+    assert_that(cache.describe()).contains_entry({"hits": 1}, {"misses": 1})
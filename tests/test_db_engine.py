@@ -0,0 +1,52 @@
+from assertpy import assert_that
+from pytest import raises
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from src.core.db.engine import (
+    ENGINE_PROFILES,
+    build_engine_settings_for,
+    create_configured_engine,
+    describe_pool_of,
+)
+
+
+def test_overrides_are_applied_on_top_of_profile():
+    settings = build_engine_settings_for(
+        "production",
+        {"pool_size": "3", "echo": "true", "max_overflow": None, "pool_timeout": ""},
+    )
+
+    assert_that(settings).contains_entry({"pool_size": 3}, {"echo": True})
+    assert_that(settings["max_overflow"]).is_equal_to(ENGINE_PROFILES["production"]["max_overflow"])
+    assert_that(settings["pool_timeout"]).is_equal_to(ENGINE_PROFILES["production"]["pool_timeout"])
+    assert_that(build_engine_settings_for).raises(ValueError).when_called_with("staging", {})
+
+
+def test_pool_exhaustion_is_visible_in_metrics(tmp_path):
+    settings = build_engine_settings_for(
+        "test", {"pool_size": "1", "max_overflow": "0", "pool_timeout": "0.05"}
+    )
+    tiny_engine = create_configured_engine(f"sqlite:///{tmp_path / 'pool.db'}", settings)
+
+    with tiny_engine.connect():
+        with raises(PoolTimeoutError):
+            tiny_engine.connect()
+        assert_that(describe_pool_of(tiny_engine)).contains_entry({"checked_out": 1})
+
+    with tiny_engine.connect():
+        pass
+
+    stats = describe_pool_of(tiny_engine)
+    assert_that(stats).contains_entry({"checkouts": 2}, {"timeouts": 1}, {"checked_out": 0})
+    assert_that(stats["max_wait_seconds"]).is_greater_than_or_equal_to(0)
+    tiny_engine.dispose()
+
+
+def test_pool_statistics_endpoint(test_client):
+    checkouts_before = test_client.get("/stats/db").json()["async_pool"]["checkouts"]
+    test_client.post("/auth/login", json={"login": "nobody", "password": "nothing"})
+
+    response = test_client.get("/stats/db")
+    assert_that(response.status_code).is_equal_to(200)
+    assert_that(response.json()["async_pool"]["checkouts"]).is_greater_than(checkouts_before)
+    assert_that(response.json()["sync_pool"]).contains_key("timeouts", "size", "overflow")
@@ -0,0 +1,106 @@
+from decimal import Decimal
+from time import time
+
+from assertpy import assert_that
+from pytest import fixture
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from config import REPLICA_STICKINESS_SECONDS
+from src.core.cache import recent_writers
+from src.core.db.base import Base, RoutingSession
+from src.core.db.managers import ReceiptManager, UserManager
+from src.core.db.models import User
+from src.core.db.routing import PrimaryOnly, bind_user_to
+
+ITEMS = [{"name": "Молоко", "price": Decimal("40.00"), "quantity": Decimal("1")}]
+
+
+@fixture
+def replicated_sessions(tmp_path):
+    """
+    two SQLite files standing for primary and its replica; the replica is
+    "lagging" from the start, so whatever is written afterward is only in primary
+    """
+    primary = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    for engine in (primary, replica):
+        Base.metadata.create_all(bind=engine)
+        with sessionmaker(bind=engine)() as session:
+            for user_id in ("routedUser01", "routedUser02"):
+                session.add(
+                    User(
+                        id=user_id,
+                        login=user_id,
+                        name=user_id,
+                        email=f"{user_id}@example.com",
+                        password_hash="hash",
+                    )
+                )
+            session.commit()
+
+    session_class = type("ReplicatedSession", (RoutingSession,), {"replica": replica})
+    yield sessionmaker(bind=primary, class_=session_class, expire_on_commit=False)
+
+    primary.dispose()
+    replica.dispose()
+
+
+def create_receipt_for(user_id: str, session) -> None:
+    ReceiptManager(session).create_receipt(
+        user_id, ITEMS, is_cashless_payment=True, payment_amount=Decimal("40.00")
+    )
+
+
+def test_read_only_methods_go_to_replica(replicated_sessions):
+    with replicated_sessions() as session:
+        create_receipt_for("routedUser01", session)
+        session.commit()
+
+    with replicated_sessions() as session:
+        assert_that(ReceiptManager(session).fetch_all_for_user_with("routedUser01")).is_empty()
+        assert_that(
+            ReceiptManager(session, PrimaryOnly()).fetch_all_for_user_with("routedUser01")
+        ).is_length(1)
+        assert_that(UserManager(session).lookup_for_user_by("routedUser01")).is_not_none()
+
+
+def test_reads_after_own_write_go_to_primary(replicated_sessions):
+    with replicated_sessions() as session:
+        assert_that(ReceiptManager(session).count_filtered_using("routedUser01", {})).is_zero()
+
+        create_receipt_for("routedUser01", session)
+        assert_that(ReceiptManager(session).count_filtered_using("routedUser01", {})).is_equal_to(1)
+        session.commit()
+
+
+def test_recent_writer_sticks_to_primary(replicated_sessions):
+    with replicated_sessions() as session:
+        bind_user_to(session, "routedUser02")
+        create_receipt_for("routedUser02", session)
+        session.commit()
+
+    with replicated_sessions() as session:
+        bind_user_to(session, "routedUser02")
+        assert_that(ReceiptManager(session).fetch_all_for_user_with("routedUser02")).is_length(1)
+
+    with replicated_sessions() as session:
+        bind_user_to(session, "someoneElse0")
+        assert_that(ReceiptManager(session).fetch_all_for_user_with("routedUser02")).is_empty()
+
+
+def test_write_committed_by_another_worker_sticks_to_primary(replicated_sessions):
+    with replicated_sessions() as session:
+        create_receipt_for("routedUser02", session)
+        session.commit()
+    # as if the write was made by another process, only its moment came along with request
+    recent_writers.clear()
+
+    with replicated_sessions() as session:
+        bind_user_to(session, "routedUser02", last_written_at=time())
+        assert_that(ReceiptManager(session).fetch_all_for_user_with("routedUser02")).is_length(1)
+
+    with replicated_sessions() as session:
+        long_ago = time() - REPLICA_STICKINESS_SECONDS - 1
+        bind_user_to(session, "routedUser02", last_written_at=long_ago)
+        assert_that(ReceiptManager(session).fetch_all_for_user_with("routedUser02")).is_empty()
@@ -0,0 +1,56 @@
+from assertpy import assert_that
+
+from src.api.metrics import Histogram, RequestMetrics, flatten, render_prometheus_text
+
+
+def test_histogram_buckets_are_cumulative_and_inclusive():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+
+    assert_that(list(histogram.iterate_cumulative_counts())).is_equal_to(
+        [("0.1", 2), ("1.0", 3), ("+Inf", 4)]
+    )
+    assert_that(histogram.sum).is_close_to(3.65, 1e-9)
+
+
+def test_stats_are_rendered_as_counters_and_gauges():
+    metrics = RequestMetrics()
+    metrics.observe("GET", "/receipts/{receipt_id}", 200, 0.02, 512)
+
+    text = render_prometheus_text(
+        metrics,
+        cache_stats={"receipt_txt": {"memory": {"hits": 3, "entries": 1}}},
+        pool_stats={"sync_pool": {"checkouts": 5, "checked_out": 0}},
+    )
+
+    assert_that(text).contains(
+        'http_requests_total{method="GET",route="/receipts/{receipt_id}",status="200"} 1',
+        'http_response_size_bytes_bucket{method="GET",route="/receipts/{receipt_id}",le="1000"} 1',
+        "# TYPE cache_hits_total counter",
+        'cache_hits_total{cache="receipt_txt_memory"} 3',
+        'cache_entries{cache="receipt_txt_memory"} 1',
+        'db_pool_checkouts_total{pool="sync_pool"} 5',
+        "# TYPE db_pool_checked_out gauge",
+    )
+    assert_that(flatten({"a": {"b": {"c": 1}}, "d": {"e": 2}})).is_equal_to(
+        {"a_b": {"c": 1}, "d": {"e": 2}}
+    )
+
+
+def test_metrics_endpoint_labels_requests_by_route_template(test_client):
+    rejected = test_client.get("/receipts/someSecretReceiptId")
+    test_client.get("/no/such/route/at/all")
+
+    response = test_client.get("/metrics")
+
+    assert_that(response.status_code).is_equal_to(200)
+    assert_that(response.headers["content-type"]).starts_with("text/plain; version=0.0.4")
+    assert_that(response.text).contains(
+        f'http_requests_total{{method="GET",route="/receipts/{{receipt_id}}",status="{rejected.status_code}"}}',
+        'http_requests_total{method="GET",route="<unmatched>",status="404"}',
+        'http_request_duration_seconds_count{method="GET",route="/receipts/{receipt_id}"}',
+        "http_requests_in_flight 1",
+        'cache_hits_total{cache="user_accesses"}',
+        'db_pool_checkouts_total{pool="async_pool"}',
+    ).does_not_contain("someSecretReceiptId", "/no/such/route")
@@ -1,8 +1,12 @@
 from datetime import datetime
 
 from assertpy import assert_that
+from pytest import mark
 
-from src.core.handlers.receipts.rendering import build_str_repr_of_receipt
+from src.core.handlers.receipts.rendering import (
+    build_str_repr_of_receipt,
+    render_default_layout,
+)
 
 RECEIPT_FROM_REQUIREMENTS = """      ФОП Джонсонюк Борис       
 ================================
@@ -21,7 +25,8 @@ Mavic 3T              896 610.00
       Дякуємо за покупку!       """
 
 
-def test_receipt_from_requirements():
+@mark.parametrize("render", (build_str_repr_of_receipt, render_default_layout))
+def test_receipt_from_requirements(render):
     receipt_data = {
         "issuer": "ФОП Джонсонюк Борис",
         "items": [
@@ -59,9 +64,50 @@ def test_receipt_from_requirements():
         "width": 32,
     }
 
-    freshly_generated_str_receipt = build_str_repr_of_receipt(
+    freshly_generated_str_receipt = render(
         receipt_data,
         formatting_config=config,
     )
 
     assert_that(freshly_generated_str_receipt).is_equal_to(RECEIPT_FROM_REQUIREMENTS)
+
+
+@mark.parametrize("width", (20, 32, 48, 100))
+def test_fast_renderer_matches_template(width: int):
+    receipt_data = {
+        "issuer": "Danylo Avdiienko",
+        "items": [
+            {
+                "name": "Antidisestablishmentarianism-flavoured extra long chewing gum",
+                "price": "1.50",
+                "quantity": "12.00",
+                "total": "18.00",
+            },
+            {"name": "", "price": "0.10", "quantity": "1.00", "total": "0.10"},
+            {
+                "name": "Кава\nз молоком",
+                "price": "45.00",
+                "quantity": "2.00",
+                "total": "90.00",
+            },
+        ],
+        "total": "108.10",
+        "payment": {"is_cashless_payment": False, "type": "cash", "amount": "200.00"},
+        "rest": "91.90",
+        "created_at": datetime(2025, 5, 17, 22, 15),
+    }
+    config = {
+        "delimiter": "=",
+        "separator": "-",
+        "thank_you_note": "Дякуємо за покупку!",
+        "cash_label": "Готівка",
+        "cashless_label": "Картка",
+        "total_label": "СУМА",
+        "rest_label": "Решта",
+        "datetime_format": "%d.%m.%Y %H:%M",
+        "width": width,
+    }
+
+    assert_that(render_default_layout(receipt_data, config)).is_equal_to(
+        build_str_repr_of_receipt(receipt_data, config)
+    )
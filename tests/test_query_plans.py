@@ -0,0 +1,157 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from assertpy import assert_that
+from pytest import fixture, mark
+from sqlalchemy import Connection, create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from src.core.db.base import Base
+from src.core.db.managers import (
+    ReceiptCacheManager,
+    ReceiptManager,
+    SalesAnalyticsManager,
+    UserManager,
+)
+from src.core.db.models import Access, Receipt, ReceiptItems, Role, User, UsersRoles
+
+USERS_COUNT = 50
+RECEIPTS_PER_USER = 200
+ITEMS_PER_RECEIPT = 3
+SEEDED_USER_ID = "planUser0007"
+SEEDED_RECEIPT_ID = "planReceipt0007x0100"
+SEEDED_SINCE = datetime(2025, 1, 1)
+
+
+def seed_large_dataset_into(connection: Connection) -> None:
+    user_ids = [f"planUser{number:04}" for number in range(USERS_COUNT)]
+    connection.execute(
+        insert(User),
+        [
+            {
+                "id": user_id,
+                "login": user_id,
+                "name": user_id,
+                "email": f"{user_id}@example.com",
+                "password_hash": "hash",
+            }
+            for user_id in user_ids
+        ],
+    )
+    connection.execute(
+        insert(Role), [{"id": f"role{number}", "name": f"role{number}"} for number in range(10)]
+    )
+    connection.execute(
+        insert(UsersRoles),
+        [{"user_id": user_id, "role_id": f"role{index % 10}"} for index, user_id in enumerate(user_ids)],
+    )
+    connection.execute(
+        insert(Access),
+        [
+            {
+                "id": f"access{role}x{route}",
+                "role_id": f"role{role}",
+                "route_url": f"/route{route}",
+                "allowed_method": "GET",
+            }
+            for role in range(10)
+            for route in range(20)
+        ],
+    )
+
+    receipt_rows, item_rows = [], []
+    for user_id in user_ids:
+        for number in range(RECEIPTS_PER_USER):
+            receipt_id = f"{user_id.replace('User', 'Receipt')}x{number:04}"
+            receipt_rows.append(
+                {
+                    "id": receipt_id,
+                    "user_id": user_id,
+                    "is_cashless_payment": number % 2 == 0,
+                    "payment_amount": Decimal("100.00"),
+                    "total": Decimal("90.00"),
+                    "creation_date": SEEDED_SINCE + timedelta(hours=number),
+                }
+            )
+            item_rows.extend(
+                {
+                    "id": f"{receipt_id}i{item}",
+                    "receipt_id": receipt_id,
+                    "name": f"item {item}",
+                    "price": Decimal("10.00"),
+                    "quantity": Decimal("3"),
+                }
+                for item in range(ITEMS_PER_RECEIPT)
+            )
+    connection.execute(insert(Receipt), receipt_rows)
+    connection.execute(insert(ReceiptItems), item_rows)
+
+
+def explain_plan_of(connection: Connection, statement: str, parameters) -> list[str]:
+    if connection.dialect.name == "postgresql":
+        return [row[0] for row in connection.exec_driver_sql("EXPLAIN " + statement, parameters)]
+    plan = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+    return [row[-1] for row in plan]
+
+
+def find_full_scans_in(plan: list[str]) -> list[str]:
+    return [step for step in plan if step.startswith("SCAN ") or "Seq Scan" in step]
+
+
+@fixture(scope="module")
+def seeded_engine(tmp_path_factory):
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plans.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        seed_large_dataset_into(connection)
+        connection.exec_driver_sql("ANALYZE")
+    yield engine
+    engine.dispose()
+
+
+HOT_QUERIES = {
+    "paginated receipts": lambda session: ReceiptManager(session).filter_and_paginate_using(
+        SEEDED_USER_ID, 10, 20, {"created_after": SEEDED_SINCE}
+    ),
+    "receipts after cursor": lambda session: ReceiptManager(session).filter_and_paginate_after(
+        SEEDED_USER_ID, 10, (SEEDED_SINCE + timedelta(hours=100), SEEDED_RECEIPT_ID), {}
+    ),
+    "receipt with items": lambda session: ReceiptManager(session).fetch_including_items_for(
+        SEEDED_RECEIPT_ID
+    ),
+    "user accesses": lambda session: UserManager(session).gather_all_accesses_for(
+        SEEDED_USER_ID
+    ),
+    "user by login": lambda session: UserManager(session).lookup_for_user_by(SEEDED_USER_ID),
+    "receipts.txt cache": lambda session: ReceiptCacheManager(session).fetch_cache_for(
+        SEEDED_RECEIPT_ID, "0123456789abcdef", 32
+    ),
+    "exact top items": lambda session: SalesAnalyticsManager(session).rank_items_exactly(
+        SEEDED_USER_ID, "quantity", SEEDED_SINCE, SEEDED_SINCE + timedelta(days=3), 5
+    ),
+}
+
+
+@mark.parametrize("query_name", HOT_QUERIES)
+def test_hot_query_uses_indexes(seeded_engine, query_name):
+    statements = []
+
+    def capture(connection, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(seeded_engine, "before_cursor_execute", capture)
+    try:
+        with sessionmaker(bind=seeded_engine)() as session:
+            HOT_QUERIES[query_name](session)
+    finally:
+        event.remove(seeded_engine, "before_cursor_execute", capture)
+
+    assert_that(statements).is_not_empty()
+    with seeded_engine.connect() as connection:
+        for statement, parameters in statements:
+            plan = explain_plan_of(connection, statement, parameters)
+            assert_that(find_full_scans_in(plan)).described_as(statement).is_empty()
+            # newest first straight from the index, no sorting of user's whole history
+            if "ORDER BY receipts.creation_date DESC" in statement:
+                assert_that(" ".join(plan)).does_not_contain("TEMP B-TREE FOR ORDER BY")
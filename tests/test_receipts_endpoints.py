@@ -1,22 +1,27 @@
+from asyncio import run
+from csv import DictReader
 from decimal import Decimal
+from json import loads
 
 from assertpy import assert_that
 from fastapi.testclient import TestClient
 from pytest import fixture, mark
+from sqlalchemy import event
 
-from src.core.db.managers import DBAppConfigManager
+from src.core.db.base import async_engine
+from src.core.db.managers import DBAppConfigManager, ReceiptManager
 from src.core.handlers.auth import generate_jwt_token_for, grant_all_the_accesses_for, grant_basic_accesses_for
 from tests.conftest import another_user, user
 
 
 @fixture(scope="module", autouse=True)
 def ensure_admin_rights(user):
-    grant_all_the_accesses_for(user)
+    run(grant_all_the_accesses_for(user))
 
 
 @fixture(scope="module", autouse=True)
 def ensure_basic_rights(another_user):
-    grant_basic_accesses_for(another_user)
+    run(grant_basic_accesses_for(another_user))
 
 
 @fixture(scope="session")
@@ -26,7 +31,7 @@ def set_access_token_timeout():
 
 @fixture(scope="module")
 def auth_headers(user, set_access_token_timeout) -> dict:
-    return {"Authorization": f"Bearer {generate_jwt_token_for(user)}"}
+    return {"Authorization": f"Bearer {run(generate_jwt_token_for(user))}"}
 
 
 def test_list_and_paginate_receipts(test_client: TestClient, user, auth_headers):
@@ -54,6 +59,152 @@ def test_list_and_paginate_receipts(test_client: TestClient, user, auth_headers)
     assert_that(page["receipts"]).is_length(2)
 
 
+def test_cursor_pagination_walks_through_all_receipts(test_client: TestClient, user, auth_headers):
+    everything = test_client.get("/receipts/?limit=100", headers=auth_headers).json()
+    expected_ids = [receipt["id"] for receipt in everything["receipts"]]
+    assert_that(expected_ids).is_not_empty()
+
+    first_page = test_client.get("/receipts/?limit=1", headers=auth_headers).json()
+    seen_ids = [receipt["id"] for receipt in first_page["receipts"]]
+    cursor = first_page["pagination"]["next_cursor"]
+
+    while cursor is not None:
+        response = test_client.get(f"/receipts/?limit=1&cursor={cursor}", headers=auth_headers)
+        assert_that(response.status_code).is_equal_to(200)
+        page = response.json()
+        assert_that(page["total"]).is_none()
+        seen_ids.extend(receipt["id"] for receipt in page["receipts"])
+        cursor = page["pagination"]["next_cursor"]
+
+    assert_that(seen_ids).is_equal_to(expected_ids)
+
+    with_total = test_client.get(
+        f"/receipts/?limit=1&cursor={first_page['pagination']['next_cursor']}&with_total=true",
+        headers=auth_headers,
+    ).json()
+    assert_that(with_total["total"]).is_equal_to(len(expected_ids))
+
+
+def test_malformed_cursor_returns_400(test_client: TestClient, auth_headers):
+    resp = test_client.get("/receipts/?cursor=definitely-not-a-cursor", headers=auth_headers)
+    assert_that(resp.status_code).is_equal_to(400)
+    assert_that(resp.json()["detail"]).contains("Malformed pagination cursor")
+
+
+def test_filter_receipts_by_total(test_client: TestClient, user, auth_headers):
+    payload = {
+        "products": [
+            {"name": "Pricey", "price": 700.00, "quantity": 1},
+            {"name": "Cheap", "price": 0.25, "quantity": 4},
+        ],
+        "payment": {"is_cashless_payment": True, "amount": 701.00},
+    }
+    created = test_client.post("/receipts/", json=payload, headers=auth_headers).json()
+    assert_that(Decimal(created["total"])).is_equal_to(Decimal("701.00"))
+
+    in_range = test_client.get(
+        "/receipts/?min_total=700.50&max_total=701.00", headers=auth_headers
+    ).json()
+    assert_that([receipt["id"] for receipt in in_range["receipts"]]).is_equal_to([created["id"]])
+
+    out_of_range = test_client.get("/receipts/?min_total=701.01", headers=auth_headers).json()
+    assert_that(out_of_range["total"]).is_equal_to(0)
+
+
+def test_create_receipts_batch(test_client: TestClient, user, auth_headers):
+    batch = {
+        "receipts": [
+            {
+                "products": [
+                    {"name": "Batch A", "price": 2.50, "quantity": 2},
+                    {"name": "Batch B", "price": 1.00, "quantity": 1},
+                ],
+                "payment": {"is_cashless_payment": False, "amount": 10.00},
+            },
+            {
+                "products": [{"name": "Batch C", "price": 3.00, "quantity": 3}],
+                "payment": {"is_cashless_payment": True, "amount": 9.00},
+            },
+        ]
+    }
+    resp = test_client.post("/receipts/batch", json=batch, headers=auth_headers)
+    assert_that(resp.status_code).is_equal_to(201)
+    # reads keep to primary for a while whichever worker gets them, see src.core.db.routing
+    assert_that(resp.cookies).contains_key("last_write_at")
+    created = resp.json()
+    assert_that(created["count"]).is_equal_to(2)
+    assert_that([Decimal(r["total"]) for r in created["receipts"]]).is_equal_to(
+        [Decimal("6.00"), Decimal("9.00")]
+    )
+
+    first = test_client.get(f"/receipts/{created['receipts'][0]['id']}", headers=auth_headers).json()
+    assert_that([Decimal(item["total"]) for item in first["items"]]).contains_only(
+        Decimal("5.00"), Decimal("1.00")
+    )
+    assert_that(Decimal(first["rest"])).is_equal_to(Decimal("4.00"))
+
+
+def test_receipts_batch_is_rejected_as_a_whole(test_client: TestClient, user, auth_headers):
+    total_before = test_client.get("/receipts/", headers=auth_headers).json()["total"]
+    batch = {
+        "receipts": [
+            {
+                "products": [{"name": "Fine", "price": 1.00, "quantity": 1}],
+                "payment": {"is_cashless_payment": True, "amount": 1.00},
+            },
+            {"products": [], "payment": {"is_cashless_payment": True, "amount": 1.00}},
+        ]
+    }
+    resp = test_client.post("/receipts/batch", json=batch, headers=auth_headers)
+    assert_that(resp.status_code).is_equal_to(422)
+    assert_that(resp.json()["detail"]).contains("[1]")
+    assert_that(resp.cookies).does_not_contain_key("last_write_at")
+    total_after = test_client.get("/receipts/", headers=auth_headers).json()["total"]
+    assert_that(total_after).is_equal_to(total_before)
+
+
+@mark.parametrize("export_format, header_lines", (("ndjson", 0), ("csv", 1)))
+def test_export_streams_every_receipt(
+    test_client: TestClient, user, auth_headers, export_format, header_lines
+):
+    listing = test_client.get("/receipts/?limit=100", headers=auth_headers).json()
+
+    resp = test_client.get(f"/receipts/export?format={export_format}", headers=auth_headers)
+    assert_that(resp.status_code).is_equal_to(200)
+    lines = resp.text.splitlines()
+    assert_that(lines).is_length(listing["total"] + header_lines)
+
+    if export_format == "ndjson":
+        exported_ids = [loads(line)["id"] for line in lines]
+        assert_that(exported_ids).is_equal_to([r["id"] for r in listing["receipts"]])
+
+
+@mark.parametrize("export_format", ("ndjson", "csv"))
+def test_exported_amounts_of_thousands_and_more_are_plain_decimals(
+    test_client: TestClient, auth_headers, export_format
+):
+    payload = {
+        "products": [{"name": "Mavic 3T", "price": "1500.00", "quantity": "2.00"}],
+        "payment": {"is_cashless_payment": False, "amount": "5000.00"},
+    }
+    receipt_id = test_client.post("/receipts/", json=payload, headers=auth_headers).json()["id"]
+
+    resp = test_client.get(f"/receipts/export?format={export_format}", headers=auth_headers)
+    ReceiptManager().delete(receipt_id)
+
+    if export_format == "ndjson":
+        rows = [loads(line) for line in resp.text.splitlines()]
+        row = next(row for row in rows if row["id"] == receipt_id)
+        payment_amount, items = row["payment"]["amount"], row["items"]
+    else:
+        row = next(row for row in DictReader(resp.text.splitlines()) if row["id"] == receipt_id)
+        payment_amount, items = row["payment_amount"], loads(row["items"])
+    assert_that((payment_amount, row["total"], row["rest"])).is_equal_to(
+        ("5000.00", "3000.00", "2000.00")
+    )
+    assert_that(items[0]).contains_entry({"price": "1500.00"}, {"total": "3000.00"})
+
+
 def test_create_and_fetch_receipt(test_client: TestClient, user, auth_headers, setup_receipt_render_config,):
     payload = {
         "products": [
@@ -92,6 +243,21 @@ def test_receipt_not_found_returns_404(test_client: TestClient, auth_headers, ur
     )
 
 
+def test_amounts_of_thousands_and_more_are_served_as_json(test_client: TestClient, auth_headers):
+    payload = {
+        "products": [{"name": "Mavic 3T", "price": "298870.00", "quantity": "2.00"}],
+        "payment": {"is_cashless_payment": False, "amount": "600000.00"},
+    }
+    created = test_client.post("/receipts/", json=payload, headers=auth_headers)
+    assert_that(created.status_code).is_equal_to(201)
+
+    fetched = test_client.get(f"/receipts/{created.json()['id']}", headers=auth_headers)
+    assert_that(fetched.status_code).is_equal_to(200)
+    assert_that(fetched.json()).contains_entry({"total": "597740.00"}, {"rest": "2260.00"})
+    assert_that(fetched.json()["payment"]["amount"]).is_equal_to("600000.00")
+    ReceiptManager().delete(created.json()["id"])
+
+
 def test_other_user_cannot_see_receipt(
     test_client: TestClient, user, another_user, auth_headers
 ):
@@ -102,7 +268,28 @@ def test_other_user_cannot_see_receipt(
     response_for_owner = test_client.post("/receipts/", json=payload, headers=auth_headers)
     receipt_id = response_for_owner.json()["id"]
 
-    authorization_for_another_user = {"Authorization": f"Bearer {generate_jwt_token_for(another_user)}"}
+    authorization_for_another_user = {"Authorization": f"Bearer {run(generate_jwt_token_for(another_user))}"}
     response_for_another_user = test_client.get(f"/receipts/{receipt_id}", headers=authorization_for_another_user)
     assert_that(response_for_another_user.status_code).is_equal_to(403)
-    assert_that(response_for_another_user.json()["detail"]).contains("Not enough permissions.")
+    assert_that(response_for_another_user.json()["detail"]).contains("no permission to access sensitive data")
+
+
+def test_request_uses_single_connection_and_commit(test_client: TestClient, auth_headers):
+    checkouts, commits = [], []
+    pool_events = (async_engine.sync_engine.pool, "checkout", lambda *_: checkouts.append(1))
+    engine_events = (async_engine.sync_engine, "commit", lambda *_: commits.append(1))
+    event.listen(*pool_events)
+    event.listen(*engine_events)
+    try:
+        payload = {
+            "products": [{"name": "Unit of work", "price": 1.00, "quantity": 1}],
+            "payment": {"is_cashless_payment": True, "amount": 1.00},
+        }
+        resp = test_client.post("/receipts/", json=payload, headers=auth_headers)
+    finally:
+        event.remove(*pool_events)
+        event.remove(*engine_events)
+
+    assert_that(resp.status_code).is_equal_to(201)
+    assert_that(checkouts).is_length(1)
+    assert_that(commits).is_length(1)
@@ -1,8 +1,14 @@
+from asyncio import run
+from datetime import timedelta
+
 from assertpy import assert_that
 from pytest import raises
 
+from src.core.cache import receipt_txt_memory_cache
+from src.core.db.base import create_session
 from src.core.db.managers import DBAppConfigManager, ReceiptCacheManager
 from src.core.handlers.receipts.get import (
+    build_hash_of,
     render_as_str_receipt_with,
     retrieve_if_is_possible_to_look_data_for,
 )
@@ -10,7 +16,7 @@ from tests.conftest import receipt, user
 
 
 def test_render_as_str_receipt_with_success(receipt, setup_receipt_render_config):
-    rendered_receipt = render_as_str_receipt_with(receipt, width=32)
+    rendered_receipt = run(render_as_str_receipt_with(receipt, width=32))
     assert_that(rendered_receipt).is_instance_of(str)
     assert_that(rendered_receipt).contains("Test Product")
     assert_that(rendered_receipt).contains("1 000.00")
@@ -19,40 +25,94 @@ def test_render_as_str_receipt_with_success(receipt, setup_receipt_render_config
 def test_render_as_str_receipt_with_caching(receipt):
     width = 32
     cache_manager = ReceiptCacheManager()
-    formatting_config = DBAppConfigManager().fetch_receipt_formatting_configs()
-    formatting_config["width"] = str(width)
-    config_string = ":".join(formatting_config.values())
+    config_hash = build_hash_of(DBAppConfigManager().fetch_receipt_formatting_configs())
 
-    cached_txt = cache_manager.fetch_cache_for(receipt, config_string)
-    if cached_txt:
-        cache_manager.delete(receipt)
+    cache_manager.delete(receipt)
+    receipt_txt_memory_cache.clear()
 
-    rendered_first = render_as_str_receipt_with(receipt, width=width)
-    cached_txt_after_first = cache_manager.fetch_cache_for(receipt, config_string)
+    rendered_first = run(render_as_str_receipt_with(receipt, width=width))
+    cached_txt_after_first = cache_manager.fetch_cache_for(receipt, config_hash, width)
     assert_that(cached_txt_after_first).is_equal_to(rendered_first)
 
-    rendered_second = render_as_str_receipt_with(receipt, width=width)
+    rendered_second = run(render_as_str_receipt_with(receipt, width=width))
     assert_that(rendered_second).is_equal_to(rendered_first)
 
 
+def test_every_width_gets_its_own_cached_variant(receipt):
+    cache_manager = ReceiptCacheManager()
+    config_hash = build_hash_of(DBAppConfigManager().fetch_receipt_formatting_configs())
+
+    narrow = run(render_as_str_receipt_with(receipt, width=32))
+    wide = run(render_as_str_receipt_with(receipt, width=48))
+
+    assert_that(narrow).is_not_equal_to(wide)
+    assert_that(cache_manager.fetch_cache_for(receipt, config_hash, 32)).is_equal_to(narrow)
+    assert_that(cache_manager.fetch_cache_for(receipt, config_hash, 48)).is_equal_to(wide)
+
+
+def test_compressed_cache_entries_are_read_back_as_text(receipt):
+    cache_manager = ReceiptCacheManager()
+    cache_manager.is_compressing = True
+    cache_manager.create_new_entry_with(receipt, "compressed000000", 64, "Дякуємо " * 50)
+
+    assert_that(
+        ReceiptCacheManager().fetch_cache_for(receipt, "compressed000000", 64)
+    ).is_equal_to("Дякуємо " * 50)
+
+
+def test_db_cache_hit_writes_nothing_until_last_access_gets_stale(receipt):
+    ReceiptCacheManager().create_new_entry_with(receipt, "touched000000000", 32, "text")
+
+    with create_session() as session:
+        cache_manager = ReceiptCacheManager(session)
+        assert_that(cache_manager.fetch_cache_for(receipt, "touched000000000", 32)).is_equal_to("text")
+        assert_that(session.info).does_not_contain_key("has_written")
+
+        cache_manager.touch_interval = timedelta(0)
+        cache_manager.fetch_cache_for(receipt, "touched000000000", 32)
+        assert_that(session.info).contains_entry({"has_written": True})
+        session.commit()
+
+
 def test_render_as_str_receipt_with_nonexistent_receipt():
     with raises(KeyError) as exc:
-        render_as_str_receipt_with("nonexistent_id", width=32)
+        run(render_as_str_receipt_with("nonexistent_id", width=32))
     assert_that(str(exc.value)).contains("is not found in DB!")
 
 
 def test_retrieve_if_is_possible_to_look_data_for_success(receipt, user):
-    receipt_data = retrieve_if_is_possible_to_look_data_for(receipt, using=user)
+    receipt_data = run(retrieve_if_is_possible_to_look_data_for(receipt, using=user))
     assert_that(receipt_data["id"]).is_equal_to(receipt)
 
 
 def test_retrieve_if_is_possible_to_look_data_for_wrong_user(receipt, another_user):
     with raises(AssertionError) as exc:
-        retrieve_if_is_possible_to_look_data_for(receipt, using="non_existing_user_id")
+        run(retrieve_if_is_possible_to_look_data_for(receipt, using="non_existing_user_id"))
     assert_that(str(exc.value)).contains("Not possible to access this data.")
 
 
 def test_retrieve_if_is_possible_to_look_data_for_not_found(user):
     with raises(KeyError) as exc:
-        retrieve_if_is_possible_to_look_data_for("nonexistent_id", using=user)
+        run(retrieve_if_is_possible_to_look_data_for("nonexistent_id", using=user))
     assert_that(str(exc.value)).contains("is not found!")
+
+
+def test_render_as_str_receipt_with_is_served_from_memory_tier(receipt):
+    receipt_txt_memory_cache.clear()
+    rendered_first = run(render_as_str_receipt_with(receipt, width=32))
+
+    ReceiptCacheManager().delete(receipt)
+    hits_before = receipt_txt_memory_cache.stats.hits
+    rendered_second = run(render_as_str_receipt_with(receipt, width=32))
+
+    assert_that(rendered_second).is_equal_to(rendered_first)
+    assert_that(receipt_txt_memory_cache.stats.hits).is_equal_to(hits_before + 1)
+
+
+def test_db_cache_tier_evicts_entries_above_its_capacity(receipt):
+    run(render_as_str_receipt_with(receipt, width=32))
+    cache_manager = ReceiptCacheManager()
+    cache_manager.max_entries = 0
+
+    assert_that(cache_manager.evict_least_recently_used()).is_greater_than_or_equal_to(1)
+    assert_that(ReceiptCacheManager().fetch_all()).is_empty()
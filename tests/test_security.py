@@ -1,7 +1,20 @@
+from asyncio import run
+from datetime import datetime, timedelta, timezone
+
 from assertpy import assert_that
-from pytest import mark
+from fastapi import HTTPException
+from jwt import encode
+from pytest import mark, raises
 
-from src.api.security import is_possible_to_perform_request_based_on
+from config import JWT_ALGORITHM, JWT_SECRET_KEY
+from src.api.security import (
+    extract_accesses_for,
+    extract_payload_from,
+    is_possible_to_perform_request_based_on,
+    verified_tokens_cache,
+)
+from src.core.cache import user_accesses_cache
+from src.core.db.managers import AccessManager, RoleManager
 
 
 @mark.parametrize(
@@ -84,3 +97,38 @@ def test_request_lacks_required_accesses(
     assert_that(
         is_possible_to_perform_request_based_on(method, route, accesses)
     ).is_false()
+
+
+def test_accesses_are_cached_until_permissions_change(user):
+    run(extract_accesses_for(user))
+    hits_before = user_accesses_cache.stats.hits
+    cached_accesses = run(extract_accesses_for(user))
+    assert_that(user_accesses_cache.stats.hits).is_equal_to(hits_before + 1)
+    assert_that(cached_accesses).does_not_contain("GET@audits")
+
+    auditor_role_id = RoleManager().ensure_role_exists("auditor")
+    AccessManager().grant(auditor_role_id, permission_to_perform="GET", at="audits")
+    RoleManager().assign(user, auditor_role_id)
+
+    assert_that(run(extract_accesses_for(user))).contains("GET@audits")
+
+
+def test_verified_token_is_not_verified_again():
+    expire = datetime.now(timezone.utc) + timedelta(minutes=5)
+    token = encode({"sub": "cachedUser01", "exp": expire}, JWT_SECRET_KEY, JWT_ALGORITHM)
+
+    first_payload = extract_payload_from(token)
+    hits_before = verified_tokens_cache.stats.hits
+    second_payload = extract_payload_from(token)
+
+    assert_that(second_payload).is_equal_to(first_payload)
+    assert_that(verified_tokens_cache.stats.hits).is_equal_to(hits_before + 1)
+
+
+def test_expired_token_is_rejected():
+    expire = datetime.now(timezone.utc) - timedelta(minutes=5)
+    token = encode({"sub": "expiredUser1", "exp": expire}, JWT_SECRET_KEY, JWT_ALGORITHM)
+
+    with raises(HTTPException) as exc:
+        extract_payload_from(token)
+    assert_that(exc.value.status_code).is_equal_to(401)
@@ -0,0 +1,150 @@
+from datetime import date
+
+from assertpy import assert_that
+from pytest import fixture
+from sqlalchemy import create_engine, delete, func, inspect, select
+from sqlalchemy.orm import Session
+
+from src.core.db.base import Base
+from src.core.db.base import engine as test_engine
+from src.core.db.managers import DBAppConfigManager, ReceiptDailyRollupManager
+from src.core.db.models import (
+    Receipt,
+    ReceiptDailyRollup,
+    ReceiptItems,
+    Role,
+    User,
+    UsersRoles,
+)
+from src.core.handlers.auth import are_passwords_matching
+from src.core.seeding import SyntheticDataGenerator, seed_synthetic_data_using
+
+
+def build_generator(seed: int = 7) -> SyntheticDataGenerator:
+    return SyntheticDataGenerator(
+        seed=seed,
+        users_count=20,
+        receipts_count=1_000,
+        days=30,
+        until=date(2026, 10, 1),
+        password="Seed1234",
+    )
+
+
+@fixture
+def seeding_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'seed.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@fixture
+def seeded_generator():
+    """seeds shared test db, so everything seeded goes away afterward, unlike the shared "user" role"""
+    generator = SyntheticDataGenerator(
+        seed=2026,
+        users_count=3,
+        receipts_count=60,
+        days=30,
+        until=date(2026, 10, 1),
+        password="Seed1234",
+    )
+    seed_synthetic_data_using(test_engine, generator, batch_size=50)
+    yield generator
+
+    # SQLite doesn't enforce ON DELETE CASCADE here, hence children go first
+    seeded_receipts = select(Receipt.id).where(Receipt.user_id.in_(generator.user_ids))
+    with Session(test_engine) as session, session.begin():
+        session.execute(delete(ReceiptItems).where(ReceiptItems.receipt_id.in_(seeded_receipts)))
+        for user_column in (Receipt.user_id, ReceiptDailyRollup.user_id, UsersRoles.user_id, User.id):
+            session.execute(delete(user_column.table).where(user_column.in_(generator.user_ids)))
+
+
+def test_same_seed_generates_same_rows():
+    first, second, other = build_generator(), build_generator(), build_generator(seed=8)
+
+    assert_that(first.generate_users()).is_equal_to(second.generate_users())
+    other.generate_users()
+    first_batches = list(first.generate_receipts_in_batches(300))
+    assert_that(first_batches).is_equal_to(list(second.generate_receipts_in_batches(300)))
+    assert_that(first_batches).is_not_equal_to(list(other.generate_receipts_in_batches(300)))
+
+
+def test_receipts_are_consistent_and_time_ordered():
+    generator = build_generator()
+    generator.generate_users()
+    receipts, items = [], []
+    for receipts_batch, items_batch in generator.generate_receipts_in_batches(300):
+        receipts.extend(receipts_batch)
+        items.extend(items_batch)
+
+    receipt_ids = [receipt[0] for receipt in receipts]
+    assert_that(receipt_ids).is_equal_to(sorted(receipt_ids)).does_not_contain_duplicates()
+    assert_that([item[0] for item in items]).does_not_contain_duplicates()
+
+    items_total_cents = {}
+    for _, receipt_id, _, price, quantity in items:
+        cents = int(price.replace(".", "")) * quantity
+        items_total_cents[receipt_id] = items_total_cents.get(receipt_id, 0) + cents
+    for receipt_id, _, _, payment_amount, total, _ in receipts:
+        assert_that(int(total.replace(".", ""))).is_equal_to(items_total_cents[receipt_id])
+        assert_that(int(payment_amount.replace(".", ""))).is_greater_than_or_equal_to(
+            items_total_cents[receipt_id]
+        )
+
+
+def test_seeding_loads_everything_and_restores_indexes(seeding_engine):
+    indexes_before = {
+        table: inspect(seeding_engine).get_indexes(table) for table in ("receipts", "receipt_items")
+    }
+
+    seeded = seed_synthetic_data_using(seeding_engine, build_generator(), batch_size=300)
+
+    assert_that(seeded).contains_entry({"users": 20}, {"receipts": 1_000})
+    indexes_after = {
+        table: inspect(seeding_engine).get_indexes(table) for table in ("receipts", "receipt_items")
+    }
+    assert_that(indexes_after).is_equal_to(indexes_before)
+
+    with Session(seeding_engine) as session:
+        assert_that(session.scalar(select(func.count()).select_from(Receipt))).is_equal_to(1_000)
+        assert_that(session.scalar(select(func.count()).select_from(ReceiptItems))).is_equal_to(
+            seeded["items"]
+        )
+        user_role_members = session.scalar(
+            select(func.count()).select_from(UsersRoles).join(Role).where(Role.name == "user")
+        )
+        assert_that(user_role_members).is_equal_to(20)
+
+        user = session.scalars(select(User).limit(1)).one()
+        assert_that(are_passwords_matching("Seed1234", user.id, user.password_hash)).is_true()
+
+        seeded_rollups = session.execute(
+            select(ReceiptDailyRollup.__table__).order_by(*ReceiptDailyRollup.__table__.primary_key)
+        ).all()
+        ReceiptDailyRollupManager(session).rebuild_for()
+        rebuilt_rollups = session.execute(
+            select(ReceiptDailyRollup.__table__).order_by(*ReceiptDailyRollup.__table__.primary_key)
+        ).all()
+        assert_that(seeded_rollups).is_length(seeded["rollups"]).is_equal_to(rebuilt_rollups)
+
+
+def test_seeded_users_can_list_their_receipts_through_api(test_client, seeded_generator):
+    DBAppConfigManager()["ACCESS_TOKEN_EXPIRE_MINUTES"] = 60
+
+    with Session(test_engine) as session:
+        seeded_receipts_count = session.scalar(
+            select(func.count()).select_from(Receipt).where(Receipt.user_id == seeded_generator.user_ids[0])
+        )
+    assert_that(seeded_receipts_count).is_positive()
+    login = test_client.post("/auth/login", json={"login": "seed2026u0", "password": "Seed1234"})
+    assert_that(login.status_code).is_equal_to(200)
+
+    response = test_client.get(
+        "/receipts/?limit=100",
+        headers={"Authorization": f"Bearer {login.json()['access_token']}"},
+    )
+
+    assert_that(response.status_code).is_equal_to(200)
+    assert_that(response.json()["receipts"]).is_length(seeded_receipts_count)
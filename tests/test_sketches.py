@@ -0,0 +1,138 @@
+from bisect import bisect
+from random import Random
+
+from assertpy import assert_that
+
+from src.core.sketches import HyperLogLog, PendingSketches, SpaceSaving, TDigest
+
+
+def test_space_saving_is_exact_while_it_has_free_counters():
+    sketch = SpaceSaving(capacity=3)
+    for key, weight in (("a", 2), ("b", 1), ("a", 3), ("c", 4)):
+        sketch.update(key, weight)
+
+    assert_that(sketch.top(3)).is_equal_to([("a", 5, 0), ("c", 4, 0), ("b", 1, 0)])
+
+
+def test_space_saving_keeps_heavy_hitters_of_long_tail():
+    randomizer = Random(2000)
+    stream = ["milk"] * 300 + ["bread"] * 200 + [f"rare-{randomizer.randrange(5000)}" for _ in range(2000)]
+    randomizer.shuffle(stream)
+
+    sketch = SpaceSaving(capacity=50)
+    for key in stream:
+        sketch.update(key)
+
+    (first, first_count, first_error), (second, second_count, second_error) = sketch.top(2)
+    assert_that((first, second)).is_equal_to(("milk", "bread"))
+    assert_that(first_count - first_error).is_less_than_or_equal_to(300)
+    assert_that(first_count).is_greater_than_or_equal_to(300)
+    assert_that(second_count - second_error).is_less_than_or_equal_to(200)
+    assert_that(len(sketch)).is_equal_to(50)
+
+
+def test_merged_space_saving_survives_round_trip_through_bytes():
+    real_counts = {"a": 3, "b": 1, "c": 1, "d": 2}
+    first, second = SpaceSaving(capacity=2), SpaceSaving(capacity=2)
+    for key in ("a", "a", "b", "c"):
+        first.update(key)
+    for key in ("a", "d", "d"):
+        second.update(key)
+
+    first.merge(second)
+    restored = SpaceSaving.from_bytes(first.to_bytes())
+
+    assert_that(restored.top(2)).is_equal_to(first.top(2))
+    for key, count, error in restored.top(2):
+        assert_that(real_counts[key]).is_between(count - error, count)
+
+
+def test_hyperloglog_estimates_within_couple_of_percents():
+    sketch = HyperLogLog(precision=14)
+    for index in range(50_000):
+        sketch.add(f"product-{index}")
+        sketch.add(f"product-{index}")
+
+    assert_that(sketch.count()).is_close_to(50_000, 1_500)
+
+
+def test_hyperloglog_is_nearly_exact_for_small_cardinalities():
+    sketch = HyperLogLog(precision=14)
+    for name in ("Milk", "Bread", "Caviar", "Milk"):
+        sketch.add(name)
+
+    assert_that(sketch.count()).is_equal_to(3)
+
+
+def test_merged_hyperloglogs_count_union_of_values():
+    monday, tuesday = HyperLogLog(precision=12), HyperLogLog(precision=12)
+    for index in range(1_000):
+        monday.add(f"user-{index}")
+    for index in range(500, 1_500):
+        tuesday.add(f"user-{index}")
+
+    monday.merge(HyperLogLog.from_bytes(tuesday.to_bytes()))
+
+    assert_that(monday.count()).is_close_to(1_500, 75)
+    assert_that(monday.merge).raises(ValueError).when_called_with(HyperLogLog(precision=10))
+
+
+def test_sparse_hyperloglogs_merge_into_same_registers_as_dense_ones():
+    sparse, dense = HyperLogLog(precision=12), HyperLogLog(precision=12)
+    for index in range(20):
+        sparse.add(f"item-{index}")
+    for index in range(10, 3_000):
+        dense.add(f"item-{index}")
+    assert_that(len(sparse.to_bytes())).is_less_than(len(dense.to_bytes()))
+
+    dense_first = HyperLogLog.from_bytes(dense.to_bytes())
+    dense_first.merge(HyperLogLog.from_bytes(sparse.to_bytes()))
+    sparse.merge(dense)
+    assert_that(sparse.to_bytes()).is_equal_to(dense_first.to_bytes())
+
+    # dense payloads are stored as they always were, precision followed by registers
+    payload = dense_first.to_bytes()
+    assert_that(payload).is_length(1 + 2**12)
+    assert_that(payload[0]).is_equal_to(12)
+    assert_that(dense_first.count()).is_close_to(3_000, 150)
+
+
+def test_merged_tdigests_keep_quantiles_within_fraction_of_percent():
+    randomizer = Random(2016)
+    totals = [randomizer.lognormvariate(3, 1) for _ in range(20_000)]
+    first_half, second_half = TDigest(compression=100), TDigest(compression=100)
+    for total in totals[:10_000]:
+        first_half.add(total)
+    for total in totals[10_000:]:
+        second_half.add(total)
+
+    first_half.merge(TDigest.from_bytes(second_half.to_bytes()))
+
+    totals.sort()
+    assert_that(first_half.count).is_equal_to(20_000)
+    assert_that((first_half.min, first_half.max)).is_equal_to((totals[0], totals[-1]))
+    for q in (0.01, 0.5, 0.95, 0.99):
+        estimated_rank = bisect(totals, first_half.quantile(q)) / len(totals)
+        assert_that(estimated_rank).is_close_to(q, 0.005)
+        assert_that(first_half.cdf(first_half.quantile(q))).is_close_to(q, 0.005)
+
+
+def test_empty_tdigest_has_no_quantiles():
+    digest = TDigest(compression=100)
+
+    assert_that(digest.quantile(0.5)).is_none()
+    assert_that(digest.cdf(10)).is_equal_to(0)
+
+
+def test_restored_pending_sketches_are_merged_with_new_ones():
+    pending = PendingSketches()
+    key = ("top_items_by_quantity", "someone", "2026-10")
+    pending.apply(key, lambda: SpaceSaving(4), lambda sketch: sketch.update("a", 1))
+
+    drained = pending.drain()
+    pending.apply(key, lambda: SpaceSaving(4), lambda sketch: sketch.update("a", 2))
+    pending.restore(drained)
+
+    merged = SpaceSaving(4)
+    pending.merge_pending_into(key, merged)
+    assert_that(merged.top(1)).is_equal_to([("a", 3, 0)])
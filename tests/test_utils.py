@@ -0,0 +1,38 @@
+from time import time_ns
+
+from assertpy import assert_that
+
+from src.core.utils import (
+    CROCKFORD_BASE32,
+    TIME_ORDERED_ID_LENGTH,
+    TimeOrderedIdGenerator,
+    extract_timestamp_ms_from,
+)
+
+
+def test_time_ordered_ids_sort_in_generation_order():
+    generate_id = TimeOrderedIdGenerator()
+    ids = [generate_id() for _ in range(10_000)]
+
+    assert_that(ids).is_equal_to(sorted(ids))
+    assert_that(set(ids)).is_length(len(ids))
+    for generated_id in ids[:100]:
+        assert_that(generated_id).is_length(TIME_ORDERED_ID_LENGTH)
+        assert_that(set(generated_id) <= set(CROCKFORD_BASE32)).is_true()
+
+
+def test_time_ordered_id_carries_its_creation_time():
+    before_ms = time_ns() // 1_000_000
+    generated_id = TimeOrderedIdGenerator()()
+    after_ms = time_ns() // 1_000_000
+
+    assert_that(extract_timestamp_ms_from(generated_id)).is_between(before_ms, after_ms)
+
+
+def test_time_ordered_ids_stay_ascending_when_clock_goes_back(monkeypatch):
+    generate_id = TimeOrderedIdGenerator()
+    monkeypatch.setattr("src.core.utils.time_ns", lambda: 2_000_000_000_000_000)
+    later_id = generate_id()
+    monkeypatch.setattr("src.core.utils.time_ns", lambda: 1_000_000_000_000_000)
+
+    assert_that(generate_id() > later_id).is_true()